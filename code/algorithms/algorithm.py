@@ -7,6 +7,8 @@ from code.classes.connection import Connection
 from code.classes.route import Route
 
 import random
+import time
+from bisect import bisect_left
 from typing import Union
 
 
@@ -25,6 +27,23 @@ class Algorithm():
         self.number_of_routes = random.randint(1, self.state.max_number_routes)
         self.number_of_connections = random.randint(1, 20)
 
+        # start from the routes of the single route oracle, see create_greedy_state,
+        # with at most greedy_number_routes routes (None for no limit)
+        self.greedy_start_state = False
+        self.greedy_number_routes: Union[int, None] = None
+
+        # upper bound on the score, see set_upper_bound
+        self.upper_bound: Union[float, None] = None
+        self.gap_threshold: Union[float, None] = None
+        self.gap: Union[float, None] = None
+
+        # max wall-clock seconds of a run (None for no limit), see time_up
+        self.time_limit: Union[float, None] = None
+        self.run_start = time.time()
+
+        # station adjacency of the single route oracle, built on first use
+        self._oracle_adjacency: Union[list[list[tuple[int, int, float]]], None] = None
+
     def __str__(self):
         return "Algorithm object"
 
@@ -75,6 +94,80 @@ class Algorithm():
 
         self.state.awaken_state(sleeper_string)
 
+    #### OPTIMALITY GAP METHODS ####
+
+    def set_upper_bound(self, upper_bound: Union[float, None], gap_threshold: Union[float, None] = None) -> None:
+        """
+        sets an upper bound on the score (see bound.py), to report the gap of the results
+
+        pre:
+            upper_bound is greater than 0, or None for no bound
+            gap_threshold is the gap below which a run stops, or None to never stop early
+
+        post:
+            self.upper_bound and self.gap_threshold are set
+        """
+        assert upper_bound is None or upper_bound > 0, "upper_bound should be greater than 0"
+        assert gap_threshold is None or gap_threshold >= 0, \
+            "gap_threshold can not be negative"
+
+        self.upper_bound = upper_bound
+        self.gap_threshold = gap_threshold
+
+    def get_gap(self, score: float) -> Union[float, None]:
+        """
+        gives the relative gap between a score and the upper bound
+
+        returns:
+            (upper bound - score) / upper bound
+            None if no upper bound is set
+        """
+        if self.upper_bound is None:
+            return None
+
+        return (self.upper_bound - score) / self.upper_bound
+
+    def update_gap(self, state: 'State', score: Union[float, None] = None) -> bool:
+        """
+        saves the gap of the result state of a run and checks the stop criterion
+
+        pre:
+            score is the score of state, or None to calculate it
+
+        post:
+            self.gap is the gap of the score of the state, or None if no upper
+            bound is set or the state breaks the constraints (the gap means nothing then)
+
+        returns:
+            True if the gap is below the gap threshold, so the run can stop
+        """
+        if self.upper_bound is None or not state.is_valid_solution_without_connection():
+            self.gap = None
+            return False
+
+        self.gap = self.get_gap(state.calculate_score() if score is None else score)
+
+        return self.gap is not None and self.gap_threshold is not None and \
+            self.gap <= self.gap_threshold
+
+    #### TIME LIMIT METHODS ####
+
+    def start_timer(self) -> None:
+        """
+        post:
+            the time of the run is counted from now
+        """
+        self.run_start = time.time()
+
+    def time_up(self) -> bool:
+        """
+        checks the time limit of a run, the run then stops with its best state so far
+
+        returns:
+            True if a time_limit is set and the run takes longer than time_limit seconds
+        """
+        return self.time_limit is not None and time.time() - self.run_start > self.time_limit
+
     #### METHODS FOR STATE CREATION ####
 
     def create_state(self) -> None:
@@ -85,9 +178,12 @@ class Algorithm():
             self.valid_start_state is a boolean
 
         post:
-            a random or a valid start state is created 
+            a greedy start state is created if self.greedy_start_state is True,
+            otherwise a random or a valid start state is created 
         """
-        if self.valid_start_state:
+        if self.greedy_start_state:
+            self.create_greedy_state(self.greedy_number_routes)
+        elif self.valid_start_state:
             self.create_valid_state()
         else:
             self.create_random_state()
@@ -230,20 +326,35 @@ class Algorithm():
             either ' start' or 'end' based on where the connection is added
         """
 
+        return self.add_random_connection_to_route(self.state.routes[route_index], choice)
+
+    def add_random_connection_to_route(self, route: 'Route', choice: Union[str, None] = None) -> str:
+        """
+        adds a random available connection to the given route
+
+        pre: 
+            route is a Route object in state.routes
+            choice is either None, 'start' or 'end'  
+
+        post:
+            a connection is added (either at beginning or end) to the route
+
+        returns:
+            either ' start' or 'end' based on where the connection is added
+        """
         # determine choice if not prematurely done
         if choice == None:
             choice = random.choice(['start', 'end'])
 
         if choice == 'start':
             new_connection = random.choice(self.get_allowed_connections_start(
-                self.state.routes[route_index], self.state.routes[route_index].get_start_station()))
+                route, route.get_start_station()))
 
         elif choice == 'end':
             new_connection = random.choice(self.get_allowed_connections_end(
-                self.state.routes[route_index], self.state.routes[route_index].get_end_station()))
+                route, route.get_end_station()))
 
-        self.state.add_connection_to_route(
-            self.state.routes[route_index], new_connection)
+        self.state.add_connection_to_route(route, new_connection)
 
         return choice
 
@@ -281,6 +392,273 @@ class Algorithm():
 
         self.state.delete_route(route)
 
+    #### RANDOM ROUTE EXCHANGE METHODS ####
+
+    def _get_over_time_routes(self) -> list['Route']:
+        """
+        gives all routes that exceed the time frame
+
+        returns:
+            list of Route objects
+        """
+        return [route for route in self.state.routes
+                if not route.is_valid_time(self.state.time_frame)]
+
+    def swap_random_route_tails(self) -> bool:
+        """
+        swaps the tails of two random routes at a shared station,
+        starting from an over-long route if there is one
+
+        post:
+            two routes have exchanged their tails
+
+        returns:
+            True if a swap was made
+        """
+        if self.state.number_routes < 2:
+            return False
+
+        route_1 = random.choice(
+            self._get_over_time_routes() or self.state.routes)
+
+        # collect all places where another route visits a station of route_1
+        stations = {station: index
+                    for index, station in enumerate(route_1.route_stations)}
+        candidates = [(stations[station], route_2, index_2)
+                      for route_2 in self.state.routes if route_2 is not route_1
+                      for index_2, station in enumerate(route_2.route_stations)
+                      if station in stations]
+        random.shuffle(candidates)
+
+        for index_1, route_2, index_2 in candidates:
+            if self.state.swap_route_tails(route_1, index_1, route_2, index_2):
+                return True
+        return False
+
+    def split_random_route(self) -> bool:
+        """
+        splits a random route at a random station,
+        an over-long route if there is one
+
+        post:
+            the route is split into two routes
+
+        returns:
+            True if a split was made
+        """
+        routes = [route for route in
+                  self._get_over_time_routes() or self.state.routes
+                  if len(route.route_connections) > 1]
+        if not routes:
+            return False
+
+        route = random.choice(routes)
+        station_index = random.randint(1, len(route.route_stations) - 2)
+
+        return self.state.split_route(route, station_index)
+
+    def merge_random_routes(self) -> bool:
+        """
+        merges two random routes with a shared end station,
+        if the merged route stays within the time frame
+
+        post:
+            two routes are merged into one
+
+        returns:
+            True if a merge was made
+        """
+        candidates = []
+        for index, route_1 in enumerate(self.state.routes):
+            for route_2 in self.state.routes[index + 1:]:
+                evaluation = self.state.evaluate_merge(route_1, route_2)
+                if evaluation and evaluation[1][0] < self.state.time_frame:
+                    candidates.append((route_1, route_2))
+
+        if not candidates:
+            return False
+
+        route_1, route_2 = random.choice(candidates)
+
+        return self.state.merge_routes(route_1, route_2)
+
+    def reverse_random_route(self) -> None:
+        """
+        reverses the direction of a random route
+
+        post:
+            start and end of the route are swapped
+        """
+        if self.state.routes:
+            self.state.reverse_route(random.choice(self.state.routes))
+
+    #### SINGLE ROUTE ORACLE ####
+
+    def _get_oracle_adjacency(self) -> list[list[tuple[int, int, float]]]:
+        """
+        gives per station index the (connection index, other station index, distance)
+        of its connections, indices are the same in every copy of the state
+        """
+        if self._oracle_adjacency is None:
+            station_index = {station: index for index,
+                             station in enumerate(self.state.stations)}
+            connection_index = {connection: index for index,
+                                connection in enumerate(self.state.connections)}
+
+            self._oracle_adjacency = [
+                [(connection_index[connection],
+                  station_index[connection.station_2 if connection.station_1 == station else connection.station_1],
+                  connection.distance)
+                 for connection in station.connections]
+                for station in self.state.stations]
+
+        return self._oracle_adjacency
+
+    def get_route_contribution(self, route: 'Route') -> float:
+        """
+        gives the score a route adds to the state: the coverage of connections
+        only this route drives, minus the costs of the route
+
+        returns:
+            the contribution of the route to the score
+        """
+        connection_value = 10000 / self.state.total_number_connections
+
+        # a connection is covered only by this route if all its uses are in it
+        unique_coverage = sum(
+            connection_value for connection in set(route.route_connections)
+            if connection.used == route.route_connections.count(connection))
+
+        return unique_coverage - 100 - route.total_time
+
+    def find_best_route(self, max_expansions: int = 200000) -> tuple[float, list['Connection']]:
+        """
+        searches (depth-first) the route with the highest marginal score: the value of
+        the connections it covers that no route covers yet, minus 100 and its minutes
+
+        post:
+            paths reaching a station with the same covered connections in more time
+            than before are pruned (memoisation), just like paths whose value plus an
+            admissible bound (the shortest uncovered connections that fit in the time
+            left) can not beat the best route
+            the search stops after max_expansions connections
+
+        returns:
+            the marginal score of the best route
+            list of its connections, empty if no connection fits in the time frame
+        """
+        adjacency = self._get_oracle_adjacency()
+        connections = self.state.connections
+        time_frame = self.state.time_frame
+        connection_value = 10000 / self.state.total_number_connections
+
+        uncovered = [connection.used == 0 for connection in connections]
+
+        # best gain of adding k uncovered connections with the shortest total distance
+        minutes = [0.0]
+        for distance in sorted(connection.distance for connection in connections
+                               if connection.used == 0):
+            minutes.append(minutes[-1] + distance)
+        best_gains = [0.0]
+        for number_connections in range(1, len(minutes)):
+            best_gains.append(max(best_gains[-1],
+                                  number_connections * connection_value - minutes[number_connections]))
+
+        best_value = float('-inf')
+        best_path: list[int] = []
+        fastest: dict[tuple[int, int], float] = {}
+        expansions = 0
+
+        def search(station: int, covered: int, number_covered: int, time: float, path: list[int]) -> None:
+            nonlocal best_value, best_path, expansions
+
+            # admissible bound on the value of any extension of this path
+            fitting = bisect_left(minutes, time_frame - time) - 1
+            if number_covered * connection_value - 100 - time + best_gains[fitting] <= best_value:
+                return
+
+            # try uncovered connections first, to find good routes early
+            for connection, other_station, distance in sorted(
+                    adjacency[station], key=lambda item: not uncovered[item[0]]):
+                new_time = time + distance
+                if new_time >= time_frame or expansions >= max_expansions:
+                    continue
+                expansions += 1
+
+                new_covered, new_number_covered = covered, number_covered
+                if uncovered[connection] and not covered >> connection & 1:
+                    new_covered |= 1 << connection
+                    new_number_covered += 1
+
+                if fastest.get((other_station, new_covered), time_frame) <= new_time:
+                    continue
+                fastest[(other_station, new_covered)] = new_time
+
+                path.append(connection)
+
+                value = new_number_covered * connection_value - 100 - new_time
+                if value > best_value:
+                    best_value = value
+                    best_path = list(path)
+
+                search(other_station, new_covered, new_number_covered, new_time, path)
+                path.pop()
+
+        for station in range(len(adjacency)):
+            search(station, 0, 0, 0.0, [])
+
+        return best_value, [connections[connection] for connection in best_path]
+
+    def create_greedy_state(self, number_routes: Union[int, None] = None) -> None:
+        """
+        creates a start state by adding the best route of the oracle,
+        as long as it increases the score
+
+        pre:
+            self.state doesn't consist of any routes
+            number_routes is the max number of routes, None for max_number_routes
+
+        post:
+            self.state has routes within the time frame
+        """
+        if number_routes is None:
+            number_routes = self.state.max_number_routes
+
+        while self.state.number_routes < min(number_routes, self.state.max_number_routes):
+            value, connections = self.find_best_route()
+            if value <= 0 or not connections:
+                break
+
+            self.state.add_route_from_connections(connections)
+
+    def replace_worst_route(self) -> bool:
+        """
+        replaces the route with the lowest contribution by the best route of the oracle,
+        if that route adds more to the score
+
+        post:
+            the worst route is replaced, or the state is unchanged
+
+        returns:
+            True if the route was replaced
+        """
+        if not self.state.routes:
+            return False
+
+        route = min(self.state.routes, key=self.get_route_contribution)
+        contribution = self.get_route_contribution(route)
+        old_connections = list(route.route_connections)
+
+        self.state.delete_route(route)
+        value, connections = self.find_best_route()
+
+        if connections and value > contribution:
+            self.state.add_route_from_connections(connections)
+            return True
+
+        self.state.add_route_from_connections(old_connections)
+        return False
+
     #### CONNECTION SUGGESTIONS HEURISTIC ####
 
     def station_has_one_unused_connection(self, state: 'State', station: 'Station') -> Union[bool, 'Connection']:
@@ -0,0 +1,285 @@
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import math
+import numpy as np
+from typing import Union
+
+
+class Score_histogram():
+    def __init__(self, bin_width: float = 10.0) -> None:
+        """
+        initializes a streaming histogram of scores with fixed-width bins,
+        the range of the bins grows with the scores
+
+        pre:
+            bin_width is greater than 0
+
+        post:
+            the histogram is empty
+        """
+        assert bin_width > 0, "bin_width should be greater than 0"
+
+        self.bin_width = bin_width
+        self.counts: dict[int, int] = {}
+
+        self.number_scores: int = 0
+        self.total: float = 0.0
+        self.minimum: float = math.inf
+        self.maximum: float = -math.inf
+
+    def add(self, scores: 'np.ndarray') -> None:
+        """
+        adds a batch of scores
+
+        post:
+            bin counts, number of scores, total, minimum and maximum are updated
+        """
+        if len(scores) == 0:
+            return
+
+        bins, counts = np.unique(np.floor(scores / self.bin_width).astype(np.int64),
+                                 return_counts=True)
+        for score_bin, count in zip(bins.tolist(), counts.tolist()):
+            self.counts[score_bin] = self.counts.get(score_bin, 0) + count
+
+        self.number_scores += len(scores)
+        self.total += float(scores.sum())
+        self.minimum = min(self.minimum, float(scores.min()))
+        self.maximum = max(self.maximum, float(scores.max()))
+
+    def get_mean(self) -> float:
+        return self.total / self.number_scores
+
+    def get_quantile(self, quantile: float) -> float:
+        """
+        gives the score below which the given fraction of the scores is,
+        accurate up to the bin width
+
+        pre:
+            0 <= quantile <= 1 and the histogram is not empty
+        """
+        assert 0 <= quantile <= 1, "quantile should be between 0 and 1"
+        assert self.number_scores, "the histogram is empty"
+
+        target = quantile * self.number_scores
+        cumulative = 0
+        for score_bin in sorted(self.counts):
+            count = self.counts[score_bin]
+
+            # interpolate within the bin
+            if cumulative + count >= target:
+                fraction = (target - cumulative) / count
+                score = (score_bin + fraction) * self.bin_width
+                return min(max(score, self.minimum), self.maximum)
+            cumulative += count
+
+        return self.maximum
+
+    def get_rows(self) -> list[list[float]]:
+        """
+        gives the histogram as rows of (lower bound of bin, count)
+        """
+        return [[score_bin * self.bin_width, self.counts[score_bin]]
+                for score_bin in sorted(self.counts)]
+
+
+class Baseline_sampler():
+    def __init__(self, state: 'State', mode: str = 'routes', number_routes: Union[int, None] = None, batch_size: int = 10000, seed: Union[int, None] = None) -> None:
+        """
+        initializes a sampler of random-walk solutions, that walks all routes of
+        a batch of solutions in lockstep over a CSR adjacency of the network
+
+        the sampler implements the intended semantics of baseline_algorithm_3/2:
+        the connection that takes a route over the time frame is removed from
+        that route, while the baseline algorithms remove it from a random route
+        (delete_random_connection does not use its route_index). So the sampled
+        distributions are not directly comparable to the data/baseline* files,
+        on Holland 'routes' mode gives a mean Min of 777, baseline_algorithm_3 788
+
+        pre:
+            mode is 'routes': number_routes random routes per solution, each grown at
+            a random end until the next connection would reach the time frame
+            mode is 'cover': such random routes are added until all connections
+            are used
+            number_routes is only used in 'routes' mode, max_number_routes if None
+
+        post:
+            the adjacency arrays are built
+        """
+        assert mode in ('routes', 'cover'), f"invalid mode: {mode}"
+        assert batch_size > 0, "batch_size should be greater than 0"
+
+        self.state = state
+        self.mode = mode
+        self.number_routes: int = number_routes or state.max_number_routes
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+
+        self.time_frame: float = state.time_frame
+        self.number_connections: int = len(state.connections)
+
+        station_index = {station: index for index,
+                         station in enumerate(state.stations)}
+        connection_index = {connection: index for index,
+                            connection in enumerate(state.connections)}
+
+        # CSR adjacency: the connections of station s are at indptr[s]:indptr[s + 1]
+        self.degrees = np.array([len(station.connections) for station in state.stations])
+        self.indptr = np.concatenate([[0], np.cumsum(self.degrees)])
+        self.edge_connections = np.array(
+            [connection_index[connection]
+             for station in state.stations for connection in station.connections])
+        self.edge_stations = np.array(
+            [station_index[connection.station_2 if connection.station_1 == station else connection.station_1]
+             for station in state.stations for connection in station.connections])
+
+        self.distances = np.array([connection.distance for connection in state.connections])
+        self.connection_stations = np.array(
+            [[station_index[connection.station_1], station_index[connection.station_2]]
+             for connection in state.connections])
+
+        self.histograms: dict[str, 'Score_histogram'] = {
+            'score': Score_histogram(10),
+            'p': Score_histogram(0.01),
+            'T': Score_histogram(1),
+            'Min': Score_histogram(10)}
+
+    def _start_walks(self, number_walks: int) -> tuple['np.ndarray', 'np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        starts walks with a random first connection
+
+        returns:
+            first connections, start stations, end stations and times of the walks
+        """
+        connections = self.rng.integers(self.number_connections, size=number_walks)
+
+        return (connections,
+                self.connection_stations[connections, 0].copy(),
+                self.connection_stations[connections, 1].copy(),
+                self.distances[connections].copy())
+
+    def _step(self, walks: 'np.ndarray', starts: 'np.ndarray', ends: 'np.ndarray', times: 'np.ndarray') -> tuple['np.ndarray', 'np.ndarray']:
+        """
+        grows the given walks with a random connection at a random end,
+        unless the connection would reach the time frame
+
+        post:
+            start stations, end stations and times of the grown walks are updated
+
+        returns:
+            drawn connection and whether it was added, per given walk
+        """
+        at_start = self.rng.random(len(walks)) < 0.5
+        stations = np.where(at_start, starts[walks], ends[walks])
+
+        edges = self.indptr[stations] + \
+            (self.rng.random(len(walks)) * self.degrees[stations]).astype(np.int64)
+        connections = self.edge_connections[edges]
+
+        new_times = times[walks] + self.distances[connections]
+        grown = new_times < self.time_frame
+        times[walks[grown]] = new_times[grown]
+
+        grown_start = grown & at_start
+        starts[walks[grown_start]] = self.edge_stations[edges[grown_start]]
+        grown_end = grown & ~at_start
+        ends[walks[grown_end]] = self.edge_stations[edges[grown_end]]
+
+        return connections, grown
+
+    def sample_routes(self, batch_size: int) -> tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        samples solutions with number_routes random routes each
+
+        returns:
+            per solution the number of used connections, number of routes and minutes
+        """
+        number_walks = batch_size * self.number_routes
+        solutions = np.arange(number_walks) // self.number_routes
+
+        used = np.zeros((batch_size, self.number_connections), dtype=bool)
+        connections, starts, ends, times = self._start_walks(number_walks)
+        used[solutions, connections] = True
+
+        walks = np.arange(number_walks)
+        while len(walks):
+            connections, grown = self._step(walks, starts, ends, times)
+            walks = walks[grown]
+            used[solutions[walks], connections[grown]] = True
+
+        return used.sum(axis=1), np.full(batch_size, self.number_routes), \
+            times.reshape(batch_size, self.number_routes).sum(axis=1)
+
+    def sample_cover(self, batch_size: int) -> tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        samples solutions that get random routes until all connections are used,
+        with one growing walk per solution at a time
+
+        returns:
+            per solution the number of used connections, number of routes and minutes
+        """
+        solutions = np.arange(batch_size)
+
+        used = np.zeros((batch_size, self.number_connections), dtype=bool)
+        number_used = np.ones(batch_size, dtype=np.int64)
+        number_routes = np.ones(batch_size, dtype=np.int64)
+        minutes = np.zeros(batch_size)
+
+        connections, starts, ends, times = self._start_walks(batch_size)
+        used[solutions, connections] = True
+
+        walks = solutions
+        while len(walks):
+            connections, grown = self._step(walks, starts, ends, times)
+
+            # every solution has one walk, so no connection is counted twice
+            growing = walks[grown]
+            new = ~used[growing, connections[grown]]
+            used[growing, connections[grown]] = True
+            number_used[growing] += new
+
+            # a finished route completes the solution or a new route is started
+            stopped = walks[~grown]
+            minutes[stopped] += times[stopped]
+            restarted = stopped[number_used[stopped] < self.number_connections]
+
+            new_connections, new_starts, new_ends, new_times = self._start_walks(len(restarted))
+            starts[restarted], ends[restarted], times[restarted] = new_starts, new_ends, new_times
+            number_routes[restarted] += 1
+            number_used[restarted] += ~used[restarted, new_connections]
+            used[restarted, new_connections] = True
+
+            walks = np.concatenate([growing, restarted])
+
+        return number_used, number_routes, minutes
+
+    def run(self, number_samples: int) -> dict[str, 'Score_histogram']:
+        """
+        samples solutions in batches and streams their score components into histograms
+
+        post:
+            self.histograms has a histogram of the score, fraction of used connections (p),
+            number of routes (T) and minutes (Min) of all samples so far
+
+        returns:
+            self.histograms
+        """
+        sample = self.sample_routes if self.mode == 'routes' else self.sample_cover
+
+        while number_samples > 0:
+            batch_size = min(self.batch_size, number_samples)
+            number_used, number_routes, minutes = sample(batch_size)
+
+            fractions = number_used / self.number_connections
+            scores = fractions * 10000 - (100 * number_routes + minutes)
+
+            self.histograms['score'].add(scores)
+            self.histograms['p'].add(fractions)
+            self.histograms['T'].add(number_routes)
+            self.histograms['Min'].add(minutes)
+
+            number_samples -= batch_size
+
+        return self.histograms
@@ -0,0 +1,66 @@
+from .set_covering import Set_covering
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import numpy as np
+
+
+def get_combinatorial_bound(state: 'State') -> float:
+    """
+    calculates an upper bound on the score of any solution of the state
+
+    every covered connection is driven at least once and every route is
+    shorter than the time frame, so covering c connections with T routes costs
+    at least the c shortest distances, which have to fit in T time frames
+
+    returns:
+        the highest c * 10000 / total connections - (100 * T + c shortest distances)
+        over all feasible numbers of routes T and covered connections c
+    """
+    distances = np.sort([connection.distance for connection in state.connections
+                         if connection.distance < state.time_frame])
+    minutes = np.concatenate([[0], np.cumsum(distances)])
+    covered = np.arange(len(minutes))
+
+    connection_value = 10000 / len(state.connections)
+    upper_bound = 0.0
+
+    for number_routes in range(1, state.max_number_routes + 1):
+        feasible = minutes < number_routes * state.time_frame
+        scores = covered * connection_value - (100 * number_routes + minutes)
+        upper_bound = max(upper_bound, scores[feasible].max())
+
+    return float(upper_bound)
+
+
+def get_simple_route_lp_bound(state: 'State', time_limit: float = 300.0) -> float:
+    """
+    calculates a simple-route bound with the linear programming relaxation of the
+    route selection problem of Set_covering, over the pool of all simple routes
+
+    this is no upper bound on the score of any solution: a solution with routes
+    that drive a connection twice can score higher, only the combinatorial bound
+    holds for all solutions
+
+    returns:
+        the bound on solutions with routes that drive every connection at most once
+    """
+    set_covering = Set_covering(state, time_limit)
+    set_covering.enumerate_routes()
+    result = set_covering.solve(relax=True)
+
+    assert result.status == 0, f"linear program not solved: {result.message}"
+
+    return min(-result.fun, get_combinatorial_bound(state))
+
+
+def get_upper_bound(state: 'State') -> float:
+    """
+    gives the upper bound on the score of any solution, the bound of the
+    optimality gap of the algorithms (see Algorithm.set_upper_bound)
+
+    returns:
+        the combinatorial bound
+    """
+    return get_combinatorial_bound(state)
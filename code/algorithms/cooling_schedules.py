@@ -0,0 +1,321 @@
+import copy
+import math
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Union
+
+
+def get_temperature_for_acceptance(deltas: list[float], acceptance: float) -> Union[float, None]:
+    """
+    searches (bisection on the log of the temperature) the temperature at which
+    the mean 2 ** (delta / temperature) acceptance chance of worse changes
+    equals the given acceptance rate
+
+    pre:
+        deltas are the score differences of sampled changes
+        acceptance is between 0 and 1
+
+    returns:
+        the temperature
+        None if no sampled change is worse
+    """
+    assert 0 < acceptance < 1, "acceptance should be between 0 and 1"
+
+    worse = np.array([delta for delta in deltas if delta < 0])
+    if len(worse) == 0:
+        return None
+
+    low, high = math.log(1e-6), math.log(1e9)
+    for _ in range(100):
+        middle = (low + high) / 2
+
+        if np.mean(2.0 ** (worse / math.exp(middle))) < acceptance:
+            low = middle
+        else:
+            high = middle
+
+    return math.exp((low + high) / 2)
+
+
+class Cooling_schedule(ABC):
+    def __init__(self) -> None:
+        """
+        initializes a cooling schedule, the temperatures are computed by start
+
+        post:
+            self.temperatures is empty
+            no end temperature is set
+        """
+        self.temperatures: list[float] = []
+        self.end_temperature: Union[float, None] = None
+
+    @abstractmethod
+    def compute(self, start_temperature: float, iterations: int) -> 'np.ndarray':
+        """
+        computes the temperature of every iteration
+
+        returns:
+            array with iterations temperatures
+        """
+
+    def set_end_temperature(self, end_temperature: float) -> None:
+        """
+        sets the temperature of the last iteration, used by schedules that can end
+        at a given temperature (lineair and exponential)
+        """
+        self.end_temperature = end_temperature
+
+    def start(self, start_temperature: float, iterations: int) -> None:
+        """
+        precomputes the whole schedule at the start of a run
+
+        post:
+            self.temperatures has a temperature for every iteration
+        """
+        self.temperatures = self.compute(start_temperature, iterations).tolist()
+
+    def get_temperature(self, iteration: int) -> float:
+        """
+        gives the temperature of an iteration
+
+        pre:
+            start is called and iteration is less than the number of iterations
+        """
+        return self.temperatures[iteration]
+
+    def update(self, iteration: int, accepted: bool, current_score: float, delta: float = 0.0) -> None:
+        """
+        lets the schedule react on the outcome of an iteration,
+        fixed schedules ignore it
+
+        pre:
+            delta is the score difference of the proposed change
+        """
+        pass
+
+
+class Lineair_schedule(Cooling_schedule):
+    def compute(self, start_temperature: float, iterations: int) -> 'np.ndarray':
+        """
+        computes temperatures that decrease lineair to zero after the last iteration,
+        or to the end temperature at the last iteration if it is set
+        """
+        if self.end_temperature is not None and iterations > 1:
+            return np.linspace(start_temperature, self.end_temperature, iterations)
+
+        return start_temperature - (start_temperature / iterations) * np.arange(iterations)
+
+
+class Exponential_schedule(Cooling_schedule):
+    def __init__(self, cooling_rate: float = 0.997) -> None:
+        """
+        initializes a schedule that multiplies the temperature by cooling_rate every iteration
+
+        pre:
+            cooling_rate is between 0 and 1
+        """
+        super().__init__()
+
+        assert 0 < cooling_rate < 1, "cooling_rate should be between 0 and 1"
+
+        self.cooling_rate = cooling_rate
+
+    def compute(self, start_temperature: float, iterations: int) -> 'np.ndarray':
+        """
+        computes temperatures with a constant cooling rate, the rate reaches
+        the end temperature at the last iteration if it is set
+        """
+        cooling_rate = self.cooling_rate
+        if self.end_temperature is not None and iterations > 1:
+            cooling_rate = (self.end_temperature / start_temperature) ** (1 / (iterations - 1))
+
+        return start_temperature * cooling_rate ** np.arange(iterations)
+
+
+class Logaritmic_schedule(Cooling_schedule):
+    def compute(self, start_temperature: float, iterations: int) -> 'np.ndarray':
+        """
+        computes temperatures that decrease with the logarithm of the iteration
+        """
+        return start_temperature / (1 + np.log(1 + np.arange(iterations)))
+
+
+class Array_schedule(Cooling_schedule):
+    def __init__(self, temperatures: list[float]) -> None:
+        """
+        initializes a schedule with user-supplied temperatures,
+        the start temperature of the annealer is ignored
+
+        pre:
+            all temperatures are positive
+        """
+        super().__init__()
+
+        assert all(temperature > 0 for temperature in temperatures), \
+            "temperatures should be positive"
+
+        self.given_temperatures = np.array(temperatures, dtype=float)
+
+    def compute(self, start_temperature: float, iterations: int) -> 'np.ndarray':
+        assert len(self.given_temperatures) >= iterations, \
+            "less temperatures than iterations"
+
+        return self.given_temperatures[:iterations]
+
+
+class Adaptive_schedule(Cooling_schedule):
+    def __init__(self, schedule: Union['Cooling_schedule', None] = None, target_acceptance: float = 0.2, window_size: int = 100, adjustment: float = 0.9) -> None:
+        """
+        initializes a schedule that scales the temperatures of another schedule,
+        to keep the acceptance rate of worse changes near a target
+
+        pre:
+            schedule is the schedule to scale, exponential if None
+            target_acceptance is between 0 and 1
+            adjustment is between 0 and 1
+
+        post:
+            the scale is set every window_size worse changes
+        """
+        super().__init__()
+
+        assert 0 < target_acceptance < 1, "target_acceptance should be between 0 and 1"
+        assert 0 < adjustment < 1, "adjustment should be between 0 and 1"
+        assert window_size > 0, "window_size should be greater than 0"
+
+        if schedule is None:
+            schedule = Exponential_schedule()
+
+        self.schedule = schedule
+        self.target_acceptance = target_acceptance
+        self.window_size = window_size
+        self.adjustment = adjustment
+
+        self.scale: float = 1.0
+        self.accepted_count: int = 0
+        self.window_count: int = 0
+
+    def set_end_temperature(self, end_temperature: float) -> None:
+        self.schedule.set_end_temperature(end_temperature)
+
+    def compute(self, start_temperature: float, iterations: int) -> 'np.ndarray':
+        return self.schedule.compute(start_temperature, iterations)
+
+    def start(self, start_temperature: float, iterations: int) -> None:
+        super().start(start_temperature, iterations)
+
+        self.scale = 1.0
+        self.accepted_count = 0
+        self.window_count = 0
+
+    def get_temperature(self, iteration: int) -> float:
+        return self.temperatures[iteration] * self.scale
+
+    def update(self, iteration: int, accepted: bool, current_score: float, delta: float = 0.0) -> None:
+        """
+        cools faster if more worse changes are accepted than the target, slower otherwise,
+        better and equal changes are always accepted and are not counted
+        """
+        if delta >= 0:
+            return
+
+        self.accepted_count += accepted
+        self.window_count += 1
+
+        if self.window_count < self.window_size:
+            return
+
+        if self.accepted_count / self.window_count > self.target_acceptance:
+            self.scale *= self.adjustment
+        else:
+            self.scale /= self.adjustment
+
+        self.accepted_count = 0
+        self.window_count = 0
+
+
+class Reheating_schedule(Cooling_schedule):
+    def __init__(self, schedule: Union['Cooling_schedule', None] = None, patience: int = 1000, reheat_fraction: float = 0.5) -> None:
+        """
+        initializes a schedule that restarts another schedule at a fraction of
+        its start temperature when the score stagnates
+
+        pre:
+            schedule is the schedule to restart, exponential if None
+            patience is the number of iterations without improvement before reheating
+            reheat_fraction is between 0 and 1
+        """
+        super().__init__()
+
+        assert patience > 0, "patience should be greater than 0"
+        assert 0 < reheat_fraction <= 1, "reheat_fraction should be between 0 and 1"
+
+        if schedule is None:
+            schedule = Exponential_schedule()
+
+        self.schedule = schedule
+        self.patience = patience
+        self.reheat_fraction = reheat_fraction
+
+        self.best_score: float = float('-inf')
+        self.last_improvement: int = 0
+        self.restart_iteration: int = 0
+        self.scale: float = 1.0
+        self.reheats: int = 0
+
+    def set_end_temperature(self, end_temperature: float) -> None:
+        self.schedule.set_end_temperature(end_temperature)
+
+    def compute(self, start_temperature: float, iterations: int) -> 'np.ndarray':
+        return self.schedule.compute(start_temperature, iterations)
+
+    def start(self, start_temperature: float, iterations: int) -> None:
+        super().start(start_temperature, iterations)
+
+        self.best_score = float('-inf')
+        self.last_improvement = 0
+        self.restart_iteration = 0
+        self.scale = 1.0
+        self.reheats = 0
+
+    def get_temperature(self, iteration: int) -> float:
+        return self.temperatures[iteration - self.restart_iteration] * self.scale
+
+    def update(self, iteration: int, accepted: bool, current_score: float, delta: float = 0.0) -> None:
+        """
+        reheats if the best score did not improve for patience iterations
+        """
+        if current_score > self.best_score:
+            self.best_score = current_score
+            self.last_improvement = iteration
+        elif iteration - self.last_improvement >= self.patience:
+            self.restart_iteration = iteration + 1
+            self.last_improvement = iteration
+            self.scale = self.reheat_fraction
+            self.reheats += 1
+
+
+def get_cooling_schedule(cooling_scheme: Union[str, 'Cooling_schedule']) -> 'Cooling_schedule':
+    """
+    gives the schedule object of a cooling scheme name
+
+    pre:
+        cooling_scheme is 'lineair', 'exponential', 'logaritmic', 'adaptive',
+        'reheating' or a Cooling_schedule object
+
+    returns:
+        Cooling_schedule object, a copy of a given object, so runs or replicas
+        that get the same object do not share its state
+    """
+    if isinstance(cooling_scheme, Cooling_schedule):
+        return copy.deepcopy(cooling_scheme)
+
+    schedules = {'lineair': Lineair_schedule,
+                 'exponential': Exponential_schedule,
+                 'logaritmic': Logaritmic_schedule,
+                 'adaptive': Adaptive_schedule,
+                 'reheating': Reheating_schedule}
+
+    assert cooling_scheme in schedules, f"invalid cooling scheme: {cooling_scheme}"
+
+    return schedules[cooling_scheme]()
@@ -1,20 +1,27 @@
 from .algorithm import Algorithm
+from .move_operators import Move_registry, create_default_registry
 from sys import path
 path.append("../classes")
 from state import State
 
-import random
 import copy
-from sys import path
+import time
+from typing import Union
 
 
 class Hill_climber(Algorithm):
-    def __init__(self, state: object, valid_start_state: bool = True, max_connection_returns: int = 0) -> None:
+    def __init__(self, state: object, valid_start_state: bool = True, max_connection_returns: int = 0, move_registry: Union['Move_registry', None] = None, adaptive_moves: bool = False, route_exchange_moves: bool = False, oracle_moves: bool = False) -> None:
         """
         initializes the hillclimber with a starting state
 
         pre: 
             the given state is a object
+            move_registry is a Move_registry object, or None for the default moves
+            adaptive_moves is True if the move probabilities should be learned online
+            route_exchange_moves is True if the default moves should include tail
+            swap, split, merge and reverse (heavy changes only)
+            oracle_moves is True if the default moves should include replacing the
+            worst route by the best route of the oracle (heavy changes only)
 
         post: 
             creates a start state for self.state and copies that to self.current_state
@@ -26,6 +33,65 @@ class Hill_climber(Algorithm):
 
         self.current_state = copy.deepcopy(self.state)
 
+        # registry with move operators and their weights per context
+        if move_registry is None:
+            move_registry = create_default_registry(route_exchange_moves, oracle_moves)
+        self.move_registry = move_registry
+
+        # in adaptive mode all moves are arms, light or heavy is learned
+        self.adaptive_moves = adaptive_moves
+        if adaptive_moves and self.move_registry.adaptive is None:
+            self.move_registry.enable_adaptive()
+
+        # last applied move, saved until its outcome is known
+        self.last_move: Union[str, None] = None
+        self.move_start_time: float = 0.0
+
+    def get_move_context(self, route: Union['Route', None], change_light: bool) -> str:
+        """
+        determines which moves are possible in the current state
+
+        pre:
+            route is a route able to add a connection, or None
+
+        returns:
+            name of the move context in the move registry
+            in adaptive mode always a heavy context, because all moves are arms
+        """
+        can_add_connection = route is not None
+        can_add_route = self.state.number_routes < self.state.max_number_routes
+
+        if change_light and not self.adaptive_moves:
+            if not can_add_connection:
+                return 'light_full'
+            return 'light_add_connection'
+
+        if not can_add_connection and can_add_route:
+            return 'heavy_add_route'
+        elif not can_add_connection:
+            return 'heavy_full'
+        elif can_add_route:
+            return 'heavy_add_both'
+        return 'heavy_add_connection'
+
+    def make_change(self, change_light: bool) -> None:
+        """
+        makes one change in the state, drawn from the move registry
+
+        pre:
+            self.state is an already solved state
+
+        post:
+            a move operator is applied to self.state
+            the applied operator and its start time are saved for record_move
+        """
+        route = self.choose_route_to_add_connection()
+        context = self.get_move_context(route, change_light)
+
+        self.last_move = self.move_registry.sample(context)
+        self.move_start_time = time.process_time()
+        self.move_registry.apply(self.last_move, self, route)
+
     def make_change_heavy(self) -> None:
         """
         makes one change in the state
@@ -36,46 +102,7 @@ class Hill_climber(Algorithm):
         post:
             a route is added or deleted or a connection is added or deleted in self.state
         """
-        random_number = random.randint(0, 100)
-        # if connections can not be added but routes can
-        if not self.choose_route_to_add_connection() and \
-                self.state.number_routes < self.state.max_number_routes:
-            if random_number <= 45:
-                self.delete_random_connection()
-            elif random_number >= 46 and random_number <= 80:
-                self.add_random_route()
-            elif self.state.number_routes > 1:
-                self.delete_random_route()
-
-        # if both routes and connections can not be added
-        elif not self.choose_route_to_add_connection() and \
-                self.state.number_routes >= self.state.max_number_routes:
-            if random_number <= 65:
-                self.delete_random_connection()
-            elif self.state.number_routes > 1:
-                self.delete_random_route()
-
-        # if routes and connections can be added
-        elif self.state.number_routes < self.state.max_number_routes:
-            if random_number <= 35:
-                self.delete_random_connection()
-            elif random_number >= 36 and random_number <= 60:
-                route_number = self.choose_route_to_add_connection()
-                self.add_random_connection(route_number)
-            elif random_number >= 61 and random_number <= 85:
-                self.add_random_route()
-            elif self.state.number_routes > 1:
-                self.delete_random_route()
-
-        # if connections can be added but routes not
-        elif self.state.number_routes >= self.state.max_number_routes:
-            if random_number <= 45:
-                self.delete_random_connection()
-            elif random_number >= 46 and random_number <= 75:
-                route_number = self.choose_route_to_add_connection()
-                self.add_random_connection(route_number)
-            elif self.state.number_routes > 1:
-                self.delete_random_route()
+        self.make_change(change_light=False)
 
     def make_change_light(self) -> None:
         """
@@ -85,18 +112,23 @@ class Hill_climber(Algorithm):
             self.state is an already solved state
 
         post:
-            a route is added or deleted or a connection is added or deleted in self.state
+            a connection is added or deleted in self.state
         """
-        random_number = random.randint(0, 100)
-        if not self.choose_route_to_add_connection():
-            self.delete_random_connection()
+        self.make_change(change_light=True)
 
-        else:
-            if random_number <= 40:
-                route_number = self.choose_route_to_add_connection()
-                self.add_random_connection(route_number)
-            else:
-                self.delete_random_connection()
+    def record_move(self, accepted: bool, score_gain: float) -> None:
+        """
+        saves the outcome of the last applied move in the move registry
+
+        post:
+            counters of the last move are updated
+        """
+        if self.last_move is None:
+            return
+
+        self.move_registry.record(self.last_move, accepted, score_gain,
+                                  time.process_time() - self.move_start_time)
+        self.last_move = None
 
     def get_score_state(self, state: 'State') -> float:
         """
@@ -132,33 +164,29 @@ class Hill_climber(Algorithm):
         # compare scores and change states
         if score_new_state >= score_old_state:
             self.current_state = copy.deepcopy(self.state)
+            self.record_move(True, score_new_state - score_old_state)
         else:
             self.state = copy.deepcopy(self.current_state)
+            self.record_move(False, score_new_state - score_old_state)
 
-    def choose_route_to_add_connection(self) -> int:
+    def choose_route_to_add_connection(self, minimum_slack: int = 20) -> Union['Route', None]:
         """
-        makes a list with routes who will be able to add a connection to
+        picks a random route that has enough time left to add a connection to
 
         pre:
             state has routes filled with at least one connection
+            minimum_slack is an integer
+
+        the connection is chosen after the route (it has to start at an end
+        station of the route), so the margin of minimum_slack minutes is used
+        instead of the distance of the connection
 
         returns:
-            a random route from the list with routes able to add a connection
+            a random route with at least minimum_slack minutes left, sampled from
+            the slack index in constant time
+            None if there are no such routes
         """
-        
-        # add routes with enough time left to add connections to list
-        routes_able_to_add_connection = []
-        for index in range(self.state.number_routes - 1):
-            if self.state.routes[index].total_time <= self.state.time_frame - 20:
-                routes_able_to_add_connection.append(index)
-
-        # return none if there are no routes
-        if routes_able_to_add_connection == []:
-            return None
-
-        random_route = random.choice(routes_able_to_add_connection)
-
-        return random_route
+        return self.state.get_random_route_with_slack(minimum_slack)
 
     def run(self, iterations: int, algorithm_id: int, change_light: bool = True) -> list[float]:
         """
@@ -169,6 +197,7 @@ class Hill_climber(Algorithm):
         returns:
             list of scores of all iterations
         """
+        self.start_timer()
         self.state.reset()
         self.create_state()
         self.current_state = copy.deepcopy(self.state)
@@ -180,14 +209,27 @@ class Hill_climber(Algorithm):
             else:
                 self.make_change_light()
             self.compare_scores_state()
-            hillclimber_score_list.append(self.current_state.calculate_score())
+            score = self.current_state.calculate_score()
+            hillclimber_score_list.append(score)
+
+            # stop early if the score is close enough to the upper bound
+            if self.update_gap(self.current_state, score):
+                break
+
+            # stop at the time limit of the run, with the state so far
+            if self.time_up():
+                break
+
+        self.update_gap(self.current_state)
 
         return hillclimber_score_list
 
 
 class Hill_climber_restart(Hill_climber):
-    def __init__(self, state: 'State', restart_number: int, valid_start_state: bool = True, max_connection_returns: int = 0) -> None:
-        super().__init__(state, max_connection_returns=max_connection_returns)
+    def __init__(self, state: 'State', restart_number: int, valid_start_state: bool = True, max_connection_returns: int = 0, move_registry: Union['Move_registry', None] = None, adaptive_moves: bool = False, route_exchange_moves: bool = False, oracle_moves: bool = False) -> None:
+        super().__init__(state, max_connection_returns=max_connection_returns,
+                         move_registry=move_registry, adaptive_moves=adaptive_moves,
+                         route_exchange_moves=route_exchange_moves, oracle_moves=oracle_moves)
         self.restart = restart_number
         self.restart_counter = 0
         self.valid_start_state = valid_start_state
@@ -210,9 +252,11 @@ class Hill_climber_restart(Hill_climber):
         if score_new_state >= score_old_state:
             self.current_state = copy.deepcopy(self.state)
             self.restart_counter = 0
+            self.record_move(True, score_new_state - score_old_state)
         else:
             self.state = copy.deepcopy(self.current_state)
             self.restart_counter += 1
+            self.record_move(False, score_new_state - score_old_state)
 
     def run(self, iterations: int, algorithm_id: int, change_light: bool = True) -> tuple[float, 'State', list]:
         """
@@ -227,6 +271,7 @@ class Hill_climber_restart(Hill_climber):
             list of all scores
         """
 
+        self.start_timer()
         self.state.reset()
         self.create_state()
         self.current_state = copy.deepcopy(self.state)
@@ -257,4 +302,14 @@ class Hill_climber_restart(Hill_climber):
 
             hillclimber_score_list.append(new_score)
 
+            # stop early if the best score is close enough to the upper bound
+            if self.update_gap(best_state, best_score):
+                break
+
+            # stop at the time limit of the run, with the best state so far
+            if self.time_up():
+                break
+
+        self.update_gap(best_state, best_score)
+
         return best_score, best_state, hillclimber_score_list
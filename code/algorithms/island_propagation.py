@@ -0,0 +1,218 @@
+from .plant_propagation import Plant_Propagation
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import copy
+import multiprocessing
+import queue
+import random
+import traceback
+from typing import Union
+
+
+def get_migration_targets(number_islands: int, topology: str, migration_round: int, seed: int) -> list[int]:
+    """
+    gives the island every island sends its migrants to in a migration round
+
+    pre:
+        topology is 'ring' (island i sends to island i + 1) or 'random'
+        (a random cycle through all islands, new every round)
+
+    returns:
+        list with the target island per island, every island is target exactly once
+    """
+    assert topology in ('ring', 'random'), f"invalid topology: {topology}"
+
+    if topology == 'ring':
+        return [(island + 1) % number_islands for island in range(number_islands)]
+
+    # every island computes the same cycle from the shared seed
+    order = list(range(number_islands))
+    random.Random(seed * 1000003 + migration_round).shuffle(order)
+
+    targets = [0] * number_islands
+    for position, island in enumerate(order):
+        targets[island] = order[(position + 1) % number_islands]
+
+    return targets
+
+
+def _island_worker(island: int, state: 'State', valid_states: bool, population_size: int, max_generations: int, settings: dict, migration: tuple, inboxes: list, results: 'multiprocessing.Queue') -> None:
+    """
+    evolves one island population and exchanges its best plants with the other islands
+
+    pre:
+        migration is (migration_interval, number_migrants, topology, seed)
+        inboxes has a queue per island
+
+    post:
+        (island, high score, compact best solution, high scores) is put in results
+        if the island raises, (island, None, traceback, None) is put in results
+        and a None message in every inbox, so no island waits forever
+    """
+    try:
+        _evolve_island(island, state, valid_states, population_size, max_generations,
+                       settings, migration, inboxes, results)
+    except Exception:
+        results.put((island, None, traceback.format_exc(), None))
+
+        for inbox in inboxes:
+            inbox.put(None)
+
+
+def _evolve_island(island: int, state: 'State', valid_states: bool, population_size: int, max_generations: int, settings: dict, migration: tuple, inboxes: list, results: 'multiprocessing.Queue') -> None:
+    """
+    the body of _island_worker
+    """
+    migration_interval, number_migrants, topology, seed = migration
+    random.seed(seed + island)
+
+    ppa = Plant_Propagation(state, valid_states, population_size,
+                            max_generations, settings.get('max_nr_runners', 5))
+    for name, value in settings.items():
+        setattr(ppa, name, value)
+
+    # the islands are the parallel part, so the population is made in-process
+    ppa.number_processes = 1
+
+    ppa.reset()
+    ppa.initial_population()
+
+    # migrants of later rounds can arrive before those of the current round
+    received: dict[int, list] = {}
+
+    for generation in range(max_generations):
+
+        # a converged island keeps migrating, new migrants break the convergence
+        ppa.step(generation)
+
+        if (generation + 1) % migration_interval == 0:
+            migration_round = (generation + 1) // migration_interval
+            targets = get_migration_targets(len(inboxes), topology, migration_round, seed)
+
+            inboxes[targets[island]].put(
+                (migration_round, ppa.get_best_plants(number_migrants)))
+
+            while migration_round not in received:
+                message = inboxes[island].get()
+
+                # another island failed, the run is stopped by the coordinator
+                if message is None:
+                    return
+
+                message_round, compact_solutions = message
+                received[message_round] = compact_solutions
+
+            ppa.replace_worst_plants(received.pop(migration_round))
+
+    results.put((island, ppa.high_score, ppa.best_state.get_compact_solution(), ppa.high_scores))
+
+
+class Island_propagation():
+    def __init__(self, state: 'State', valid_states: bool, population_size: int, max_generations: int, island_settings: list[dict], migration_interval: int = 10, number_migrants: int = 2, topology: str = 'ring') -> None:
+        """
+        initializes an island model of the plant propagation algorithm: every island
+        is a Plant_Propagation population in its own worker process, and every
+        migration_interval generations the islands send their number_migrants best
+        plants to another island, where they replace the worst plants
+
+        pre:
+            state is an empty state
+            island_settings has a dict per island with Plant_Propagation attributes,
+            for example {'filter_type': 'best', 'max_nr_runners': 3}
+            topology is 'ring' or 'random'
+
+        post:
+            all variables are initialized
+        """
+        assert island_settings, "at least one island is needed"
+        assert migration_interval > 0, "migration_interval should be greater than 0"
+        assert number_migrants < population_size, \
+            "number_migrants should be smaller than population_size"
+        assert topology in ('ring', 'random'), f"invalid topology: {topology}"
+
+        ppa = Plant_Propagation(state, valid_states, population_size, max_generations, 1)
+        for settings in island_settings:
+            for name in settings:
+                assert hasattr(ppa, name), f"invalid Plant_Propagation attribute: {name}"
+
+        self.state = state
+        self.valid_states = valid_states
+        self.population_size = population_size
+        self.max_generations = max_generations
+        self.island_settings = island_settings
+        self.migration_interval = migration_interval
+        self.number_migrants = number_migrants
+        self.topology = topology
+
+        # results per island
+        self.island_scores: list[float] = []
+        self.island_high_scores: list[list[float]] = []
+
+        self.high_score: float = 0
+        self.best_state = self.state
+
+    def run(self, seed: Union[int, None] = None) -> tuple[float, 'State']:
+        """
+        runs all islands in parallel worker processes
+
+        returns:
+            best score
+            state with best score
+        """
+        self.state.reset()
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+
+        inboxes = [multiprocessing.Queue() for _ in self.island_settings]
+        results = multiprocessing.Queue()
+        migration = (self.migration_interval, self.number_migrants, self.topology, seed)
+
+        workers = []
+        for island, settings in enumerate(self.island_settings):
+            worker = multiprocessing.Process(
+                target=_island_worker,
+                args=(island, self.state, self.valid_states, self.population_size,
+                      self.max_generations, settings, migration, inboxes, results))
+            worker.start()
+            workers.append(worker)
+
+        # results are read before joining, so no worker blocks on a full queue
+        island_results = []
+        try:
+            while len(island_results) < len(workers):
+                try:
+                    island_result = results.get(timeout=1)
+                except queue.Empty:
+                    # a worker that died without a result (killed, out of memory) stops the run
+                    for island, worker in enumerate(workers):
+                        if not worker.is_alive() and worker.exitcode != 0:
+                            raise RuntimeError(
+                                f"island {island} stopped with exit code {worker.exitcode}")
+                    continue
+
+                island, high_score, result, _ = island_result
+                if high_score is None:
+                    raise RuntimeError(f"island {island} failed:\n{result}")
+
+                island_results.append(island_result)
+        except BaseException:
+            for worker in workers:
+                worker.terminate()
+            raise
+        finally:
+            for worker in workers:
+                worker.join()
+
+        island_results.sort()
+
+        self.island_scores = [high_score for _, high_score, _, _ in island_results]
+        self.island_high_scores = [high_scores for _, _, _, high_scores in island_results]
+
+        _, self.high_score, best_solution, _ = max(island_results, key=lambda item: item[1])
+
+        self.best_state = copy.deepcopy(self.state)
+        self.best_state.load_compact_solution(best_solution)
+
+        return self.high_score, self.best_state
@@ -0,0 +1,276 @@
+from .algorithm import Algorithm
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import random
+import copy
+import math
+
+
+class Large_neighbourhood_search(Algorithm):
+    def __init__(self, state: 'State', destroy_size: int = 3, destroy_type: str = 'mixed', valid_start_state: bool = False, max_bridge_length: int = 3, max_connection_returns: int = 0) -> None:
+        """
+        initializes the large neighbourhood search (destroy and repair)
+
+        pre:
+            state is an empty state
+            destroy_size is the number of routes removed per iteration
+            destroy_type is 'region', 'worst' or 'mixed'
+            max_bridge_length is the max number of used connections driven to reach an unused one
+
+        post:
+            all variables are initialized
+        """
+        super().__init__(state, max_connection_returns=max_connection_returns)
+
+        assert destroy_size > 0, "destroy_size should be greater than 0"
+        assert destroy_type in ('region', 'worst', 'mixed'), \
+            f"invalid destroy type: {destroy_type}"
+
+        self.valid_start_state = valid_start_state
+        self.destroy_size = destroy_size
+        self.destroy_type = destroy_type
+        self.max_bridge_length = max_bridge_length
+
+        self.current_state = self.state
+        self.best_state = copy.deepcopy(self.state)
+        self.best_score: float = 0.0
+
+    #### DESTROY METHODS ####
+
+    def select_worst_routes(self) -> list['Route']:
+        """
+        gives the routes with the lowest contribution to the score
+
+        returns:
+            list of at most destroy_size Route objects
+        """
+        sorted_routes = sorted(self.state.routes,
+                               key=lambda route: self.get_route_contribution(route))
+
+        return sorted_routes[:self.destroy_size]
+
+    def select_region_routes(self) -> list['Route']:
+        """
+        gives the routes closest to a random station
+
+        returns:
+            list of at most destroy_size Route objects
+        """
+        center = random.choice(self.state.stations)
+
+        def distance_to_center(route: 'Route') -> float:
+            return min(math.dist((station.x, station.y), (center.x, center.y))
+                       for station in route.route_stations)
+
+        sorted_routes = sorted(self.state.routes, key=distance_to_center)
+
+        return sorted_routes[:self.destroy_size]
+
+    def destroy(self) -> list[list['Connection']]:
+        """
+        removes a cluster of routes from the state
+
+        post:
+            the selected routes are deleted from self.state
+
+        returns:
+            the connection lists of the removed routes, used for rollback
+        """
+        destroy_type = self.destroy_type
+        if destroy_type == 'mixed':
+            destroy_type = random.choice(['region', 'worst'])
+
+        if destroy_type == 'region':
+            routes = self.select_region_routes()
+        else:
+            routes = self.select_worst_routes()
+
+        removed_paths = [list(route.route_connections) for route in routes]
+
+        for route in routes:
+            self.state.delete_route(route)
+
+        return removed_paths
+
+    #### REPAIR METHODS ####
+
+    def find_extension(self, station: 'Station', time_left: float) -> list['Connection']:
+        """
+        searches (depth-first) the shortest path from the given station that ends
+        with an unused connection, driving at most max_bridge_length used connections
+
+        returns:
+            list of connections, the last one is unused
+            empty list if no such path fits in time_left
+        """
+        best_path: list['Connection'] = []
+        best_time: float = time_left
+
+        def search(current: 'Station', path: list['Connection'], time: float) -> None:
+            nonlocal best_path, best_time
+
+            connections = list(current.connections)
+            random.shuffle(connections)
+
+            for connection in connections:
+                new_time = time + connection.distance
+
+                # prune paths that are not shorter than the best found one
+                if new_time >= best_time:
+                    continue
+
+                if connection.used == 0 and connection not in path:
+                    best_path = path + [connection]
+                    best_time = new_time
+                elif len(path) < self.max_bridge_length:
+                    other_station = connection.station_2 \
+                        if connection.station_1 == current else connection.station_1
+                    search(other_station, path + [connection], new_time)
+
+        search(station, [], 0.0)
+
+        return best_path
+
+    def extend_route(self, route: 'Route') -> None:
+        """
+        extends both ends of a route with paths to unused connections,
+        as long as the route fits in the time frame
+
+        post:
+            connections are added to the route
+        """
+        for _ in range(2):
+            while True:
+                path = self.find_extension(
+                    route.get_end_station(), self.state.time_frame - route.total_time)
+                if not path:
+                    break
+
+                for connection in path:
+                    self.state.add_connection_to_route(route, connection)
+
+            # extend the other end in the second round
+            self.state.reverse_route(route)
+
+    def repair(self) -> list['Route']:
+        """
+        adds routes until all connections are used or the max number of routes is reached
+
+        post:
+            new routes are added to self.state
+
+        returns:
+            list of the added Route objects
+        """
+        created_routes: list['Route'] = []
+
+        candidates = [connection for connection in self.state.unused_connections
+                      if connection.distance < self.state.time_frame]
+
+        while candidates and self.state.add_route(random.choice(candidates)):
+            route = self.state.routes[-1]
+            created_routes.append(route)
+
+            self.extend_route(route)
+
+            candidates = [connection for connection in self.state.unused_connections
+                          if connection.distance < self.state.time_frame]
+
+        return created_routes
+
+    def restore_route(self, connections: list['Connection']) -> None:
+        """
+        adds a route again from its list of connections
+
+        post:
+            a route driving the given connections is added to self.state
+        """
+        self.state.add_route_from_connections(connections)
+
+    def rollback(self, created_routes: list['Route'], removed_paths: list[list['Connection']]) -> None:
+        """
+        undoes a destroy and repair step without copying the state
+
+        post:
+            created routes are deleted and removed routes are restored
+        """
+        for route in created_routes:
+            self.state.delete_route(route)
+
+        for connections in removed_paths:
+            self.restore_route(connections)
+
+    #### RUN METHODS ####
+
+    def step(self) -> float:
+        """
+        does one destroy and repair step, and rolls it back if the score decreases
+
+        returns:
+            score of the state after the step
+        """
+        old_score = self.state.calculate_score()
+
+        removed_paths = self.destroy()
+        created_routes = self.repair()
+
+        new_score = self.state.calculate_score()
+
+        if new_score < old_score:
+            self.rollback(created_routes, removed_paths)
+            new_score = self.state.calculate_score()
+
+        return new_score
+
+    def run(self, iterations: int, algorithm_id: int) -> list[float]:
+        """
+        runs the large neighbourhood search
+
+        pre:
+            iterations is a integer
+
+        post:
+            self.best_state is a copy of the best found state
+
+        returns:
+            list of scores of all iterations
+        """
+        self.start_timer()
+        self.state.reset()
+        self.create_state()
+
+        # repair routes above the time frame from the start state
+        for route in list(self.state.routes):
+            while not route.is_valid_time(self.state.time_frame) and \
+                    self.state.delete_end_connection_from_route(route):
+                pass
+        self.repair()
+
+        self.current_state = self.state
+        self.best_score = self.state.calculate_score()
+        self.best_state = copy.deepcopy(self.state)
+
+        lns_score_list = []
+        for _ in range(iterations):
+            score = self.step()
+
+            # only copy the state when a new best is found
+            if score > self.best_score and self.state.is_valid_solution_without_connection():
+                self.best_score = score
+                self.best_state = copy.deepcopy(self.state)
+
+            lns_score_list.append(score)
+
+            # stop early if the best score is close enough to the upper bound
+            if self.update_gap(self.best_state, self.best_score):
+                break
+
+            # stop at the time limit of the run, with the best state so far
+            if self.time_up():
+                break
+
+        self.update_gap(self.best_state, self.best_score)
+
+        return lns_score_list
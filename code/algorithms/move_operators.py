@@ -0,0 +1,501 @@
+import random
+from collections import deque
+from typing import Callable, Union
+
+
+class Alias_table():
+
+    def __init__(self, weights: list[float]) -> None:
+        """
+        builds an alias table (Vose's method) for constant-time weighted sampling
+
+        pre:
+            weights is a non-empty list of non-negative numbers
+            at least one weight is greater than zero
+
+        post:
+            self.probabilities and self.aliases are filled, one entry per weight
+        """
+        assert weights, "weights should not be empty"
+        assert all(weight >= 0 for weight in weights), \
+            "weights should not be negative"
+
+        total_weight = sum(weights)
+        assert total_weight > 0, "at least one weight should be positive"
+
+        number_weights = len(weights)
+        self.probabilities: list[float] = [0.0] * number_weights
+        self.aliases: list[int] = list(range(number_weights))
+
+        # scale weights so that the average weight is 1
+        scaled = [weight * number_weights / total_weight for weight in weights]
+        small = [index for index, weight in enumerate(scaled) if weight < 1]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1]
+
+        # pair every small column with a large column that fills it up
+        while small and large:
+            small_index = small.pop()
+            large_index = large.pop()
+
+            self.probabilities[small_index] = scaled[small_index]
+            self.aliases[small_index] = large_index
+
+            scaled[large_index] -= 1 - scaled[small_index]
+            if scaled[large_index] < 1:
+                small.append(large_index)
+            else:
+                large.append(large_index)
+
+        # leftovers are full columns (up to rounding errors)
+        for index in small + large:
+            self.probabilities[index] = 1.0
+
+    def sample(self) -> int:
+        """
+        draws an index with probability proportional to its weight
+
+        returns:
+            index of the drawn weight
+        """
+        column = random.randrange(len(self.probabilities))
+
+        if random.random() < self.probabilities[column]:
+            return column
+        return self.aliases[column]
+
+
+class Adaptive_weights():
+
+    def __init__(self, window_size: int = 100, minimum_probability: float = 0.05, update_interval: int = 50) -> None:
+        """
+        initializes adaptive operator selection by probability matching
+        over a sliding window of recent outcomes per operator
+
+        pre:
+            window_size and update_interval are integers greater than 0
+            minimum_probability is a float between 0 and 1
+
+        post:
+            creates an empty window of (reward, seconds) pairs per operator
+        """
+        assert window_size > 0, "window_size should be greater than 0"
+        assert update_interval > 0, "update_interval should be greater than 0"
+        assert 0 <= minimum_probability < 1, \
+            "minimum_probability should be between 0 and 1"
+
+        self.window_size = window_size
+        self.minimum_probability = minimum_probability
+        self.update_interval = update_interval
+
+        self.windows: dict[str, deque] = {}
+        self.number_updates: int = 0
+
+    def update(self, name: str, reward: float, seconds: float) -> bool:
+        """
+        adds the outcome of a move to the window of its operator
+
+        pre:
+            reward is the (non-negative) score improvement of the move
+            seconds is the cpu time the move took
+
+        returns:
+            True if the weights should be recomputed
+        """
+        if name not in self.windows:
+            self.windows[name] = deque(maxlen=self.window_size)
+        self.windows[name].append((reward, seconds))
+
+        self.number_updates += 1
+
+        return self.number_updates % self.update_interval == 0
+
+    def get_quality(self, name: str) -> Union[float, None]:
+        """
+        gives the score improvement per cpu second of an operator over its window
+
+        returns:
+            quality of the operator
+            None if the operator has no outcomes yet
+        """
+        if not self.windows.get(name):
+            return None
+
+        total_reward = sum(reward for reward, seconds in self.windows[name])
+        total_seconds = sum(seconds for reward, seconds in self.windows[name])
+
+        # moves can take less than the resolution of the clock, so the seconds get
+        # a small epsilon instead of switching to the raw reward
+        return total_reward / (total_seconds + 1e-9)
+
+    def get_weights(self, base_weights: dict[str, float]) -> dict[str, float]:
+        """
+        gives the probability matching weights for the operators of a context
+
+        pre:
+            base_weights are the weights of the context without adaptation
+
+        returns:
+            dict with a weight per operator, operators with base weight 0 stay 0
+            the base weights if no operator has gained any score yet
+        """
+        names = [name for name in base_weights if base_weights[name] > 0]
+        qualities = {name: self.get_quality(name) for name in names}
+
+        # operators without outcomes get the best known quality, so they are tried
+        known = [quality for quality in qualities.values() if quality is not None]
+        if not known or max(known) <= 0:
+            return dict(base_weights)
+
+        for name in names:
+            if qualities[name] is None:
+                qualities[name] = max(known)
+
+        total_quality = sum(qualities.values())
+        minimum = min(self.minimum_probability, 1 / len(names))
+
+        weights = {name: 0.0 for name in base_weights}
+        for name in names:
+            weights[name] = minimum + \
+                (1 - len(names) * minimum) * qualities[name] / total_quality
+
+        return weights
+
+
+class Move_registry():
+
+    def __init__(self) -> None:
+        """
+        initializes an empty registry of move operators
+
+        post:
+            creates empty dicts for operators, weights per context and counters
+        """
+        self.operators: dict[str, Callable] = {}
+        self.context_weights: dict[str, dict[str, float]] = {}
+
+        # compiled alias tables per context: (operator names, table)
+        self.tables: dict[str, tuple[list[str], 'Alias_table']] = {}
+
+        self.counters: dict[str, dict[str, float]] = {}
+
+        # adaptive operator selection, None if the weights are static
+        self.adaptive: Union['Adaptive_weights', None] = None
+
+    def register(self, name: str, operator: Callable) -> None:
+        """
+        adds a move operator to the registry
+
+        pre:
+            operator is a callable with arguments (algorithm, route), where route is
+            a route that can get a connection, or None
+
+        post:
+            operator is available for all contexts under the given name
+            counters for the operator are created
+        """
+        self.operators[name] = operator
+        self.counters[name] = {'proposals': 0,
+                               'acceptances': 0,
+                               'score_gain': 0.0,
+                               'seconds': 0.0}
+
+    def set_weights(self, context: str, weights: dict[str, float]) -> None:
+        """
+        sets the weights of the operators within a context, and compiles them
+        into an alias table
+
+        pre:
+            all names in weights are registered operators
+
+        post:
+            the alias table for the context is (re)built
+        """
+        for name in weights:
+            assert name in self.operators, f"unknown move operator: {name}"
+
+        self.context_weights[context] = dict(weights)
+        self._compile(context, weights)
+
+    def _compile(self, context: str, weights: dict[str, float]) -> None:
+        """
+        compiles the weights of a context into an alias table
+
+        post:
+            self.tables[context] holds the operators with positive weight and their table
+        """
+        names = [name for name in weights if weights[name] > 0]
+
+        self.tables[context] = (
+            names, Alias_table([weights[name] for name in names]))
+
+    def enable_adaptive(self, window_size: int = 100, minimum_probability: float = 0.05, update_interval: int = 50) -> None:
+        """
+        lets the registry learn the operator weights of every context online,
+        from the score improvement per cpu second of each operator
+
+        post:
+            recorded moves update the weights every update_interval moves
+            the weights given with set_weights decide which operators are allowed per context
+        """
+        self.adaptive = Adaptive_weights(
+            window_size, minimum_probability, update_interval)
+
+    def disable_adaptive(self) -> None:
+        """
+        sets all contexts back to their static weights
+        """
+        self.adaptive = None
+        for context, weights in self.context_weights.items():
+            self._compile(context, weights)
+
+    def _update_adaptive_weights(self) -> None:
+        """
+        recompiles the alias tables of all contexts with the adaptive weights
+        """
+        for context, base_weights in self.context_weights.items():
+            self._compile(context, self.adaptive.get_weights(base_weights))
+
+    def get_weights(self, context: str) -> dict[str, float]:
+        """
+        gives the current weights of the operators within a context
+        """
+        if self.adaptive is not None:
+            return self.adaptive.get_weights(self.context_weights[context])
+        return self.context_weights[context]
+
+    def sample(self, context: str) -> str:
+        """
+        draws a move operator for the given context
+
+        pre:
+            weights are set for the context
+
+        returns:
+            name of the drawn operator
+        """
+        assert context in self.tables, f"no weights set for context: {context}"
+
+        names, table = self.tables[context]
+
+        return names[table.sample()]
+
+    def apply(self, name: str, algorithm: object, route: Union['Route', None]) -> None:
+        """
+        applies the operator with the given name and counts the proposal
+
+        post:
+            algorithm.state is changed by the operator
+        """
+        self.counters[name]['proposals'] += 1
+        self.operators[name](algorithm, route)
+
+    def record(self, name: str, accepted: bool, score_gain: float, seconds: float) -> None:
+        """
+        saves the outcome of a proposed move
+
+        post:
+            counters of the operator are updated
+        """
+        counter = self.counters[name]
+        counter['seconds'] += seconds
+
+        if accepted:
+            counter['acceptances'] += 1
+            counter['score_gain'] += score_gain
+
+        if self.adaptive is not None:
+            reward = max(score_gain, 0) if accepted else 0.0
+            if self.adaptive.update(name, reward, seconds):
+                self._update_adaptive_weights()
+
+    def reset_counters(self) -> None:
+        """
+        sets all operator counters back to zero
+        """
+        for name in self.counters:
+            self.register(name, self.operators[name])
+
+    def get_statistics(self) -> dict[str, dict[str, float]]:
+        """
+        gives the counters of all operators, with derived rates
+
+        returns:
+            dict with per operator:
+                proposals, acceptances, score_gain, seconds,
+                acceptance_rate and score_gain_per_second
+        """
+        statistics = {}
+
+        for name, counter in self.counters.items():
+            statistics[name] = dict(counter)
+            statistics[name]['acceptance_rate'] = \
+                counter['acceptances'] / counter['proposals'] \
+                if counter['proposals'] else 0.0
+            statistics[name]['score_gain_per_second'] = \
+                counter['score_gain'] / counter['seconds'] \
+                if counter['seconds'] else 0.0
+
+        return statistics
+
+
+#### DEFAULT OPERATORS ####
+
+def add_connection_start(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    adds a random connection at the start of the given route
+    """
+    if route is not None:
+        algorithm.add_random_connection_to_route(route, 'start')
+
+
+def add_connection_end(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    adds a random connection at the end of the given route
+    """
+    if route is not None:
+        algorithm.add_random_connection_to_route(route, 'end')
+
+
+def delete_connection_start(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    deletes the first connection of a random route
+    """
+    algorithm.delete_random_connection(choice='start')
+
+
+def delete_connection_end(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    deletes the last connection of a random route
+    """
+    algorithm.delete_random_connection(choice='end')
+
+
+def add_route(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    adds a random 1-length route
+    """
+    algorithm.add_random_route()
+
+
+def delete_route(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    deletes a random route, unless it is the only route
+    """
+    if algorithm.state.number_routes > 1:
+        algorithm.delete_random_route()
+
+
+def swap_tails(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    swaps the tails of two routes at a shared station
+    """
+    algorithm.swap_random_route_tails()
+
+
+def split_route(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    splits a route in two at a station
+    """
+    algorithm.split_random_route()
+
+
+def merge_routes(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    merges two routes whose ends meet
+    """
+    algorithm.merge_random_routes()
+
+
+def reverse_route(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    reverses a route, so other ends are extended or trimmed
+    """
+    algorithm.reverse_random_route()
+
+
+def replace_worst_route(algorithm: object, route: Union['Route', None]) -> None:
+    """
+    replaces the route with the lowest contribution by the best route of the oracle
+    """
+    algorithm.replace_worst_route()
+
+
+def create_default_registry(route_exchange_moves: bool = False, oracle_moves: bool = False) -> 'Move_registry':
+    """
+    creates a registry with the standard moves and the move mix of the
+    original heavy and light mutations of the hill climber
+
+    pre:
+        route_exchange_moves is True if tail swap, split, merge and reverse
+        should get weight in the heavy contexts
+        oracle_moves is True if replacing the worst route by the best route
+        should get weight in the heavy contexts
+
+    contexts:
+        heavy_add_route: no connection can be added, a route can
+        heavy_full: neither a connection nor a route can be added
+        heavy_add_both: both a connection and a route can be added
+        heavy_add_connection: a connection can be added, a route can not
+        light_full: no connection can be added
+        light_add_connection: a connection can be added
+
+    returns:
+        Move_registry object
+    """
+    registry = Move_registry()
+
+    registry.register('add_connection_start', add_connection_start)
+    registry.register('add_connection_end', add_connection_end)
+    registry.register('delete_connection_start', delete_connection_start)
+    registry.register('delete_connection_end', delete_connection_end)
+    registry.register('add_route', add_route)
+    registry.register('delete_route', delete_route)
+    registry.register('swap_tails', swap_tails)
+    registry.register('split_route', split_route)
+    registry.register('merge_routes', merge_routes)
+    registry.register('reverse_route', reverse_route)
+    registry.register('replace_worst_route', replace_worst_route)
+
+    # weights are the number of outcomes of random.randint(0, 100) per move,
+    # where start and end share the outcomes of one move equally
+    registry.set_weights('heavy_add_route', {
+        'delete_connection_start': 23, 'delete_connection_end': 23,
+        'add_route': 35, 'delete_route': 20})
+    registry.set_weights('heavy_full', {
+        'delete_connection_start': 33, 'delete_connection_end': 33,
+        'delete_route': 35})
+    registry.set_weights('heavy_add_both', {
+        'delete_connection_start': 18, 'delete_connection_end': 18,
+        'add_connection_start': 12.5, 'add_connection_end': 12.5,
+        'add_route': 25, 'delete_route': 15})
+    registry.set_weights('heavy_add_connection', {
+        'delete_connection_start': 23, 'delete_connection_end': 23,
+        'add_connection_start': 15, 'add_connection_end': 15,
+        'delete_route': 25})
+    # route exchange moves keep all covered connections, so they get a share
+    # of every heavy context next to the original moves
+    if route_exchange_moves:
+        for context in ('heavy_add_route', 'heavy_full',
+                        'heavy_add_both', 'heavy_add_connection'):
+            weights = dict(registry.get_weights(context))
+            weights.update({'swap_tails': 10, 'reverse_route': 5,
+                            'merge_routes': 10})
+            if context in ('heavy_add_route', 'heavy_add_both'):
+                weights['split_route'] = 5
+            registry.set_weights(context, weights)
+
+    # the oracle searches a whole route, so it gets a small share
+    if oracle_moves:
+        for context in ('heavy_add_route', 'heavy_full',
+                        'heavy_add_both', 'heavy_add_connection'):
+            weights = dict(registry.get_weights(context))
+            weights['replace_worst_route'] = 2
+            registry.set_weights(context, weights)
+
+    registry.set_weights('light_full', {
+        'delete_connection_start': 1, 'delete_connection_end': 1})
+    registry.set_weights('light_add_connection', {
+        'delete_connection_start': 30, 'delete_connection_end': 30,
+        'add_connection_start': 20.5, 'add_connection_end': 20.5})
+
+    return registry
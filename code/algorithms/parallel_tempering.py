@@ -0,0 +1,235 @@
+from .simulated_annealing import Simulated_annealing
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import copy
+import math
+import multiprocessing
+import random
+from typing import Union
+
+
+def get_geometric_temperatures(high: float, low: float, number_chains: int) -> list[float]:
+    """
+    gives a temperature ladder with a constant ratio between neighbouring temperatures
+
+    pre:
+        high >= low > 0
+        number_chains is an integer greater than 0
+
+    returns:
+        list of number_chains temperatures, from high to low
+    """
+    assert high >= low > 0, "temperatures should be positive, high >= low"
+    assert number_chains > 0, "number_chains should be greater than 0"
+
+    if number_chains == 1:
+        return [high]
+
+    ratio = (low / high) ** (1 / (number_chains - 1))
+
+    return [high * ratio ** index for index in range(number_chains)]
+
+
+def _replica_worker(connection: 'multiprocessing.connection.Connection', state: 'State', seed: int, valid_start_state: bool, change_light: bool) -> None:
+    """
+    keeps one annealing chain in a worker process and runs it on command
+
+    commands (tuples received over connection):
+        ('run', temperature, iterations): replies (current score, best score)
+        ('best',): replies (best score, compact best solution)
+        ('stop',): ends the worker
+
+    post:
+        only scores and compact solutions are sent back
+    """
+    random.seed(seed)
+
+    sa = Simulated_annealing(state, 1, 1, valid_start_state)
+    sa.start()
+
+    current_score = sa.current_score
+    best_score = current_score
+    best_solution = sa.current_state.get_compact_solution()
+
+    while True:
+        command = connection.recv()
+
+        if command[0] == 'run':
+            temperature, iterations = command[1], command[2]
+
+            for _ in range(iterations):
+                current_score = sa.step(temperature, change_light)
+
+                if current_score > best_score:
+                    best_score = current_score
+                    best_solution = sa.current_state.get_compact_solution()
+
+            connection.send((current_score, best_score))
+
+        elif command[0] == 'best':
+            connection.send((best_score, best_solution))
+
+        elif command[0] == 'stop':
+            connection.close()
+            return
+
+
+class Parallel_tempering():
+    def __init__(self, state: 'State', temperatures: list[float], iterations: int, exchange_interval: int = 100, valid_start_state: bool = False) -> None:
+        """
+        initializes replica exchange annealing: one chain per temperature,
+        each in its own worker process
+
+        pre:
+            state is an empty state
+            temperatures is a list of positive temperatures, from high to low
+            iterations is the number of iterations per chain
+            exchange_interval is the number of iterations between swap attempts
+
+        post:
+            all variables are initialized
+        """
+        assert temperatures, "at least one temperature is needed"
+        assert all(temperature > 0 for temperature in temperatures), \
+            "temperatures should be positive"
+        assert exchange_interval > 0, "exchange_interval should be greater than 0"
+
+        self.state = state
+        self.temperatures = sorted(temperatures, reverse=True)
+        self.iterations = iterations
+        self.exchange_interval = exchange_interval
+        self.valid_start_state = valid_start_state
+
+        # swap statistics per pair of neighbouring temperatures
+        self.swap_attempts: list[int] = [0] * (len(temperatures) - 1)
+        self.swap_acceptances: list[int] = [0] * (len(temperatures) - 1)
+
+        self.best_score: float = 0.0
+        self.best_state = self.state
+
+    def get_swap_chance(self, score_cold: float, score_hot: float, temperature_cold: float, temperature_hot: float) -> float:
+        """
+        calculates the Metropolis chance of swapping two chains, matching the
+        2 ** (delta / temperature) acceptance of Simulated_annealing
+
+        returns:
+            the chance
+        """
+        exponent = (score_hot - score_cold) * \
+            (1 / temperature_cold - 1 / temperature_hot)
+
+        if exponent >= 0:
+            return 1
+
+        return 2 ** exponent
+
+    def exchange(self, scores: list[float], chain_of_temperature: list[int]) -> None:
+        """
+        tries to swap the chains of all neighbouring temperatures
+
+        pre:
+            scores has the current score per chain
+            chain_of_temperature has the chain index per temperature index
+
+        post:
+            chain_of_temperature is updated with the accepted swaps
+        """
+        # alternate even and odd pairs, so every pair gets attempts
+        first_pair = random.randint(0, 1)
+
+        for pair in range(first_pair, len(self.temperatures) - 1, 2):
+            hot_chain = chain_of_temperature[pair]
+            cold_chain = chain_of_temperature[pair + 1]
+
+            chance = self.get_swap_chance(scores[cold_chain], scores[hot_chain],
+                                          self.temperatures[pair + 1], self.temperatures[pair])
+            self.swap_attempts[pair] += 1
+
+            if random.random() <= chance:
+                chain_of_temperature[pair] = cold_chain
+                chain_of_temperature[pair + 1] = hot_chain
+                self.swap_acceptances[pair] += 1
+
+    def get_swap_rates(self) -> list[float]:
+        """
+        gives the fraction of accepted swaps per pair of neighbouring temperatures
+        """
+        return [acceptances / attempts if attempts else 0.0
+                for acceptances, attempts in zip(self.swap_acceptances, self.swap_attempts)]
+
+    def run(self, algorithm_id: int, change_light: bool = False, seed: Union[int, None] = None) -> tuple[float, 'State', list[float]]:
+        """
+        runs all chains in parallel worker processes, and swaps the temperatures
+        of neighbouring chains every exchange_interval iterations
+
+        returns:
+            best score
+            state with best score
+            list of the best current score after every exchange round
+        """
+        self.state.reset()
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+
+        # start one worker per chain, the empty state is only sent once
+        connections = []
+        workers = []
+        for index in range(len(self.temperatures)):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_replica_worker,
+                args=(child_connection, self.state, seed + index,
+                      self.valid_start_state, change_light))
+            worker.start()
+
+            # only the worker has the child end, so recv fails if the worker dies
+            child_connection.close()
+            connections.append(parent_connection)
+            workers.append(worker)
+
+        # chain_of_temperature[t] is the chain that runs at temperature t
+        chain_of_temperature = list(range(len(self.temperatures)))
+        scores = [0.0] * len(self.temperatures)
+
+        tempering_score_list = []
+        try:
+            for _ in range(math.ceil(self.iterations / self.exchange_interval)):
+                for temperature_index, chain in enumerate(chain_of_temperature):
+                    connections[chain].send(
+                        ('run', self.temperatures[temperature_index], self.exchange_interval))
+
+                for chain, connection in enumerate(connections):
+                    scores[chain] = connection.recv()[0]
+
+                self.exchange(scores, chain_of_temperature)
+                tempering_score_list.append(max(scores))
+
+            # fetch the best compact solution of every chain
+            best_solutions = []
+            for connection in connections:
+                connection.send(('best',))
+                best_solutions.append(connection.recv())
+        except BaseException:
+            # a dead worker stops the run, the other workers are stopped without waiting
+            for worker in workers:
+                worker.terminate()
+            raise
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(('stop',))
+                except OSError:
+                    pass
+                connection.close()
+            for worker in workers:
+                worker.join()
+
+        best_score, best_solution = max(best_solutions, key=lambda item: item[0])
+
+        self.best_state = copy.deepcopy(self.state)
+        self.best_state.load_compact_solution(best_solution)
+        self.best_score = self.best_state.calculate_score()
+
+        return self.best_score, self.best_state, tempering_score_list
@@ -1,15 +1,150 @@
 from math import tanh
 import random
 import copy
+import multiprocessing
+import numpy as np
+import time
 
+from .algorithm import Algorithm
 from .hill_climber import Hill_climber
+from .move_operators import Move_registry
 from typing import Union
 from ..visualisation.visualisation import *
 
 
+# settings of the population workers, sent once per worker process
+_population_settings: dict = {}
+
+
+def _init_population_worker(state: object, population_type: str, max_connection_returns: int, move_registry: 'Move_registry', number_of_routes: int, number_of_connections: int) -> None:
+    """
+    saves the settings of the initial population in a worker process
+    """
+    _population_settings.update(state=state, population_type=population_type,
+                                max_connection_returns=max_connection_returns,
+                                move_registry=move_registry, number_of_routes=number_of_routes,
+                                number_of_connections=number_of_connections)
+
+
+def _create_population_member(seed: int) -> list[list[int]]:
+    """
+    creates one member of the initial population with its own seed
+
+    pre:
+        _init_population_worker is called in this process
+
+    returns:
+        compact solution of the member
+    """
+    random.seed(seed)
+
+    state = _population_settings['state']
+    state.reset()
+    population_type = _population_settings['population_type']
+
+    if population_type in ('hill_climber', 'hill_climber_valid'):
+        climber = Hill_climber(state, population_type == 'hill_climber_valid',
+                               _population_settings['max_connection_returns'],
+                               _population_settings['move_registry'])
+        climber.run(1000, 1)
+
+        return climber.current_state.get_compact_solution()
+
+    # members keep a random number of greedy routes, so the population is diverse,
+    # and the climber adds and changes routes with heavy changes
+    if population_type == 'hill_climber_greedy':
+        climber = Hill_climber(state, False, _population_settings['max_connection_returns'],
+                               _population_settings['move_registry'])
+        climber.greedy_start_state = True
+        climber.greedy_number_routes = random.randint(1, state.max_number_routes)
+        climber.run(1000, 1, change_light=False)
+
+        return climber.current_state.get_compact_solution()
+
+    constructor = Algorithm(state, _population_settings['max_connection_returns'])
+
+    if population_type == 'valid':
+        constructor.create_valid_state()
+
+    # random states use the same number of routes and connections for every member
+    else:
+        constructor.number_of_routes = _population_settings['number_of_routes']
+        constructor.number_of_connections = _population_settings['number_of_connections']
+        constructor.create_random_state(static=True)
+
+    return state.get_compact_solution()
+
+
+class Elite_archive():
+    def __init__(self, size: int) -> None:
+        """
+        initializes an archive of the best distinct solutions, keyed by
+        their solution hash and stored as compact solutions
+
+        pre:
+            size is an integer greater than 0
+
+        post:
+            the archive is empty
+        """
+        assert size > 0, "size should be greater than 0"
+
+        self.size = size
+        self.solutions: dict[int, tuple[float, list[list[int]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.solutions)
+
+    def __contains__(self, solution_hash: int) -> bool:
+        return solution_hash in self.solutions
+
+    def add(self, score: float, state: 'State', solution_hash: Union[int, None] = None) -> bool:
+        """
+        adds a solution if it is not archived yet and belongs to the best size solutions
+
+        post:
+            the lowest scoring solution is removed if the archive is over its size
+
+        returns:
+            True if the solution is added
+            False otherwise
+        """
+        if solution_hash is None:
+            solution_hash = state.get_solution_hash()
+
+        if solution_hash in self.solutions:
+            return False
+
+        # scores from NumPy arrays are stored as plain floats
+        score = float(score)
+
+        if len(self.solutions) == self.size and score <= self.get_worst_score():
+            return False
+
+        self.solutions[solution_hash] = (score, state.get_compact_solution())
+
+        if len(self.solutions) > self.size:
+            worst_hash = min(self.solutions, key=lambda key: self.solutions[key][0])
+            del self.solutions[worst_hash]
+
+        return True
+
+    def get_worst_score(self) -> float:
+        return min(score for score, _ in self.solutions.values())
+
+    def get_solutions(self) -> list[tuple[float, list[list[int]]]]:
+        """
+        gives all archived solutions
+
+        returns:
+            list of (score, compact solution), from high to low score
+        """
+        return sorted(self.solutions.values(), key=lambda item: item[0], reverse=True)
+
+
 class Plant_Propagation(Hill_climber):
 
-    def __init__(self, state: object, valid_states: bool, population_size: int, max_generations: int, max_nr_runners: int, max_connection_returns: int = 0):
+    def __init__(self, state: object, valid_states: bool, population_size: int, max_generations: int, max_nr_runners: int, max_connection_returns: int = 0, move_registry: Union['Move_registry', None] = None, route_exchange_moves: bool = False, oracle_moves: bool = False):
         """
         initializes the plant propagation algorithm (PPA) with the following parameters: 
             population_size
@@ -20,12 +155,18 @@ class Plant_Propagation(Hill_climber):
             state is a state object
             population_size is an integer
             max_runners an integer
+            route_exchange_moves is True if the runners can also swap tails,
+            split, merge and reverse routes
+            oracle_moves is True if the runners can also replace the worst route
+            by the best route of the oracle
 
         post:
             PPA object is created with all necesarry aspects
             the PPA is ready to be run
         """
-        super().__init__(state, valid_states, max_connection_returns=max_connection_returns)
+        super().__init__(state, valid_states, max_connection_returns=max_connection_returns,
+                         move_registry=move_registry, route_exchange_moves=route_exchange_moves,
+                         oracle_moves=oracle_moves)
 
         # all population and generation variables
         self.population_size = population_size
@@ -46,9 +187,13 @@ class Plant_Propagation(Hill_climber):
         self.max_nr_runners = max_nr_runners
         self.runner_population: list[object] = []
 
-        # choose: valid, random, hill_climber
+        # choose: valid, random, hill_climber, hill_climber_valid, hill_climber_greedy
         self.initial_population_type = 'hill_climber'
 
+        # number of processes that create the initial population, None for all cores
+        # (in-process when the algorithm itself runs in a pool worker)
+        self.number_processes: Union[int, None] = None
+
         # save how many connections can be returned
         self.max_connection_returns = 0
 
@@ -60,9 +205,45 @@ class Plant_Propagation(Hill_climber):
         # tournament size (potentially) affects population_filter method
         self.tournament_size = 2
 
+        # number of best plants that is always kept by the filters
+        self.elitism = 0
+
+        # best distinct solutions of the run, and the number of replaced duplicates p/generation
+        self.archive_size = 10
+        self.archive = Elite_archive(self.archive_size)
+        self.duplicate_counts: list[int] = []
+
+        # random generator of the filters, seeded from random in reset
+        self.rng = np.random.default_rng(random.randrange(2 ** 32))
+
         # choose: best, sequential or random
         self.filter_type = 'sequential'
 
+        # fraction of the runners that is made by route crossover of two plants
+        self.crossover_fraction: float = 0.0
+
+        # max number of changes of a runner per connection of its distance goal
+        self.max_changes_per_distance = 3
+        self.number_connection_ids = max(
+            connection.id for connection in self.state.connections) + 1
+
+        # number of changes and seconds spent on runners p/generation
+        self.mutation_count = 0
+        self.mutation_counts: list[int] = []
+        self.mutation_times: list[float] = []
+        self.runner_counts: list[int] = []
+
+        # adaptive mode: the number of runners p/generation follows a wall-clock target
+        # (generation_time_target, or the time left of time_limit divided over the
+        # target_generations left) and the distances grow when the high score stagnates
+        self.adaptive_runners = False
+        self.generation_time_target: Union[float, None] = None
+        self.target_generations = 100
+        self.improvement_window = 5
+        self.offspring_budget = population_size * max_nr_runners // 2
+        self.runner_scale: float = max_nr_runners
+        self.distance_scale = 1.0
+
         # heuristic(s)
         self.no_return_connection_heuristic = False
 
@@ -84,26 +265,56 @@ class Plant_Propagation(Hill_climber):
 
         # run the algorithm generation amount time
         for generation in range(self.max_generations):
-            # get all scores of the current population
-            self.get_scores()
 
-            # determine fitness of current population
-            converge_status = self.fitness_function()
+            # stop if the time limit is reached, after at least one generation
+            if generation > 0 and self.time_up():
+                break
+
+            converge_status = self.step(generation)
 
             # check if population has converged to a certain local optimum
             if converge_status == 'converged':
+                self.update_gap(self.best_state)
                 return generation
 
-            # create runner
-            self.make_runners()
+            # stop early if the best score is close enough to the upper bound
+            if self.update_gap(self.best_state):
+                break
+
+        self.update_gap(self.best_state)
+
+    def step(self, generation: int) -> Union[None, str]:
+        """
+        runs one generation: scores the population, creates runners and filters
+
+        returns:
+            'converged' if all plants have the same score, the population is unchanged then
+        """
+        start = time.time()
+
+        # get all scores of the current population
+        self.get_scores()
+
+        # determine fitness of current population
+        converge_status = self.fitness_function()
+
+        if converge_status == 'converged':
+            self.scores = []
+            return converge_status
 
-            # update population
-            self.filter_population(self.filter_type, generation)
+        # create runner
+        self.make_runners()
 
-            print(f"Generation {generation + 1}: {self.high_score}")
+        # update population
+        self.filter_population(self.filter_type, generation)
 
-            # save most important info of best_state
-            self.add_info()
+        print(f"Generation {generation + 1}: {self.high_score}")
+
+        # save most important info of best_state
+        self.add_info()
+
+        if self.adaptive_runners:
+            self.adapt_runners(generation, time.time() - start)
 
     def reset(self) -> None:
         """
@@ -116,6 +327,15 @@ class Plant_Propagation(Hill_climber):
         self.sorted_fitness_values = []
         self.population = []
         self.runner_population = []
+        self.rng = np.random.default_rng(random.randrange(2 ** 32))
+        self.archive = Elite_archive(self.archive_size)
+        self.duplicate_counts = []
+        self.mutation_counts = []
+        self.mutation_times = []
+        self.runner_counts = []
+        self.offspring_budget = self.population_size * self.max_nr_runners // 2
+        self.distance_scale = 1.0
+        self.start_timer()
         self.high_score = 0
         self.high_scores = []
         self.fraction_scores = []
@@ -130,59 +350,56 @@ class Plant_Propagation(Hill_climber):
             'valid' (semi-randomly created valid states)
             'random' (completely random states)
             'hill_climber' (hill_climbers)
+            'hill_climber_valid' (hill_climbers from valid states)
+            'hill_climber_greedy' (hill_climbers from a random number of greedy routes of the oracle)
 
         pre: 
             initial_population_type is one of the options above 
 
         post:
             prints informative message to terminal
-            starting population is created
+            starting population is created, every member by its own seeded climber
+            or constructor on a pool of self.number_processes processes
         """
         # set population type
         type = self.initial_population_type
 
+        assert type in ('valid', 'random', 'hill_climber', 'hill_climber_valid', 'hill_climber_greedy'), \
+            f"invalid population type: {type}"
+
         print(f"creating the initial {type}-population")
         print('...')
 
-        # create valid_state population
-        if type == 'valid':
-            for i in range(self.population_size):
-                self.state.reset()
-                self.create_valid_state()
-                self.population.append(copy.deepcopy(self.state))
-
-        # create random_state population
-        elif type == 'random':
-            for i in range(self.population_size):
-                self.state.reset()
-                self.create_random_state(static=True)
-                self.population.append(copy.deepcopy(self.state))
-
-        # create hill_climber population
-        elif type == 'hill_climber':
-            state = Hill_climber(
-                self.state, False, self.max_connection_returns)
-
-            # run hill_climbers
-            for i in range(self.population_size):
-                state.run(1000, 1)
-                self.population.append(copy.deepcopy(state.current_state))
-
-        elif type == 'hill_climber_valid':
-            state = Hill_climber(
-                self.state, True, self.max_connection_returns)
-
-            # run hill_climbers
-            for i in range(self.population_size):
-                state.run(1000, 1)
-                self.population.append(copy.deepcopy(state.current_state))
+        seeds = [random.randrange(2 ** 32) for _ in range(self.population_size)]
+        settings = (copy.deepcopy(self.state), type, self.max_connection_returns, self.move_registry,
+                    self.number_of_routes, self.number_of_connections)
+
+        number_processes = self.number_processes or multiprocessing.cpu_count()
+
+        # a daemonic process, like a pool worker of an experiment, can not start a pool
+        if multiprocessing.current_process().daemon:
+            number_processes = 1
+
+        # members are sent back as compact solutions
+        if number_processes > 1:
+            with multiprocessing.Pool(number_processes, _init_population_worker, settings) as pool:
+                compact_solutions = pool.map(_create_population_member, seeds)
+        else:
+            _init_population_worker(*settings)
+            compact_solutions = [_create_population_member(seed) for seed in seeds]
+
+        # load_compact_solution resets the copy first
+        for compact_solution in compact_solutions:
+            state = copy.deepcopy(self.state)
+            state.load_compact_solution(compact_solution)
+            self.population.append(state)
 
     def change_population_type(self, type: str) -> None:
         """
         method to change intitial population-type
 
         pre:
-            type is either random, valid or hill_climber
+            type is either random, valid, hill_climber, hill_climber_valid or hill_climber_greedy
 
         post:
             initial_population_type is changed
@@ -201,6 +418,50 @@ class Plant_Propagation(Hill_climber):
         self.routes_scores.append(self.best_state.number_routes)
         self.minute_scores.append(self.best_state.total_minutes)
 
+    def get_elite_states(self) -> list[object]:
+        """
+        gives the distinct solutions of the archive as states
+
+        returns:
+            list of states, from high to low score
+        """
+        elite_states = []
+        for _, compact_solution in self.archive.get_solutions():
+            state = copy.deepcopy(self.state)
+            state.load_compact_solution(compact_solution)
+            elite_states.append(state)
+
+        return elite_states
+
+    ### MIGRATION FUNCTIONS ###
+
+    def get_best_plants(self, number_plants: int) -> list[list[list[int]]]:
+        """
+        gives the highest scoring plants of the population
+
+        returns:
+            compact solutions of at most number_plants plants
+        """
+        best_plants = sorted(self.population, key=self.get_mutated_score,
+                             reverse=True)[:number_plants]
+
+        return [plant.get_compact_solution() for plant in best_plants]
+
+    def replace_worst_plants(self, compact_solutions: list[list[list[int]]]) -> None:
+        """
+        replaces the lowest scoring plants of the population by the given plants
+
+        post:
+            population size is unchanged
+        """
+        self.population.sort(key=self.get_mutated_score, reverse=True)
+
+        # load_compact_solution resets the copy first
+        for index, compact_solution in enumerate(compact_solutions[:len(self.population)]):
+            plant = copy.deepcopy(self.state)
+            plant.load_compact_solution(compact_solution)
+            self.population[len(self.population) - index - 1] = plant
+
     ### SCORE FUNCTIONS ###
 
     def get_scores(self) -> None:
@@ -243,6 +504,9 @@ class Plant_Propagation(Hill_climber):
         max_score = max(scores_only)
         min_score = min(scores_only)
 
+        # fitness values of earlier generations are not used anymore
+        self.fitness_values = []
+
         # if scores are equal end algorithm by returning exit-statement
         if max_score == min_score:
             print(f'Algorithm converged to a score of: {self.high_score}')
@@ -292,6 +556,8 @@ class Plant_Propagation(Hill_climber):
             'best': (select the highest scoring-states)
             'random' (tournament-style, randomly select buckets)
             'sequential' (tournament-style, loops over population for buckets) 
+
+        the self.elitism highest scoring plants are always kept
         """
 
         # add runners to population
@@ -304,28 +570,49 @@ class Plant_Propagation(Hill_climber):
             for state in self.population:
                 show_plot(station_dict, state, 'netherlands')
 
-        # calculate all scores
+        # calculate all scores, the scores of the parents alone are not needed anymore
+        self.scores = []
         self.get_scores()
 
-        # clear population
-        self.population = []
+        # every plant is kept once, duplicates are replaced by fresh runners
+        solution_hashes = self.replace_duplicates()
+
+        # selection works on an array of scores and gives indices of the selected plants
+        scores = np.array([score for score, _ in self.scores], dtype=float)
+        plants = [plant for _, plant in self.scores]
+
+        # the elite is always kept, the rest of the population is selected by the filter
+        selected = self.select_best(scores, np.arange(len(scores)), self.elitism)
+        candidates = np.setdiff1d(np.arange(len(scores)), selected)
+        number_selected = self.population_size - len(selected)
 
         # apply the 'best' filter
         if filter_type == 'best':
-            high_score = self.filter_population_best_only()
+            winners = self.select_best(scores, candidates, number_selected)
 
-        elif filter_type == 'sequential' or filter_type == 'random':
+        # apply the sequential filter
+        elif filter_type == 'sequential':
+            winners = self.filter_population_sequential(
+                scores, candidates, number_selected, self.tournament_size)
 
-            # set bucket_size
-            tournament_size = self.tournament_size
+        # apply the random filter
+        else:
+            winners = self.filter_population_random(
+                scores, candidates, number_selected, self.tournament_size)
 
-            # apply the sequential filter
-            if filter_type == 'sequential':
-                high_score = self.filter_population_sequential(tournament_size)
+        selected = np.concatenate([selected, winners]).astype(np.int64)
+        self.population = [plants[index] for index in selected]
 
-            # apply the random filter
-            else:
-                high_score = self.filter_population_random(tournament_size)
+        # archive the selected plants as compact solutions
+        for index in selected:
+            self.archive.add(scores[index], plants[index], solution_hashes[index])
+
+        # update the high score with the best selected plant
+        best = selected[np.argmax(scores[selected])]
+        self.update_high_score(float(scores[best]), plants[best])
+
+        # the 'best' filter reports the best score of this generation
+        high_score = float(scores[best]) if filter_type == 'best' else self.high_score
 
         # set the start_score if applicable
         if generation == 0:
@@ -334,112 +621,140 @@ class Plant_Propagation(Hill_climber):
         self.scores = []
         self.sorted_fitness_values = []
 
-    def filter_population_best_only(self) -> tuple[float, object]:
+    def replace_duplicates(self, max_attempts: int = 3) -> list[int]:
         """
-        filter method that only chooses highest scoring-states & (potentially) update high_score
+        replaces plants with the same solution as an earlier plant by a runner of the plant,
+        a runner that is a duplicate as well is made again with a larger distance,
+        at most max_attempts times
 
         pre:
             self.scores is populated with (score, state) tuples
+            make_runners is called in this generation
 
         post:
-            population is back to population_size
-            only highest performing states are left
+            the number of replaced plants is added to self.duplicate_counts
+            the replacement runners, their changes and seconds are added to the
+            counts of this generation (runner_counts, mutation_counts, mutation_times)
 
         returns:
-            highest performing score & state
+            the solution hash of every plant in self.scores
         """
-        # sort self.scores
-        sorted_scores = sorted(
-            self.scores, key=lambda item: item[0], reverse=True)
+        start = time.process_time()
+        solution_hashes = []
+        seen: set[int] = set()
+        duplicate_count = 0
+        runner_count = 0
 
-        # get the highest scoring states
-        for state in sorted_scores[:self.population_size]:
-            self.population.append(state[1])
+        for index, (score, plant) in enumerate(self.scores):
+            solution_hash = plant.get_solution_hash()
 
-        # save & update high_score
-        high_score = sorted_scores[0][0]
-        self.update_high_score(high_score, sorted_scores[0][1])
+            if solution_hash in seen:
+                duplicate_count += 1
 
-        return high_score
+                for attempt in range(1, max_attempts + 1):
+                    runner = self.make_runner(
+                        plant, attempt * self.calculate_distance(0.5, score))
+                    solution_hash = runner.get_solution_hash()
+                    runner_count += 1
 
-    def filter_population_sequential(self, tournament_size: int) -> tuple[float, object]:
-        """
-        tournament-style filter that sequentially loops through the population
+                    if solution_hash not in seen:
+                        break
 
-        TIP: if population_size is dividable by tournament_size, the whole population willtaken into account
+                self.scores[index] = [self.get_mutated_score(runner), runner]
 
-        pre:
-            self.scores is populated with (score, state) tuples
+            seen.add(solution_hash)
+            solution_hashes.append(solution_hash)
 
-        post:
-            population is back to population_size
-            all the highest scoring states p/bucket are left
+        self.duplicate_counts.append(duplicate_count)
 
-        returns:
-            highest performing score & state
+        # make_runners saved the counts of this generation before the replacements
+        if self.mutation_counts:
+            self.runner_counts[-1] += runner_count
+            self.mutation_counts[-1] = self.mutation_count
+            self.mutation_times[-1] += time.process_time() - start
+
+        return solution_hashes
+
+    def select_best(self, scores: 'np.ndarray', candidates: 'np.ndarray', number_selected: int) -> 'np.ndarray':
+        """
+        selects the highest scoring candidates with a partial sort
 
+        returns:
+            indices of at most number_selected candidates, from high to low score
         """
-        # shuffle the scores list to ensure randomness
-        random.shuffle(self.scores)
+        number_selected = min(max(number_selected, 0), len(candidates))
+        if number_selected == 0:
+            return np.zeros(0, dtype=np.int64)
 
-        # index variable to keep track
-        tournament_index = 0
+        candidate_scores = scores[candidates]
+        best = np.argpartition(-candidate_scores, number_selected - 1)[:number_selected]
 
-        # loop until population_size is reached or too little scores are left
-        while len(self.population) < self.population_size and tournament_index < len(self.scores):
+        return candidates[best[np.argsort(-candidate_scores[best], kind='stable')]]
 
-            # select a group
-            tournament = self.scores[tournament_index:
-                                     tournament_index + tournament_size]
+    def filter_population_sequential(self, scores: 'np.ndarray', candidates: 'np.ndarray', number_selected: int, tournament_size: int) -> 'np.ndarray':
+        """
+        tournament-style filter that splits the shuffled candidates in consecutive
+        tournaments of tournament_size, the winners of the first tournaments are selected
 
-            # pick highest score as winner
-            winner = max(tournament, key=lambda x: x[0])
+        TIP: if population_size is dividable by tournament_size, the whole population willtaken into account
 
-            # update tournament_index
-            tournament_index += tournament_size
+        returns:
+            indices of at most number_selected winners
+        """
+        if number_selected <= 0 or len(candidates) == 0:
+            return np.zeros(0, dtype=np.int64)
 
-            # update high-score
-            self.update_high_score(winner[0], winner[1])
+        # shuffle the candidates and fill the last tournament with empty places
+        number_tournaments = -(-len(candidates) // tournament_size)
+        tournaments = np.full(number_tournaments * tournament_size, -1, dtype=np.int64)
+        tournaments[:len(candidates)] = self.rng.permutation(candidates)
+        tournaments = tournaments.reshape(number_tournaments, tournament_size)[:number_selected]
 
-            # add winner to population of the next generation
-            self.population.append(winner[1])
+        tournament_scores = np.where(tournaments >= 0, scores[tournaments], -np.inf)
 
-        return self.high_score
+        return tournaments[np.arange(len(tournaments)), np.argmax(tournament_scores, axis=1)]
 
-    def filter_population_random(self, tournament_size: int) -> tuple[float, object]:
+    def filter_population_random(self, scores: 'np.ndarray', candidates: 'np.ndarray', number_selected: int, tournament_size: int) -> 'np.ndarray':
         """
-        tournament-style filter that semi randomly filters through population based on score. 
-
-        pre:
-            self.scores is populated with (score, state) tuples
+        tournament-style filter that semi randomly filters through population based on score,
+        every tournament has tournament_size different random candidates and a
+        candidate is selected at most once
 
-        post:
-            population is back to population_size
-            all the highest scoring states p/bucket are left
+        the tournaments of one round are drawn together, winners that are already
+        selected are dropped and their tournaments are drawn again in the next round
 
         returns:
-            highest performing score & state
-
+            indices of min(number_selected, candidates) winners
         """
-        while len(self.population) < self.population_size:
-            
+        remaining = candidates.copy()
+        winners: list['np.ndarray'] = []
+        number_needed = min(max(number_selected, 0), len(candidates))
+
+        while number_needed > 0:
+
             # ensure tournament_size doesn't exceed number of remaining states
-            current_tournament_size = min(tournament_size, len(self.scores))
+            current_tournament_size = min(tournament_size, len(remaining))
 
-            # pick winner of randomly chosen states
-            tournament = random.sample(self.scores, current_tournament_size)
-            winner = max(tournament, key=lambda x: x[0])
+            # tournament_size different random positions per tournament
+            keys = self.rng.random((number_needed, len(remaining)))
+            positions = np.argpartition(keys, current_tournament_size - 1, axis=1)[:, :current_tournament_size]
+            tournaments = remaining[positions]
 
-            # update high-score
-            self.update_high_score(winner[0], winner[1])
+            round_winners = tournaments[np.arange(number_needed),
+                                        np.argmax(scores[tournaments], axis=1)]
 
-            # add winner to population of the next generation
-            self.population.append(winner[1])
+            # keep every winner once, in order of its first tournament
+            unique_winners, first = np.unique(round_winners, return_index=True)
+            round_winners = unique_winners[np.argsort(first)]
 
-            # remove from scores (so that it is not chosen anymore)
-            self.scores.remove(winner)
+            winners.append(round_winners)
+            remaining = np.setdiff1d(remaining, round_winners, assume_unique=True)
+            number_needed -= len(round_winners)
 
-        return self.high_score
+        if not winners:
+            return np.zeros(0, dtype=np.int64)
+
+        return np.concatenate(winners)
 
     def merge_population(self) -> None:
         """
@@ -450,16 +765,23 @@ class Plant_Propagation(Hill_climber):
 
         post:
             self.population now also includes runners
+            self.runner_population is empty
         """
         for runner in self.runner_population:
             self.population.append(runner)
 
+        self.runner_population = []
+
     ### RUNNER METHODS ###
 
     def make_runners(self):
         """
-        creates all the runners for all states in the population based on distance and amount of runners p/state
+        creates all the runners for all states in the population based on distance and amount of runners p/state,
+        a crossover_fraction of the runners is a crossover child of the state and a partner instead
         """
+        start = time.process_time()
+        self.mutation_count = 0
+
         # generate all distances for all parent states in current population
         distance_dict = self.generate_runner_distances()
 
@@ -472,31 +794,165 @@ class Plant_Propagation(Hill_climber):
             # loop over all runners
             for runner_index in range(len(distance_dict[state_index])):
 
+                if random.random() < self.crossover_fraction:
+                    self.runner_population.append(
+                        self.crossover(current_state, self.select_partner()))
+                    continue
+
                 # set goal
                 distance_goal = distance_dict[state_index][runner_index]
 
-                # set current runner
-                current_runner = copy.deepcopy(current_state)
-                self.state = current_runner
+                self.runner_population.append(
+                    self.make_runner(current_state, distance_goal))
+
+        # save the cost of the runners of this generation
+        self.runner_counts.append(len(self.runner_population))
+        self.mutation_counts.append(self.mutation_count)
+        self.mutation_times.append(time.process_time() - start)
+
+    def get_connection_usage(self, state: object) -> 'np.ndarray':
+        """
+        counts how many times the routes of a state drive every connection
+
+        returns:
+            array with the count per connection id
+        """
+        connection_ids = [connection_id for route in state.routes
+                          for connection_id in route.connection_ids]
+
+        return np.bincount(connection_ids, minlength=self.number_connection_ids)
 
-                # set counter and max_amount of changes
-                counter = 0
-                max_changes = 300
+    def make_runner(self, current_state: object, distance_goal: int) -> object:
+        """
+        creates a runner by changing a copy of the state until the number of
+        connections that are driven a different number of times is distance_goal
+
+        the distance is measured after every change, and light changes (one connection)
+        are used when the goal is close, so the goal is not overshot by large changes
+
+        post:
+            the number of changes is added to self.mutation_count
+
+        returns:
+            the runner
+        """
+        parent_usage = self.get_connection_usage(current_state)
+
+        # set current runner
+        current_runner = copy.deepcopy(current_state)
+        self.state = current_runner
+
+        # the number of changes is at most proportional to the distance goal
+        distance = 0
+        counter = 0
+        max_changes = self.max_changes_per_distance * distance_goal
 
-                # do changes until distance is reached or counter is exceeded
-                while distance_goal > self.likeness(current_state, self.state) and counter < max_changes:
-                    for i in range(distance_goal):
+        while distance < distance_goal and counter < max_changes:
+
+            # calculate the proportion of used connections
+            p = self.state.fraction_used_connections
+
+            if p < 0.8 and distance_goal - distance > 2:
+                self.make_change_heavy()
+            else:
+                self.make_change_light()
+            counter += 1
 
-                        # calculate the proportion of used connections
-                        p = self.state.fraction_used_connections
+            distance = int(np.count_nonzero(
+                self.get_connection_usage(self.state) != parent_usage))
 
-                        if p < 0.8:
-                            self.make_change_heavy()
-                        else:
-                            self.make_change_light()
-                        counter += 1
+        self.mutation_count += counter
 
-                self.runner_population.append(self.state)
+        return self.state
+
+    ### CROSSOVER METHODS ###
+
+    def select_partner(self) -> object:
+        """
+        selects a crossover partner from the scored population with a tournament
+
+        pre:
+            self.scores is populated with (score, state) tuples
+        """
+        tournament = random.sample(self.scores, min(self.tournament_size, len(self.scores)))
+
+        return max(tournament, key=lambda item: item[0])[1]
+
+    def _trim_route(self, route: list[int], covered: set[int], distances: dict[int, float]) -> list[int]:
+        """
+        repairs a route for a child: removes end connections that are driven twice or
+        already covered by the child (they only cost minutes), and shortens routes
+        that reach the time frame at the end that loses the least
+
+        returns:
+            connection ids of the trimmed route, can be empty
+        """
+        connection_value = 10000 / len(self.state.connections)
+        route = list(route)
+        time = sum(distances[connection_id] for connection_id in route)
+
+        while route:
+
+            # score lost by removing an end connection
+            losses = []
+            for end in (0, -1):
+                connection_id = route[end]
+                if connection_id in covered or route.count(connection_id) > 1:
+                    losses.append((-distances[connection_id], end))
+                else:
+                    losses.append((connection_value - distances[connection_id], end))
+
+            loss, end = min(losses)
+            if loss >= 0 and time < self.state.time_frame:
+                break
+
+            time -= distances[route.pop(end)]
+
+        return route
+
+    def crossover(self, parent_1: object, parent_2: object) -> object:
+        """
+        creates a child from the routes of two parents: repeatedly adds the (repaired)
+        route with the highest marginal contribution to the score, until no route
+        adds score or the maximum number of routes is reached
+
+        returns:
+            the child state
+        """
+        distances = {connection.id: connection.distance for connection in self.state.connections}
+        connection_value = 10000 / len(self.state.connections)
+
+        pool = [route.connection_ids for route in parent_1.routes + parent_2.routes]
+        covered: set[int] = set()
+        child_routes: list[list[int]] = []
+
+        while pool and len(child_routes) < self.state.max_number_routes:
+            best_route = None
+
+            for index, route in enumerate(pool):
+                trimmed_route = self._trim_route(route, covered, distances)
+                if not trimmed_route:
+                    continue
+
+                contribution = len(set(trimmed_route) - covered) * connection_value - \
+                    (100 + sum(distances[connection_id] for connection_id in trimmed_route))
+
+                if best_route is None or contribution > best_route[0]:
+                    best_route = (contribution, index, trimmed_route)
+
+            if best_route is None or best_route[0] <= 0:
+                break
+
+            contribution, index, trimmed_route = best_route
+            child_routes.append(trimmed_route)
+            covered.update(trimmed_route)
+            pool.pop(index)
+
+        # load_compact_solution resets the copy first
+        child = copy.deepcopy(parent_1)
+        child.load_compact_solution(child_routes)
+
+        return child
 
     def generate_runner_distances(self):
         """
@@ -504,6 +960,11 @@ class Plant_Propagation(Hill_climber):
         """
         distance_dict = {}
 
+        # in adaptive mode the runners are divided over the plants by fitness, within the budget
+        if self.adaptive_runners:
+            total_fitness = sum(value for value, _, _ in self.fitness_values)
+            self.runner_scale = self.offspring_budget / max(total_fitness, 1)
+
         # loop over the population
         for i in range(len(self.fitness_values)):
             value = self.fitness_values[i][0]
@@ -521,11 +982,59 @@ class Plant_Propagation(Hill_climber):
 
         return distance_dict
 
+    def get_generation_time_target(self, generation: int) -> Union[float, None]:
+        """
+        gives the wall-clock seconds a generation should take in adaptive mode
+
+        the target only depends on the time budget, not on max_generations: a
+        run with a time_limit aims at target_generations generations, so
+        max_generations should be at least target_generations to use the budget
+
+        returns:
+            generation_time_target if it is set
+            the time left of time_limit divided over the target_generations left
+            if it is set (all time left after target_generations)
+            None otherwise
+        """
+        if self.generation_time_target is not None:
+            return self.generation_time_target
+
+        if self.time_limit is not None:
+            time_left = self.time_limit - (time.time() - self.run_start)
+            return max(time_left, 0) / max(self.target_generations - generation - 1, 1)
+
+        return None
+
+    def adapt_runners(self, generation: int, generation_seconds: float) -> None:
+        """
+        adapts the offspring budget to the time target and the distances to the
+        improvement of the high score over the last improvement_window generations
+
+        post:
+            offspring_budget is moved halfway to the number of runners that fits
+            in the time target, and is at least population_size
+            distance_scale shrinks (0.9x, min 0.5) while the high score improves
+            and grows (1.1x, max 3) while it stagnates
+        """
+        target = self.get_generation_time_target(generation)
+        if target is not None and self.runner_counts and self.runner_counts[-1]:
+            seconds_per_runner = generation_seconds / self.runner_counts[-1]
+            fitting_runners = target / seconds_per_runner
+            self.offspring_budget = max(
+                int((self.offspring_budget + fitting_runners) / 2), self.population_size)
+
+        # small distances while improving, explore further when stagnating
+        if len(self.high_scores) > self.improvement_window:
+            if self.high_scores[-1] > self.high_scores[-self.improvement_window - 1]:
+                self.distance_scale = max(self.distance_scale * 0.9, 0.5)
+            else:
+                self.distance_scale = min(self.distance_scale * 1.1, 3)
+
     def calculate_number_of_runners(self, fitness_value: float) -> int:
         """
         determines the amount of runners per state based on the fitness value
         """
-        n_max = self.max_nr_runners
+        n_max = self.runner_scale if self.adaptive_runners else self.max_nr_runners
         n_runners = int(n_max * fitness_value)
 
         return n_runners
@@ -534,7 +1043,7 @@ class Plant_Propagation(Hill_climber):
         """
         determines a distance (semi-random) based on a fitness-value  
         """
-        scale_factor = 10
+        scale_factor = 10 * self.distance_scale
         variability = scale_factor / 2
         r = random.random()
 
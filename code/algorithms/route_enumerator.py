@@ -0,0 +1,337 @@
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import hashlib
+import os
+import numpy as np
+from typing import Iterator, Union
+
+
+def _popcount(words: 'np.ndarray') -> 'np.ndarray':
+    """
+    gives the number of set bits of every row of uint64 words, np.bitwise_count
+    is only available from NumPy 2.0
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1)
+
+    bytes_per_row = np.ascontiguousarray(words).view(np.uint8).reshape(len(words), -1)
+    return np.unpackbits(bytes_per_row, axis=1).sum(axis=1)
+
+
+class Route_chunk():
+    def __init__(self, connections: 'np.ndarray', offsets: 'np.ndarray', times: 'np.ndarray', coverage: 'np.ndarray') -> None:
+        """
+        initializes a chunk of routes stored as compact arrays
+
+        pre:
+            connections has the connection indices of all routes after each other
+            offsets has the start of every route in connections, and the end of the last
+            times has the total time of every route
+            coverage has a bitset (uint64 words) of the driven connections per route
+        """
+        self.connections = connections
+        self.offsets = offsets
+        self.times = times
+        self.coverage = coverage
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def get_route(self, index: int) -> 'np.ndarray':
+        """
+        gives the connection indices of a route
+        """
+        return self.connections[self.offsets[index]:self.offsets[index + 1]]
+
+    def get_lengths(self) -> 'np.ndarray':
+        """
+        gives the number of connections of every route
+        """
+        return np.diff(self.offsets)
+
+    def get_number_covered(self) -> 'np.ndarray':
+        """
+        gives the number of different connections of every route
+        """
+        return _popcount(self.coverage)
+
+    def select(self, indices: 'np.ndarray') -> 'Route_chunk':
+        """
+        gives a chunk with only the routes at the given indices
+        """
+        lengths = self.get_lengths()[indices]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        # position in the new connections array minus the new start, plus the old start
+        positions = np.arange(offsets[-1]) + \
+            np.repeat(self.offsets[indices] - offsets[:-1], lengths)
+
+        return Route_chunk(self.connections[positions], offsets,
+                           self.times[indices], self.coverage[indices])
+
+    @staticmethod
+    def concatenate(chunks: list['Route_chunk'], number_words: int) -> 'Route_chunk':
+        """
+        gives one chunk with the routes of all given chunks
+        """
+        if not chunks:
+            return Route_chunk(np.zeros(0, dtype=np.int32), np.zeros(1, dtype=np.int64),
+                               np.zeros(0), np.zeros((0, number_words), dtype=np.uint64))
+
+        offsets = [np.zeros(1, dtype=np.int64)]
+        start = 0
+        for chunk in chunks:
+            offsets.append(chunk.offsets[1:] + start)
+            start += chunk.offsets[-1]
+
+        return Route_chunk(np.concatenate([chunk.connections for chunk in chunks]),
+                           np.concatenate(offsets),
+                           np.concatenate([chunk.times for chunk in chunks]),
+                           np.concatenate([chunk.coverage for chunk in chunks]))
+
+
+class Route_enumerator():
+    def __init__(self, state: 'State', max_connection_uses: int = 1, max_connection_returns: int = 0, chunk_size: int = 100000, cache_directory: Union[str, None] = 'data/route_cache') -> None:
+        """
+        initializes an enumerator of all routes under the time frame of the state
+
+        pre:
+            max_connection_uses is the max number of times a route drives a
+            connection, 1 gives simple routes
+            max_connection_returns is the max number of times a route drives the same
+            connection directly after each other (like Algorithm), 0 is no limit
+            cache_directory is the directory of the on-disk cache, or None for no cache
+
+        post:
+            the network is stored as index arrays
+        """
+        assert max_connection_uses > 0, "max_connection_uses should be greater than 0"
+        assert max_connection_returns >= 0, "max_connection_returns can not be negative"
+        assert chunk_size > 0, "chunk_size should be greater than 0"
+
+        self.state = state
+        self.max_connection_uses = max_connection_uses
+        self.max_connection_returns = max_connection_returns
+        self.chunk_size = chunk_size
+        self.cache_directory = cache_directory
+
+        self.number_connections: int = len(state.connections)
+        self.number_words: int = (self.number_connections + 63) // 64
+
+        # adjacency per station index: (connection index, other station index, distance)
+        station_index = {station: index for index,
+                         station in enumerate(state.stations)}
+        connection_index = {connection: index for index,
+                            connection in enumerate(state.connections)}
+        self.adjacency: list[list[tuple[int, int, float]]] = [
+            [(connection_index[connection],
+              station_index[connection.station_2 if connection.station_1 == station else connection.station_1],
+              connection.distance)
+             for connection in station.connections]
+            for station in state.stations]
+
+    #### CACHE METHODS ####
+
+    def get_cache_path(self, unique: bool = False) -> Union[str, None]:
+        """
+        gives the cache directory of the network, enumeration parameters, chunk size
+        and deduplication (see iterate_chunks)
+
+        returns:
+            path of the directory
+            None if caching is off
+        """
+        if self.cache_directory is None:
+            return None
+
+        parameters = (self.state.get_network_hash(), self.state.time_frame,
+                      self.max_connection_uses, self.max_connection_returns, self.chunk_size, unique)
+        key = hashlib.sha1(repr(parameters).encode()).hexdigest()
+
+        return os.path.join(self.cache_directory, key)
+
+    def _load_chunks(self, cache_path: str) -> Iterator['Route_chunk']:
+        """
+        streams the chunks of a complete cache from disk
+        """
+        chunk_number = 0
+        while os.path.exists(os.path.join(cache_path, f"chunk_{chunk_number:05}.npz")):
+            with np.load(os.path.join(cache_path, f"chunk_{chunk_number:05}.npz")) as arrays:
+                yield Route_chunk(arrays['connections'], arrays['offsets'],
+                                  arrays['times'], arrays['coverage'])
+            chunk_number += 1
+
+    #### ENUMERATION METHODS ####
+
+    def _create_chunk(self, routes: list[tuple[int, ...]], times: list[float], coverages: list[int]) -> 'Route_chunk':
+        """
+        converts routes in lists to a chunk of compact arrays
+        """
+        lengths = np.array([len(route) for route in routes], dtype=np.int64)
+        connections = np.fromiter((connection for route in routes for connection in route),
+                                  dtype=np.int32, count=int(lengths.sum()))
+
+        mask = (1 << 64) - 1
+        coverage = np.array([[coverage >> (64 * word) & mask for word in range(self.number_words)]
+                             for coverage in coverages], dtype=np.uint64).reshape(-1, self.number_words)
+
+        return Route_chunk(connections, np.concatenate([[0], np.cumsum(lengths)]),
+                           np.array(times, dtype=float), coverage)
+
+    def _is_canonical(self, route: list[int]) -> bool:
+        """
+        checks if a route is the stored orientation of itself and its reverse
+        """
+        if route[0] != route[-1]:
+            return route[0] < route[-1]
+
+        return route <= route[::-1]
+
+    def _search(self) -> Iterator[tuple[tuple[int, ...], float, int]]:
+        """
+        enumerates (depth-first, with an explicit stack) all routes under the time frame
+
+        post:
+            paths are pruned as soon as they reach the time frame
+            a route and its reverse are given only once
+
+        returns:
+            iterator of (connection indices, total time, coverage bitset)
+        """
+        time_frame = self.state.time_frame
+
+        for start_station in range(len(self.adjacency)):
+            route: list[int] = []
+            distances: list[float] = []
+            uses = [0] * self.number_connections
+            time = 0.0
+
+            # every frame is (station, position in its adjacency)
+            stack = [(start_station, 0)]
+            while stack:
+                station, position = stack[-1]
+
+                # all connections of the station are tried: go back one connection
+                if position == len(self.adjacency[station]):
+                    stack.pop()
+                    if route:
+                        uses[route.pop()] -= 1
+                        time -= distances.pop()
+                    continue
+
+                stack[-1] = (station, position + 1)
+                connection, other_station, distance = self.adjacency[station][position]
+
+                if time + distance >= time_frame or uses[connection] >= self.max_connection_uses:
+                    continue
+
+                if self.max_connection_returns and self._count_returns(route, connection) >= self.max_connection_returns:
+                    continue
+
+                route.append(connection)
+                distances.append(distance)
+                uses[connection] += 1
+                time += distance
+
+                if self._is_canonical(route):
+                    coverage = 0
+                    for route_connection in route:
+                        coverage |= 1 << route_connection
+                    yield tuple(route), time, coverage
+
+                stack.append((other_station, 0))
+
+    def _count_returns(self, route: list[int], connection: int) -> int:
+        """
+        counts how many times the route ends with the connection directly after each other
+        """
+        count = 0
+        for route_connection in reversed(route):
+            if route_connection != connection:
+                break
+            count += 1
+
+        return count
+
+    def iterate_chunks(self, unique: bool = False) -> Iterator['Route_chunk']:
+        """
+        streams all routes in chunks of at most chunk_size routes, from the cache if
+        it is complete, otherwise the chunks are enumerated and written to the cache
+
+        pre:
+            unique is True if routes with the same coverage and total time (the same
+            connections in another order) should be given only once, for callers
+            that keep all routes in memory anyway (like Set_covering)
+
+        post:
+            without unique only one chunk is kept in memory, with unique also the
+            coverage and time of every route, to skip duplicates
+
+        returns:
+            iterator of Route_chunk objects
+        """
+        cache_path = self.get_cache_path(unique)
+        if cache_path is not None and os.path.exists(os.path.join(cache_path, 'complete')):
+            yield from self._load_chunks(cache_path)
+            return
+
+        write_cache = cache_path is not None
+        if write_cache:
+            os.makedirs(cache_path, exist_ok=True)
+
+        seen: set[tuple[int, float]] = set()
+        routes, times, coverages = [], [], []
+        chunk_number = 0
+
+        def flush() -> 'Route_chunk':
+            nonlocal chunk_number
+
+            chunk = self._create_chunk(routes, times, coverages)
+            if write_cache:
+                np.savez(os.path.join(cache_path, f"chunk_{chunk_number:05}.npz"),
+                         connections=chunk.connections, offsets=chunk.offsets,
+                         times=chunk.times, coverage=chunk.coverage)
+            chunk_number += 1
+
+            routes.clear()
+            times.clear()
+            coverages.clear()
+
+            return chunk
+
+        for route, time, coverage in self._search():
+            if unique:
+                if (coverage, time) in seen:
+                    continue
+                seen.add((coverage, time))
+
+            routes.append(route)
+            times.append(time)
+            coverages.append(coverage)
+
+            if len(routes) == self.chunk_size:
+                yield flush()
+
+        if routes:
+            yield flush()
+
+        # mark the cache as complete, so it is only read from now on
+        if write_cache:
+            open(os.path.join(cache_path, 'complete'), 'w').close()
+
+    def enumerate_all(self, unique: bool = False) -> 'Route_chunk':
+        """
+        gives all routes in one chunk
+
+        returns:
+            Route_chunk object
+        """
+        return Route_chunk.concatenate(list(self.iterate_chunks(unique)), self.number_words)
+
+    def get_connections(self, route: 'np.ndarray') -> list['Connection']:
+        """
+        gives the Connection objects of a route, for State.add_route_from_connections
+        """
+        return [self.state.connections[connection] for connection in route]
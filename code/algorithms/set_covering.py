@@ -0,0 +1,244 @@
+from .route_enumerator import Route_chunk, Route_enumerator
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import copy
+import time
+import numpy as np
+from scipy.optimize import milp, Bounds, LinearConstraint
+from scipy.sparse import coo_matrix, csr_matrix, hstack, identity
+from typing import Union
+
+
+class Set_covering():
+    def __init__(self, state: 'State', time_limit: float = 300.0, max_pool_size: Union[int, None] = None) -> None:
+        """
+        initializes an exact solver that selects routes from the pool of all
+        feasible routes with a mixed integer program (SciPy HiGHS)
+
+        proving optimality over the pool takes about a minute on Holland, not
+        seconds. With use_route_count_bounds it takes about 25 seconds, but
+        within a time limit it finds much worse solutions on the Netherlands
+        (3386 instead of 7037 in 90 seconds), so it is off by default
+
+        pre:
+            state is an empty state
+            time_limit is the max number of seconds of the solver
+            max_pool_size is the max number of routes in the pool, or None for all
+
+        post:
+            all variables are initialized, the pool is empty until run
+        """
+        assert time_limit > 0, "time_limit should be greater than 0"
+        assert max_pool_size is None or max_pool_size > 0, \
+            "max_pool_size should be greater than 0"
+
+        self.state = state
+        self.time_limit = time_limit
+        self.max_pool_size = max_pool_size
+
+        self.number_connections: int = len(state.connections)
+        self.connection_value: float = 10000 / self.number_connections
+
+        # simple routes, cached on disk per network and time frame
+        self.route_enumerator = Route_enumerator(state, max_connection_uses=1)
+        self.pool: 'Route_chunk' = Route_chunk.concatenate(
+            [], self.route_enumerator.number_words)
+
+        self.best_state = copy.deepcopy(self.state)
+        self.best_score: float = 0.0
+        self.upper_bound: float = 0.0
+        self.is_optimal: bool = False
+
+        # add the bound of every number of routes to the solver, see solve
+        self.use_route_count_bounds = False
+
+    def enumerate_routes(self) -> 'Route_chunk':
+        """
+        enumerates all routes that drive every connection at most once and stay
+        under the time frame, see Route_enumerator
+
+        post:
+            a route and its reverse, and routes that drive the same connections
+            in another order, are in the pool only once
+
+        returns:
+            Route_chunk object with the pool
+        """
+        pool = self.route_enumerator.enumerate_all(unique=True)
+
+        if self.max_pool_size is not None and len(pool) > self.max_pool_size:
+            pool = self.prune_pool(pool)
+
+        self.pool = pool
+
+        return pool
+
+    def prune_pool(self, pool: 'Route_chunk') -> 'Route_chunk':
+        """
+        keeps the routes with the highest value on their own, with an equal share
+        of max_pool_size for every connection so that all connections stay covered
+
+        returns:
+            Route_chunk object with at most max_pool_size routes
+        """
+        share = max(self.max_pool_size // self.number_connections, 1)
+
+        kept: list[int] = []
+        counts = np.zeros(self.number_connections, dtype=np.int64)
+        for index in np.argsort(-self.get_route_values(pool), kind='stable'):
+            route = pool.get_route(index)
+
+            if (counts[route] < share).any():
+                kept.append(index)
+                counts[route] += 1
+
+            if len(kept) >= self.max_pool_size:
+                break
+
+        return pool.select(np.array(kept, dtype=np.int64))
+
+    def get_route_values(self, pool: 'Route_chunk') -> 'np.ndarray':
+        """
+        gives the score of every route on its own
+
+        returns:
+            array with per route the coverage value minus the costs of the route
+        """
+        return pool.get_number_covered() * self.connection_value - 100 - pool.times
+
+    def get_coverage_matrix(self) -> 'csr_matrix':
+        """
+        gives the connection by route matrix of the pool
+
+        returns:
+            sparse matrix with a 1 if the route drives the connection
+        """
+        columns = np.repeat(np.arange(len(self.pool)), self.pool.get_lengths())
+
+        return coo_matrix((np.ones(len(columns)), (self.pool.connections, columns)),
+                          shape=(self.number_connections, len(self.pool))).tocsr()
+
+    def get_route_count_bounds(self) -> 'np.ndarray':
+        """
+        gives the linear programming bound on the score for every number of routes,
+        which is much tighter than the bound with at most max_number_routes routes
+
+        returns:
+            array with the bound for 1 up to max_number_routes routes,
+            -inf for a number of routes without a solution
+        """
+        bounds = np.full(self.state.max_number_routes, -np.inf)
+
+        for number_selected in range(1, min(self.state.max_number_routes, len(self.pool)) + 1):
+            result = self.solve(relax=True, number_selected=number_selected)
+            if result.status == 0:
+                bounds[number_selected - 1] = -result.fun
+
+        return bounds
+
+    def solve(self, relax: bool = False, number_selected: Union[int, None] = None, route_count_bounds: Union['np.ndarray', None] = None, time_limit: Union[float, None] = None) -> 'OptimizeResult':
+        """
+        solves the route selection problem over the pool:
+
+            maximize    sum connection_value * y_c - sum (100 + time_r) * x_r
+            subject to  y_c <= sum of x_r over routes r that drive connection c
+                        sum x_r <= max_number_routes (= number_selected if given)
+                        x_r binary (continuous if relax), 0 <= y_c <= 1
+
+        with route_count_bounds (see get_route_count_bounds) a binary z_T is added
+        per number of routes T, with sum x_r = sum T * z_T, sum z_T <= 1 and
+        score <= sum route_count_bounds[T] * z_T, which closes most of the gap
+        between the relaxation and the best selection
+
+        pre:
+            time_limit is the max number of seconds, self.time_limit if None
+
+        returns:
+            OptimizeResult of scipy.optimize.milp, the objective is minus the score
+        """
+        number_routes = len(self.pool)
+        number_counts = 0 if route_count_bounds is None else len(route_count_bounds)
+        number_variables = number_routes + self.number_connections + number_counts
+
+        objective = np.concatenate([100 + self.pool.times,
+                                    np.full(self.number_connections, -self.connection_value),
+                                    np.zeros(number_counts)])
+        route_row = np.concatenate([np.ones(number_routes),
+                                    np.zeros(self.number_connections + number_counts)])
+
+        coverage = LinearConstraint(
+            hstack([-self.get_coverage_matrix(), identity(self.number_connections),
+                    csr_matrix((self.number_connections, number_counts))]).tocsr(),
+            -np.inf, 0)
+        route_count = LinearConstraint(
+            csr_matrix(route_row[None, :]),
+            0 if number_selected is None else number_selected,
+            self.state.max_number_routes if number_selected is None else number_selected)
+        constraints = [coverage, route_count]
+
+        upper = np.ones(number_variables)
+        if route_count_bounds is not None:
+            counts = np.concatenate([np.zeros(number_routes + self.number_connections),
+                                     np.arange(1, number_counts + 1)])
+            count_row = np.concatenate([np.zeros(number_routes + self.number_connections),
+                                        np.ones(number_counts)])
+
+            # a number of routes without a solution can not be chosen
+            feasible = np.isfinite(route_count_bounds)
+            upper[-number_counts:] = feasible
+            count_bounds = np.where(feasible, route_count_bounds + 1e-6, 0)
+
+            constraints += [
+                LinearConstraint(csr_matrix((route_row - counts)[None, :]), 0, 0),
+                LinearConstraint(csr_matrix(count_row[None, :]), 0, 1),
+                LinearConstraint(csr_matrix(np.concatenate(
+                    [objective[:-number_counts], count_bounds])[None, :]), 0, np.inf)]
+
+        # y_c is integral in every optimal solution, so only routes are integer
+        integrality = np.concatenate([np.full(number_routes, 0 if relax else 1),
+                                      np.zeros(self.number_connections),
+                                      np.full(number_counts, 0 if relax else 1)])
+
+        return milp(objective, constraints=constraints,
+                    integrality=integrality, bounds=Bounds(0, upper),
+                    options={'time_limit': time_limit or self.time_limit})
+
+    def run(self) -> 'State':
+        """
+        enumerates the route pool and solves the route selection problem, with
+        the bound of every number of routes if use_route_count_bounds
+
+        post:
+            self.best_state has the selected routes
+            self.upper_bound is the bound of the solver on the score over the pool
+            self.is_optimal is True if the solver proved optimality over the pool,
+            so only for solutions with routes that drive every connection at most
+            once (and only routes of the pruned pool if max_pool_size is set)
+
+        returns:
+            State object with the selected routes
+        """
+        if not len(self.pool):
+            self.enumerate_routes()
+
+        # the time limit is for the bounds and the solver together
+        start = time.time()
+        route_count_bounds = self.get_route_count_bounds() if self.use_route_count_bounds else None
+        result = self.solve(route_count_bounds=route_count_bounds,
+                            time_limit=max(self.time_limit - (time.time() - start), 1.0))
+        assert result.x is not None, f"no solution found: {result.message}"
+
+        self.best_state = copy.deepcopy(self.state)
+        self.best_state.reset()
+
+        for index in np.nonzero(result.x[:len(self.pool)] > 0.5)[0]:
+            self.best_state.add_route_from_connections(
+                self.route_enumerator.get_connections(self.pool.get_route(index)))
+
+        self.best_score = self.best_state.calculate_score()
+        self.upper_bound = -result.mip_dual_bound
+        self.is_optimal = result.status == 0
+
+        return self.best_state
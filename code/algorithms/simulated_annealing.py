@@ -1,73 +1,56 @@
 from .hill_climber import Hill_climber
+from .move_operators import Move_registry
+from .cooling_schedules import Cooling_schedule, get_cooling_schedule, get_temperature_for_acceptance
 from sys import path
 path.append("../classes")
 from code.classes.state import State
 
 import random
 import copy
-import math
+from typing import Union
 
 
 class Simulated_annealing(Hill_climber):
-    def __init__(self, state: 'State', temperature: int, iterations: int, valid_start_state: bool = True) -> None:
+    def __init__(self, state: 'State', temperature: Union[int, str], iterations: int, valid_start_state: bool = True, move_registry: Union['Move_registry', None] = None, adaptive_moves: bool = False, route_exchange_moves: bool = False, oracle_moves: bool = False) -> None:
         """
         initializes the simulated annealing with a temperature and a amount of iterations
 
         pre:
-            temperature is a positive integer
+            temperature is a positive integer, or 'auto' to calibrate the start
+            and end temperature from the start state of every run
             state is an empty state
+            move_registry is a Move_registry object, or None for the default moves
+            adaptive_moves is True if the move probabilities should be learned online
+            route_exchange_moves is True if the default moves should include tail
+            swap, split, merge and reverse
+            oracle_moves is True if the default moves should include replacing the
+            worst route by the best route of the oracle
 
         post:
             all variables are initialized
         """
-        super().__init__(state)
+        super().__init__(state, move_registry=move_registry,
+                         adaptive_moves=adaptive_moves,
+                         route_exchange_moves=route_exchange_moves,
+                         oracle_moves=oracle_moves)
+
+        assert temperature == 'auto' or temperature > 0, \
+            "temperature should be positive or 'auto'"
 
         self.valid_start_state = valid_start_state
-        self.start_temperature: int = temperature
+        self.auto_temperature: bool = temperature == 'auto'
+        self.start_temperature: float = 200 if self.auto_temperature else temperature
+        self.end_temperature: Union[float, None] = None
         self.iterations = iterations
 
-    def calculate_temperature_lineair(self, iteration) -> float:
-        """
-        calculates the current temperature with a lineair formula
-
-        pre:
-            iteration is less than self.iterations
-
-        return:
-            the current temperature
-        """
-        temperature = self.start_temperature - \
-            (self.start_temperature / self.iterations) * iteration
-
-        return temperature
+        # score difference of the last proposed change
+        self.last_delta: float = 0.0
 
-    def calculate_temperature_exponential(self, iteration) -> float:
-        """
-        calculates the current temperature with a exponential formula
-
-        pre:
-            iteration is less than self.iterations
+        # score of the current state, only changes when a change is accepted
+        self.current_score: float = 0.0
+        self.new_score: float = 0.0
 
-        return:
-            the current temperature
-        """
-        temperature = self.start_temperature * (0.997 ** iteration)
-
-        return temperature
-
-    def calculate_temperature_logaritmic(self, iteration) -> float:
-        """
-        calculates the current temperature with a lineair formula
-
-        pre:
-            iteration is less than self.iterations
-
-        return:
-            the current temperature
-        """
-        temperature = self.start_temperature / (1 + (math.log(1 + iteration)))
-
-        return temperature
+        self.cooling_schedule: 'Cooling_schedule' = get_cooling_schedule('exponential')
 
     def get_chance(self, temperature) -> float:
         """
@@ -80,11 +63,11 @@ class Simulated_annealing(Hill_climber):
             the chance
 
         """
-        # get scores both states
-        score_old_state = self.get_score_state(self.current_state)
-        score_new_state = self.get_score_state(self.state)
+        # only the changed state is scored, the current score is kept
+        self.new_score = self.get_score_state(self.state)
 
-        delta = score_new_state - score_old_state
+        delta = self.new_score - self.current_score
+        self.last_delta = delta
 
         # if the score is better, return a 100% acceptance chance
         if delta > 0:
@@ -94,25 +77,35 @@ class Simulated_annealing(Hill_climber):
         chance = 2 ** ((delta) / temperature)
         return chance
 
-    def change_state(self, iteration: int, cooling_scheme: str) -> None:
+    def change_state(self, iteration: int) -> None:
         """
         changes the state if a random_number is below the accept chance
 
         pre:
             the iteration is a positive integer
-            exponential is a boolean
+            the cooling schedule is started
 
         post:
             changes the current state if the change is accepted
+            the cooling schedule is updated with the outcome
         """
-        # get temperature
-        if cooling_scheme == 'exponential':
-            temperature = self.calculate_temperature_exponential(iteration)
-        elif cooling_scheme == 'lineair':
-            temperature = self.calculate_temperature_lineair(iteration)
-        elif cooling_scheme == 'logaritmic':
-            temperature = self.calculate_temperature_logaritmic(iteration)
+        temperature = self.cooling_schedule.get_temperature(iteration)
 
+        accepted = self.accept_or_reject(temperature)
+        self.cooling_schedule.update(iteration, accepted, self.current_score, self.last_delta)
+
+    def accept_or_reject(self, temperature: float) -> bool:
+        """
+        accepts the changed state if a random number is below the accept chance
+        at the given temperature
+
+        post:
+            changes the current state if the change is accepted,
+            resets the state otherwise
+
+        returns:
+            True if the change is accepted
+        """
         # get accept chance
         accept_chance = self.get_chance(temperature)
 
@@ -122,22 +115,114 @@ class Simulated_annealing(Hill_climber):
         # decide to accept change or not
         if random_number <= accept_chance:
             self.current_state = copy.deepcopy(self.state)
+            self.current_score = self.new_score
+            self.record_move(True, self.last_delta)
+            return True
+
+        self.state = copy.deepcopy(self.current_state)
+        self.record_move(False, self.last_delta)
+        return False
+
+    def step(self, temperature: float, change_light: bool = False) -> float:
+        """
+        makes one change and accepts or rejects it at a fixed temperature
+
+        pre:
+            self.current_state is a created state
+
+        returns:
+            score of the current state after the step
+        """
+        if not change_light:
+            self.make_change_heavy()
         else:
+            self.make_change_light()
+        self.accept_or_reject(temperature)
+
+        return self.current_score
+
+    def start(self) -> None:
+        """
+        creates the start state of a run
+
+        post:
+            self.current_state is a copy of the created state
+            self.current_score is its score
+        """
+        self.state.reset()
+        self.create_state()
+        self.current_state = copy.deepcopy(self.state)
+        self.current_score = self.get_score_state(self.current_state)
+
+    def calibrate_temperature(self, sample_size: int = 300, initial_acceptance: float = 0.8, final_acceptance: float = 0.01, change_light: bool = False) -> tuple[float, Union[float, None]]:
+        """
+        samples random changes of the current state and sets the start and end
+        temperature, so that worse changes are accepted with the given rates
+
+        pre:
+            self.current_state is a created state
+            initial_acceptance > final_acceptance, both between 0 and 1
+
+        post:
+            self.start_temperature and self.end_temperature are set
+            (unchanged if no sampled change is worse)
+            self.state is a copy of self.current_state again
+            the counters of the move registry are unchanged, the sampled moves
+            are not counted as proposals
+
+        returns:
+            start temperature
+            end temperature
+        """
+        assert sample_size > 0, "sample_size should be greater than 0"
+        assert 0 < final_acceptance < initial_acceptance < 1, \
+            "acceptance rates should be between 0 and 1, initial above final"
+
+        # the sampled moves are no part of the run, so their proposals are not kept
+        counters = copy.deepcopy(self.move_registry.counters)
+
+        deltas = []
+        for _ in range(sample_size):
             self.state = copy.deepcopy(self.current_state)
+            self.make_change(change_light)
+            deltas.append(self.get_score_state(self.state) - self.current_score)
 
-    def run(self, algorithm_id: int, cooling_scheme: str, change_light: bool = False) -> list[float]:
+        self.state = copy.deepcopy(self.current_state)
+        self.last_move = None
+        self.move_registry.counters = counters
+
+        start_temperature = get_temperature_for_acceptance(
+            deltas, initial_acceptance)
+        if start_temperature is not None:
+            self.start_temperature = start_temperature
+            self.end_temperature = get_temperature_for_acceptance(
+                deltas, final_acceptance)
+
+        return self.start_temperature, self.end_temperature
+
+    def run(self, algorithm_id: int, cooling_scheme: Union[str, 'Cooling_schedule'], change_light: bool = False) -> list[float]:
         """
         runs the simulated annealing algorithm
 
         pre:
-            exponential is a boolean 
+            cooling_scheme is the name of a cooling scheme or a Cooling_schedule object
+
+        post:
+            the temperatures are calibrated on the start state if temperature is 'auto'
+            the whole temperature schedule is computed before the first iteration
 
         returns:
             list of scores of all iterations
         """
-        self.state.reset()
-        self.create_state()
-        self.current_state = copy.deepcopy(self.state)
+        self.start_timer()
+        self.start()
+
+        self.cooling_schedule = get_cooling_schedule(cooling_scheme)
+        if self.auto_temperature:
+            self.calibrate_temperature(change_light=change_light)
+            if self.end_temperature is not None:
+                self.cooling_schedule.set_end_temperature(self.end_temperature)
+        self.cooling_schedule.start(self.start_temperature, self.iterations)
 
         annealing_score_list = []
 
@@ -146,7 +231,18 @@ class Simulated_annealing(Hill_climber):
                 self.make_change_heavy()
             else:
                 self.make_change_light()
-            self.change_state(iteration, cooling_scheme)
-            annealing_score_list.append(self.current_state.calculate_score())
+            self.change_state(iteration)
+            score = self.current_state.calculate_score()
+            annealing_score_list.append(score)
+
+            # stop early if the score is close enough to the upper bound
+            if self.update_gap(self.current_state, score):
+                break
+
+            # stop at the time limit of the run, with the state so far
+            if self.time_up():
+                break
+
+        self.update_gap(self.current_state)
 
         return annealing_score_list
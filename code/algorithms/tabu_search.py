@@ -0,0 +1,193 @@
+from .hill_climber import Hill_climber
+from .move_operators import Move_registry
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import copy
+import time
+from typing import Union
+
+
+class Tabu_memory():
+    def __init__(self, size: int) -> None:
+        """
+        initializes a fixed-size ring buffer of solution hashes
+
+        pre:
+            size is an integer greater than 0
+
+        post:
+            creates an empty ring buffer and a count per hash for membership checks
+        """
+        assert size > 0, "size should be greater than 0"
+
+        self.size = size
+        self.buffer: list[Union[int, None]] = [None] * size
+        self.position: int = 0
+
+        # number of times every hash is in the buffer
+        self.counts: dict[int, int] = {}
+
+    def __contains__(self, solution_hash: int) -> bool:
+        return solution_hash in self.counts
+
+    def add(self, solution_hash: int) -> None:
+        """
+        adds a hash to the buffer, overwriting the oldest hash when the buffer is full
+
+        post:
+            buffer and counts are updated in constant time
+        """
+        old_hash = self.buffer[self.position]
+
+        if old_hash is not None:
+            self.counts[old_hash] -= 1
+            if self.counts[old_hash] == 0:
+                del self.counts[old_hash]
+
+        self.buffer[self.position] = solution_hash
+        self.counts[solution_hash] = self.counts.get(solution_hash, 0) + 1
+
+        self.position = (self.position + 1) % self.size
+
+    def clear(self) -> None:
+        """
+        empties the buffer
+        """
+        self.buffer = [None] * self.size
+        self.position = 0
+        self.counts = {}
+
+
+class Tabu_search(Hill_climber):
+    def __init__(self, state: 'State', tabu_size: int = 50, neighbourhood_size: int = 10, valid_start_state: bool = True, max_connection_returns: int = 0, move_registry: Union['Move_registry', None] = None, route_exchange_moves: bool = False, oracle_moves: bool = False) -> None:
+        """
+        initializes the tabu search
+
+        pre:
+            tabu_size is the number of recent solutions that are tabu
+            neighbourhood_size is the number of moves sampled per iteration
+            route_exchange_moves is True if the default moves should include tail
+            swap, split, merge and reverse
+            oracle_moves is True if the default moves should include replacing the
+            worst route by the best route of the oracle
+
+        post:
+            all variables are initialized
+        """
+        super().__init__(state, valid_start_state,
+                         max_connection_returns, move_registry,
+                         route_exchange_moves=route_exchange_moves, oracle_moves=oracle_moves)
+
+        assert neighbourhood_size > 0, "neighbourhood_size should be greater than 0"
+
+        self.neighbourhood_size = neighbourhood_size
+        self.tabu_memory = Tabu_memory(tabu_size)
+
+        self.best_score: float = 0.0
+        self.best_state = copy.deepcopy(self.state)
+
+    def sample_neighbourhood(self, change_light: bool) -> list[tuple[float, int, 'State', str, float]]:
+        """
+        applies neighbourhood_size random moves, each to a copy of the current state
+
+        returns:
+            list of (score, solution hash, state, move name, seconds) per candidate
+        """
+        candidates = []
+
+        for _ in range(self.neighbourhood_size):
+            self.state = copy.deepcopy(self.current_state)
+            self.make_change(change_light)
+
+            candidates.append((self.get_score_state(self.state),
+                               self.state.get_solution_hash(),
+                               self.state,
+                               self.last_move,
+                               time.process_time() - self.move_start_time))
+
+        self.last_move = None
+
+        return candidates
+
+    def choose_candidate(self, candidates: list[tuple[float, int, 'State', str, float]]) -> Union[tuple[float, int, 'State', str, float], None]:
+        """
+        chooses the best candidate that is not tabu, or a tabu candidate that beats
+        the best score (aspiration criterion)
+
+        returns:
+            the chosen candidate
+            None if all candidates are tabu
+        """
+        chosen = None
+
+        for candidate in candidates:
+            score, solution_hash = candidate[0], candidate[1]
+
+            allowed = solution_hash not in self.tabu_memory or \
+                score > self.best_score
+
+            if allowed and (chosen is None or score > chosen[0]):
+                chosen = candidate
+
+        return chosen
+
+    def run(self, iterations: int, algorithm_id: int, change_light: bool = False) -> tuple[float, 'State', list]:
+        """
+        runs the tabu search
+
+        pre:
+            iterations is a integer
+
+        returns:
+            best score
+            state with best score
+            list of scores of all iterations
+        """
+        self.start_timer()
+        self.state.reset()
+        self.create_state()
+        self.current_state = copy.deepcopy(self.state)
+        self.tabu_memory.clear()
+        self.tabu_memory.add(self.current_state.get_solution_hash())
+
+        self.best_score = self.get_score_state(self.current_state)
+        self.best_state = copy.deepcopy(self.current_state)
+
+        tabu_score_list = []
+        for _ in range(iterations):
+            current_score = self.get_score_state(self.current_state)
+
+            candidates = self.sample_neighbourhood(change_light)
+            chosen = self.choose_candidate(candidates)
+
+            # save the outcome of every sampled move
+            for score, solution_hash, state, move, seconds in candidates:
+                self.move_registry.record(move, chosen is not None and state is chosen[2],
+                                          score - current_score, seconds)
+
+            # always move to the chosen candidate, even if it is worse
+            if chosen is not None:
+                score, solution_hash, state, move, seconds = chosen
+                self.current_state = state
+                self.tabu_memory.add(solution_hash)
+
+                if score > self.best_score:
+                    self.best_score = score
+                    self.best_state = copy.deepcopy(state)
+
+            self.state = self.current_state
+            tabu_score_list.append(self.current_state.calculate_score())
+
+            # stop early if the best score is close enough to the upper bound
+            if self.update_gap(self.best_state, self.best_score):
+                break
+
+            # stop at the time limit of the run, with the best state so far
+            if self.time_up():
+                break
+
+        self.update_gap(self.best_state, self.best_score)
+
+        return self.best_state.calculate_score(), self.best_state, tabu_score_list
@@ -0,0 +1,459 @@
+from .simulated_annealing import Simulated_annealing
+from .move_operators import create_default_registry
+from .cooling_schedules import Cooling_schedule, get_cooling_schedule
+from sys import path
+path.append("../classes")
+from code.classes.state import State
+
+import copy
+import numpy as np
+from typing import Union
+
+
+# order of the operators in the operator arrays
+OPERATORS = ['add_connection_start', 'add_connection_end',
+             'delete_connection_start', 'delete_connection_end',
+             'add_route', 'delete_route']
+
+# order of the contexts in the context arrays
+HEAVY_CONTEXTS = ['heavy_add_route', 'heavy_full',
+                  'heavy_add_both', 'heavy_add_connection']
+LIGHT_CONTEXTS = ['light_full', 'light_add_connection']
+
+
+class Vectorized_annealing():
+    def __init__(self, state: 'State', temperature: int, iterations: int, number_chains: int, valid_start_state: bool = False, seed: Union[int, None] = None) -> None:
+        """
+        initializes an annealing engine that advances many chains in lockstep,
+        with the solution of every chain stored in NumPy arrays
+
+        pre:
+            state is an empty state
+            temperature is a positive integer
+            number_chains is an integer greater than 0
+
+        post:
+            network arrays (distances, adjacency) are built from the state
+        """
+        assert number_chains > 0, "number_chains should be greater than 0"
+
+        self.state = state
+        self.number_chains = number_chains
+        self.iterations = iterations
+        self.valid_start_state = valid_start_state
+        self.rng = np.random.default_rng(seed)
+
+        # annealer with the same start states and cooling schemes as a single chain
+        self.annealer = Simulated_annealing(
+            state, temperature, iterations, valid_start_state)
+
+        self.time_frame: float = state.time_frame
+        self.max_routes: int = state.max_number_routes
+        self.number_connections: int = len(state.connections)
+
+        # network arrays, indexed by position in state.stations and state.connections
+        station_index = {station: index for index,
+                         station in enumerate(state.stations)}
+        self.connection_index = {connection: index for index,
+                                 connection in enumerate(state.connections)}
+
+        self.distances = np.array(
+            [connection.distance for connection in state.connections])
+        self.connection_stations = np.array(
+            [[station_index[connection.station_1], station_index[connection.station_2]]
+             for connection in state.connections])
+
+        self.degrees = np.array(
+            [len(station.connections) for station in state.stations])
+        self.adjacency = np.full(
+            (len(state.stations), max(self.degrees.max(), 1)), -1)
+        for index, station in enumerate(state.stations):
+            for position, connection in enumerate(station.connections):
+                self.adjacency[index, position] = self.connection_index[connection]
+
+        # capacity of the circular buffer of connections per route
+        self.capacity = int(self.time_frame // self.distances.min()) * 2 + 4
+
+        # operator weights per context, from the default move registry
+        registry = create_default_registry()
+        self.cumulative_weights = {}
+        for contexts in (HEAVY_CONTEXTS, LIGHT_CONTEXTS):
+            weights = np.array([[registry.get_weights(context).get(operator, 0)
+                                 for operator in OPERATORS] for context in contexts], dtype=float)
+            self.cumulative_weights[contexts[0]] = np.cumsum(
+                weights / weights.sum(axis=1, keepdims=True), axis=1)
+
+    #### SOLUTION ARRAYS ####
+
+    def _create_chain_arrays(self) -> None:
+        """
+        creates the solution arrays of all chains from start states made by the annealer
+
+        post:
+            usage, routes (circular buffers), route times and score components are filled
+        """
+        chains, routes = self.number_chains, self.max_routes
+
+        self.usage = np.zeros((chains, self.number_connections), dtype=np.int64)
+        self.route_connections = np.full(
+            (chains, routes, self.capacity), -1, dtype=np.int64)
+        self.heads = np.zeros((chains, routes), dtype=np.int64)
+        self.tails = np.zeros((chains, routes), dtype=np.int64)
+        self.start_stations = np.zeros((chains, routes), dtype=np.int64)
+        self.end_stations = np.zeros((chains, routes), dtype=np.int64)
+        self.route_times = np.zeros((chains, routes))
+        self.active = np.zeros((chains, routes), dtype=bool)
+
+        station_index = {station: index for index,
+                         station in enumerate(self.state.stations)}
+
+        for chain in range(chains):
+            self.annealer.state.reset()
+            self.annealer.create_state()
+
+            for route_slot, route in enumerate(self.annealer.state.routes):
+                indices = [self.connection_index[connection]
+                           for connection in route.route_connections]
+                self.route_connections[chain, route_slot, :len(indices)] = indices
+                self.tails[chain, route_slot] = len(indices)
+                self.start_stations[chain, route_slot] = station_index[route.get_start_station()]
+                self.end_stations[chain, route_slot] = station_index[route.get_end_station()]
+                self.route_times[chain, route_slot] = route.total_time
+                self.active[chain, route_slot] = True
+                np.add.at(self.usage[chain], indices, 1)
+
+        self._update_score_components()
+
+    def _update_score_components(self) -> None:
+        """
+        recalculates the score components of all chains from the solution arrays
+        """
+        self.covered = (self.usage > 0).sum(axis=1)
+        self.number_routes = self.active.sum(axis=1)
+        self.minutes = np.where(self.active, self.route_times, 0).sum(axis=1)
+        self.invalid_routes = (self.active & (
+            self.route_times >= self.time_frame)).sum(axis=1)
+
+    def _get_scores(self, covered: np.ndarray, number_routes: np.ndarray, minutes: np.ndarray, invalid_routes: Union[np.ndarray, None] = None) -> np.ndarray:
+        """
+        calculates the quality score, with 1000 minus points for routes above
+        the time frame if invalid_routes is given (like get_score_state)
+
+        returns:
+            array with a score per chain
+        """
+        scores = covered / self.number_connections * 10000 - \
+            (number_routes * 100 + minutes)
+
+        if invalid_routes is not None:
+            scores = scores - 1000 * (invalid_routes > 0)
+
+        return scores
+
+    def _random_route(self, mask: np.ndarray) -> np.ndarray:
+        """
+        picks a uniformly random route slot per chain among the slots in mask
+
+        returns:
+            array with a route slot per chain (arbitrary if the mask row is empty)
+        """
+        keys = self.rng.random(mask.shape)
+        keys[~mask] = -1
+
+        return keys.argmax(axis=1)
+
+    def _random_connection_at(self, stations: np.ndarray) -> np.ndarray:
+        """
+        picks a uniformly random connection of every given station
+
+        returns:
+            array with a connection index per station
+        """
+        positions = (self.rng.random(len(stations)) *
+                     self.degrees[stations]).astype(np.int64)
+
+        return self.adjacency[stations, positions]
+
+    def _other_station(self, connections: np.ndarray, stations: np.ndarray) -> np.ndarray:
+        """
+        gives the station at the other side of every connection
+        """
+        first = self.connection_stations[connections, 0]
+        second = self.connection_stations[connections, 1]
+
+        return np.where(first == stations, second, first)
+
+    #### STEP ####
+
+    def propose(self, change_light: bool) -> dict[str, np.ndarray]:
+        """
+        draws one move per chain, like make_change_heavy or make_change_light
+
+        returns:
+            dict with per chain: operator, route slot, connection and
+            the new score components if the move is accepted
+        """
+        chains = np.arange(self.number_chains)
+
+        # contexts are determined like get_move_context of the hill climber
+        can_add_connection = (self.active & (
+            self.time_frame - self.route_times >= 20)).any(axis=1)
+        can_add_route = self.number_routes < self.max_routes
+
+        if change_light:
+            contexts = can_add_connection.astype(np.int64)
+            cumulative = self.cumulative_weights[LIGHT_CONTEXTS[0]]
+        else:
+            contexts = np.where(~can_add_connection,
+                                np.where(can_add_route, 0, 1),
+                                np.where(can_add_route, 2, 3))
+            cumulative = self.cumulative_weights[HEAVY_CONTEXTS[0]]
+
+        draws = self.rng.random(self.number_chains)
+        operators = (cumulative[contexts] <= draws[:, None]).sum(axis=1)
+        operators = np.minimum(operators, len(OPERATORS) - 1)
+
+        adding = operators <= 1
+        at_start = operators % 2 == 0
+
+        # route slots per operator type
+        slots = np.where(
+            adding,
+            self._random_route(self.active & (
+                self.time_frame - self.route_times >= 20)),
+            self._random_route(self.active))
+        slots = np.where(operators == 4, self._random_route(~self.active), slots)
+
+        heads = self.heads[chains, slots]
+        tails = self.tails[chains, slots]
+        lengths = tails - heads
+
+        # connection that is added or deleted per chain
+        end_stations = np.where(at_start, self.start_stations[chains, slots],
+                                self.end_stations[chains, slots])
+        connections = self._random_connection_at(end_stations)
+        connections = np.where(operators == 4, self.rng.integers(
+            self.number_connections, size=self.number_chains), connections)
+
+        deleted_position = np.where(at_start, heads, tails - 1) % self.capacity
+        deleted = self.route_connections[chains, slots, deleted_position]
+        connections = np.where((operators == 2) | (operators == 3), deleted, connections)
+
+        # moves that do nothing, like in the object model
+        no_op = ((operators == 2) | (operators == 3)) & (lengths <= 1)
+        no_op |= (operators == 5) & (self.number_routes <= 1)
+        no_op |= (operators <= 1) & ~can_add_connection
+        no_op |= (operators == 4) & ~can_add_route
+
+        distances = self.distances[connections]
+        usage = self.usage[chains, connections]
+        old_times = self.route_times[chains, slots]
+
+        covered = self.covered.copy()
+        number_routes = self.number_routes.copy()
+        minutes = self.minutes.copy()
+        invalid_routes = self.invalid_routes.copy()
+        new_times = old_times.copy()
+
+        # add connection at start or end
+        mask = adding & ~no_op
+        covered[mask] += usage[mask] == 0
+        new_times[mask] += distances[mask]
+
+        # delete connection at start or end
+        mask = ((operators == 2) | (operators == 3)) & ~no_op
+        covered[mask] -= usage[mask] == 1
+        new_times[mask] -= distances[mask]
+
+        mask = (operators <= 3) & ~no_op
+        minutes[mask] += new_times[mask] - old_times[mask]
+        invalid_routes[mask] += (new_times[mask] >= self.time_frame).astype(np.int64) - \
+            (old_times[mask] >= self.time_frame)
+
+        # add route
+        mask = (operators == 4) & ~no_op
+        covered[mask] += usage[mask] == 0
+        number_routes[mask] += 1
+        minutes[mask] += distances[mask]
+        new_times[mask] = distances[mask]
+        invalid_routes[mask] += distances[mask] >= self.time_frame
+
+        # delete route: count the connections that are only used by this route
+        mask = (operators == 5) & ~no_op
+        if mask.any():
+            selected = chains[mask]
+            route_usage = np.zeros((len(selected), self.number_connections), dtype=np.int64)
+            positions = np.arange(self.capacity)
+            in_route = ((positions[None, :] - heads[mask, None]) % self.capacity) < lengths[mask, None]
+            rows, columns = np.nonzero(in_route)
+            np.add.at(route_usage,
+                      (rows, self.route_connections[selected[rows], slots[mask][rows], columns]), 1)
+            lost = ((self.usage[selected] > 0) &
+                    (self.usage[selected] == route_usage)).sum(axis=1)
+            covered[mask] -= lost
+            number_routes[mask] -= 1
+            minutes[mask] -= old_times[mask]
+            invalid_routes[mask] -= old_times[mask] >= self.time_frame
+
+        return {'operators': operators,
+                'slots': slots,
+                'connections': connections,
+                'at_start': at_start,
+                'no_op': no_op,
+                'new_times': new_times,
+                'covered': covered,
+                'number_routes': number_routes,
+                'minutes': minutes,
+                'invalid_routes': invalid_routes}
+
+    def apply(self, proposal: dict[str, np.ndarray], accepted: np.ndarray) -> None:
+        """
+        applies the accepted moves to the solution arrays
+
+        post:
+            routes, usage and score components of accepted chains are updated
+        """
+        accepted = accepted & ~proposal['no_op']
+        operators = proposal['operators']
+        slots = proposal['slots']
+        connections = proposal['connections']
+        at_start = proposal['at_start']
+
+        # add connection at start
+        chains = np.nonzero(accepted & (operators == 0))[0]
+        if len(chains):
+            route_slots, added = slots[chains], connections[chains]
+            self.heads[chains, route_slots] -= 1
+            self.route_connections[chains, route_slots,
+                                   self.heads[chains, route_slots] % self.capacity] = added
+            self.start_stations[chains, route_slots] = self._other_station(
+                added, self.start_stations[chains, route_slots])
+
+        # add connection at end
+        chains = np.nonzero(accepted & (operators == 1))[0]
+        if len(chains):
+            route_slots, added = slots[chains], connections[chains]
+            self.route_connections[chains, route_slots,
+                                   self.tails[chains, route_slots] % self.capacity] = added
+            self.tails[chains, route_slots] += 1
+            self.end_stations[chains, route_slots] = self._other_station(
+                added, self.end_stations[chains, route_slots])
+
+        # delete connection at start or end
+        for operator, stations, is_start in ((2, self.start_stations, True), (3, self.end_stations, False)):
+            chains = np.nonzero(accepted & (operators == operator))[0]
+            if len(chains):
+                route_slots, deleted = slots[chains], connections[chains]
+                if is_start:
+                    self.heads[chains, route_slots] += 1
+                else:
+                    self.tails[chains, route_slots] -= 1
+                stations[chains, route_slots] = self._other_station(
+                    deleted, stations[chains, route_slots])
+
+        # add route
+        chains = np.nonzero(accepted & (operators == 4))[0]
+        if len(chains):
+            route_slots, added = slots[chains], connections[chains]
+            self.heads[chains, route_slots] = 0
+            self.tails[chains, route_slots] = 1
+            self.route_connections[chains, route_slots, 0] = added
+            self.start_stations[chains, route_slots] = self.connection_stations[added, 0]
+            self.end_stations[chains, route_slots] = self.connection_stations[added, 1]
+            self.active[chains, route_slots] = True
+
+        # delete route
+        chains = np.nonzero(accepted & (operators == 5))[0]
+        for chain in chains:
+            route_slot = slots[chain]
+            positions = np.arange(self.heads[chain, route_slot],
+                                  self.tails[chain, route_slot]) % self.capacity
+            np.add.at(self.usage[chain],
+                      self.route_connections[chain, route_slot, positions], -1)
+            self.active[chain, route_slot] = False
+            self.heads[chain, route_slot] = self.tails[chain, route_slot] = 0
+
+        # usage of single added or deleted connections
+        changed = accepted & (operators <= 4)
+        changed_chains = np.nonzero(changed)[0]
+        np.add.at(self.usage, (changed_chains, connections[changed_chains]),
+                  np.where((operators[changed_chains] == 2) | (operators[changed_chains] == 3), -1, 1))
+
+        timed = np.nonzero(accepted & (operators <= 4))[0]
+        self.route_times[timed, slots[timed]] = proposal['new_times'][timed]
+
+        for name in ('covered', 'number_routes', 'minutes', 'invalid_routes'):
+            values = getattr(self, name)
+            values[accepted] = proposal[name][accepted]
+
+    def run(self, algorithm_id: int, cooling_scheme: Union[str, 'Cooling_schedule'], change_light: bool = False) -> list[list[float]]:
+        """
+        runs all chains for self.iterations iterations in batched steps
+
+        pre:
+            cooling_scheme is the name of a cooling scheme or a Cooling_schedule object,
+            schedules that react on the run (adaptive, reheating) use their base schedule
+
+        returns:
+            list with per chain the list of scores of all iterations,
+            like Simulated_annealing.run
+        """
+        self._create_chain_arrays()
+
+        # all chains share one fixed schedule, so it is fully precomputed
+        cooling_schedule = get_cooling_schedule(cooling_scheme)
+        temperatures = cooling_schedule.compute(
+            self.annealer.start_temperature, self.iterations)
+
+        scores = np.zeros((self.iterations, self.number_chains))
+
+        for iteration, temperature in enumerate(temperatures):
+            old_scores = self._get_scores(self.covered, self.number_routes,
+                                          self.minutes, self.invalid_routes)
+
+            proposal = self.propose(change_light)
+            new_scores = self._get_scores(proposal['covered'], proposal['number_routes'],
+                                          proposal['minutes'], proposal['invalid_routes'])
+
+            # metropolis acceptance, like get_chance of Simulated_annealing
+            delta = new_scores - old_scores
+            with np.errstate(over='ignore'):
+                chance = np.where(delta > 0, 1.0, 2.0 ** (np.minimum(delta, 0) / temperature))
+            accepted = self.rng.random(self.number_chains) <= chance
+
+            self.apply(proposal, accepted)
+
+            scores[iteration] = self._get_scores(
+                self.covered, self.number_routes, self.minutes)
+
+        return scores.T.tolist()
+
+    def get_compact_solution(self, chain: int) -> list[list[int]]:
+        """
+        gives the routes of a chain as a compact solution
+
+        returns:
+            list with the connection ids of every route
+        """
+        compact_solution = []
+
+        for route_slot in np.nonzero(self.active[chain])[0]:
+            positions = np.arange(self.heads[chain, route_slot],
+                                  self.tails[chain, route_slot]) % self.capacity
+            compact_solution.append(
+                [self.state.connections[index].id
+                 for index in self.route_connections[chain, route_slot, positions]])
+
+        return compact_solution
+
+    def get_state(self, chain: int) -> 'State':
+        """
+        gives the current solution of a chain as a State object
+
+        returns:
+            State object
+        """
+        state = copy.deepcopy(self.state)
+        state.load_compact_solution(self.get_compact_solution(chain))
+
+        return state
@@ -204,6 +204,56 @@ class Route():
             return True
         return False
 
+    def set_path(self: 'Route', stations: list['Station'], connections: list['Connection']) -> None:
+        """
+        replaces the stations and connections of the route by the given path
+
+        pre:
+            stations has one station more than connections
+            consecutive stations are linked by the connection in between
+            the usage of the connections is already counted
+
+        post:
+            stations, connections, connection ids and total time are replaced
+            connection usage is not changed
+        """
+        assert len(stations) == len(connections) + 1, \
+            "a path should have one station more than connections"
+        assert len(connections) >= 1, "a path should have at least one connection"
+
+        self.route_stations = list(stations)
+        self.route_connections = list(connections)
+        self.connection_ids = [connection.id for connection in connections]
+        self.total_time = sum(connection.distance for connection in connections)
+
+    def reverse(self: 'Route') -> None:
+        """
+        reverses the direction of the route
+
+        post:
+            stations, connections and connection ids are in reversed order
+            total time is unchanged
+        """
+        self.route_stations.reverse()
+        self.route_connections.reverse()
+        self.connection_ids.reverse()
+
+    def get_time_until(self: 'Route', station_index: int) -> float:
+        """
+        gives the time from the start of the route to the station with the given index
+
+        pre:
+            0 <= station_index < number of stations
+
+        returns:
+            sum of the distances of the first station_index connections
+        """
+        assert 0 <= station_index < len(self.route_stations), \
+            "station index out of range"
+
+        return sum(connection.distance
+                   for connection in self.route_connections[:station_index])
+
     def is_station_in_route(self: 'Route', station: 'Station') -> bool:
         """
         checks if station is already in this route
@@ -0,0 +1,161 @@
+import random
+from typing import Union
+
+from route import Route
+
+
+class Slack_index():
+
+    def __init__(self: 'Slack_index', time_frame: int) -> None:
+        """
+        initializes an index of routes, bucketed by their remaining minutes
+
+        pre:
+            time_frame is an integer greater than 0
+
+        post:
+            creates an empty bucket for every possible number of remaining minutes
+            creates a fenwick tree over the bucket sizes for fast sampling
+        """
+        assert time_frame > 0, "time_frame should be greater than 0"
+
+        self.time_frame: int = time_frame
+
+        # bucket k holds all routes with k <= remaining minutes < k + 1
+        self.buckets: list[list['Route']] = [[] for _ in range(time_frame + 1)]
+
+        # position of every indexed route: (bucket, index in bucket)
+        self.positions: dict['Route', tuple[int, int]] = {}
+
+        # fenwick tree (1-based) over the number of routes per bucket
+        self.tree: list[int] = [0] * (time_frame + 2)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _get_bucket(self, route: 'Route') -> Union[int, None]:
+        """
+        gives the bucket a route belongs in
+
+        returns:
+            number of whole remaining minutes of the route
+            None if the route has no minutes left
+        """
+        remaining = self.time_frame - route.total_time
+
+        if remaining <= 0:
+            return None
+
+        return min(int(remaining), self.time_frame)
+
+    def _update_tree(self, bucket: int, change: int) -> None:
+        """
+        adds change to the size of the given bucket in the fenwick tree
+        """
+        index = bucket + 1
+        while index < len(self.tree):
+            self.tree[index] += change
+            index += index & -index
+
+    def _count_below(self, bucket: int) -> int:
+        """
+        gives the number of indexed routes in buckets lower than the given bucket
+        """
+        total = 0
+        index = min(bucket, len(self.tree) - 1)
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def _find_bucket(self, rank: int) -> int:
+        """
+        gives the bucket that holds the route with the given rank,
+        when all routes are ordered by bucket
+
+        pre:
+            0 <= rank < number of indexed routes
+        """
+        index = 0
+        step = 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            next_index = index + step
+            if next_index < len(self.tree) and self.tree[next_index] <= rank:
+                index = next_index
+                rank -= self.tree[next_index]
+            step >>= 1
+        return index
+
+    def remove(self, route: 'Route') -> None:
+        """
+        removes a route from the index, if it is indexed
+
+        post:
+            route is removed from its bucket in constant time
+        """
+        if route not in self.positions:
+            return
+
+        bucket, index = self.positions.pop(route)
+        bucket_routes = self.buckets[bucket]
+
+        # swap the last route of the bucket into the freed position
+        last_route = bucket_routes.pop()
+        if last_route is not route:
+            bucket_routes[index] = last_route
+            self.positions[last_route] = (bucket, index)
+
+        self._update_tree(bucket, -1)
+
+    def update(self, route: 'Route') -> None:
+        """
+        (re)indexes a route after its total time has changed
+
+        post:
+            route is in the bucket of its remaining minutes,
+            or not indexed if it has no minutes left
+        """
+        bucket = self._get_bucket(route)
+
+        # nothing changes if the route stays in the same bucket
+        if route in self.positions and self.positions[route][0] == bucket:
+            return
+
+        self.remove(route)
+
+        if bucket is None:
+            return
+
+        self.positions[route] = (bucket, len(self.buckets[bucket]))
+        self.buckets[bucket].append(route)
+        self._update_tree(bucket, 1)
+
+    def clear(self) -> None:
+        """
+        removes all routes from the index
+        """
+        self.buckets = [[] for _ in range(self.time_frame + 1)]
+        self.positions = {}
+        self.tree = [0] * (self.time_frame + 2)
+
+    def sample_with_slack(self, minimum_slack: int) -> Union['Route', None]:
+        """
+        picks a uniformly random route with at least minimum_slack minutes left
+
+        pre:
+            minimum_slack is an integer
+
+        returns:
+            a Route object
+            None if no route has enough minutes left
+        """
+        offset = self._count_below(max(minimum_slack, 0))
+        number_routes = len(self.positions) - offset
+
+        if number_routes <= 0:
+            return None
+
+        rank = offset + random.randrange(number_routes)
+        bucket = self._find_bucket(rank)
+
+        return self.buckets[bucket][rank - self._count_below(bucket)]
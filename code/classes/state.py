@@ -2,11 +2,14 @@ import csv
 import sys
 import copy
 import os
+import hashlib
+from typing import Union
 
 sys.path.append("code/classes")
 from station import Station
 from connection import Connection
 from route import Route
+from slack_index import Slack_index
 
 
 class State():
@@ -60,6 +63,9 @@ class State():
         # route id tracker for defining the name of a route
         self.route_id_tracker: int = 1
 
+        # index of routes with minutes left, bucketed by remaining minutes
+        self.slack_index: 'Slack_index' = Slack_index(time_frame)
+
         # connection usage lists are for checking if all connections are used,
         # and can be used to only add unused connections
         self.used_connections: list = []
@@ -207,6 +213,7 @@ class State():
             self.number_routes += 1
 
             self.set_used(connection)
+            self.slack_index.update(new_route)
 
             return True
         else:
@@ -228,6 +235,7 @@ class State():
             connections = copy.copy(route.route_connections)
 
             self.routes.remove(route)
+            self.slack_index.remove(route)
 
             # update connection usage variables
             for connection in connections:
@@ -289,6 +297,7 @@ class State():
         # add_connection implicitly adds the connection if possible
         if route.add_connection(connection):
             self.set_used(connection)
+            self.slack_index.update(route)
             return True
         return False
 
@@ -317,6 +326,7 @@ class State():
         # method implicitly deletes end connection
         if route.delete_connection_end():
             self.set_unused(connection)
+            self.slack_index.update(route)
             return True
         return False
 
@@ -345,9 +355,327 @@ class State():
         # method implicitly deletes start connection
         if route.delete_connection_start():
             self.set_unused(connection)
+            self.slack_index.update(route)
             return True
         return False
 
+    def _create_route_from_path(self,
+                                stations: list['Station'],
+                                connections: list['Connection']) -> 'Route':
+        """
+        Creates a new route from a path of connections that are already counted
+
+        post:
+            new Route object is added to routes list and slack index
+            connection usage is not changed
+
+        returns:
+            the new Route object
+        """
+        name = f"train_{self.route_id_tracker}"
+        self.route_id_tracker += 1
+
+        # the constructor counts the first connection, which is already counted
+        new_route = Route(name, connections[0])
+        connections[0].used -= 1
+        new_route.set_path(stations, connections)
+
+        self.routes.append(new_route)
+        self.number_routes += 1
+        self.slack_index.update(new_route)
+
+        return new_route
+
+    def _get_path_stations(self, connections: list['Connection']) \
+            -> Union[list['Station'], None]:
+        """
+        Gives the stations a list of consecutive connections drives along
+
+        returns:
+            list of stations, one more than connections
+            None if the connections do not form a path
+        """
+        for start_station in (connections[0].station_1, connections[0].station_2):
+            stations = [start_station]
+
+            for connection in connections:
+                if connection.station_1 == stations[-1]:
+                    stations.append(connection.station_2)
+                elif connection.station_2 == stations[-1]:
+                    stations.append(connection.station_1)
+                else:
+                    break
+
+            if len(stations) == len(connections) + 1:
+                return stations
+        return None
+
+    def add_route_from_connections(self,
+                                   connections: list['Connection']) -> bool:
+        """
+        Adds a new route that drives the given consecutive connections
+
+        pre:
+            connections is a non-empty list of consecutive connections
+
+        post:
+            creates and adds Route object to routes list
+            updates usage of all connections
+
+        returns:
+            True if addition was succesful
+            False if the max number of routes is reached
+        """
+        stations = self._get_path_stations(connections)
+        assert stations is not None, "connections do not form a path"
+
+        if not self._check_number_routes():
+            return False
+
+        for connection in connections:
+            connection.used += 1
+            self.set_used(connection)
+
+        self._create_route_from_path(stations, connections)
+
+        return True
+
+    def get_compact_solution(self) -> list[list[int]]:
+        """
+        Gives a compact encoding of the routes, that is cheap to send
+        between processes or to store
+
+        returns:
+            list with the connection ids of every route
+        """
+        return [list(route.connection_ids) for route in self.routes]
+
+    def load_compact_solution(self, compact_solution: list[list[int]]) -> None:
+        """
+        Replaces the routes by the routes of a compact solution
+
+        pre:
+            compact_solution is made by get_compact_solution on the same network
+
+        post:
+            state is reset and filled with the routes of the compact solution
+        """
+        self.reset()
+
+        connections_by_id = {
+            connection.id: connection for connection in self.connections}
+
+        for connection_ids in compact_solution:
+            self.add_route_from_connections(
+                [connections_by_id[connection_id] for connection_id in connection_ids])
+
+        self.calculate_score()
+
+    def _get_merged_path(self, route_1: 'Route', route_2: 'Route') \
+            -> Union[tuple[list['Station'], list['Connection']], None]:
+        """
+        Gives the path of two routes joined at a shared end station
+
+        returns:
+            tuple with list of stations and list of connections
+            None if the routes do not share an end station
+        """
+        stations_1, connections_1 = route_1.route_stations, route_1.route_connections
+        stations_2, connections_2 = route_2.route_stations, route_2.route_connections
+
+        if stations_1[-1] == stations_2[0]:
+            return (stations_1 + stations_2[1:],
+                    connections_1 + connections_2)
+        elif stations_1[-1] == stations_2[-1]:
+            return (stations_1 + stations_2[-2::-1],
+                    connections_1 + connections_2[::-1])
+        elif stations_1[0] == stations_2[-1]:
+            return (stations_2 + stations_1[1:],
+                    connections_2 + connections_1)
+        elif stations_1[0] == stations_2[0]:
+            return (stations_1[::-1] + stations_2[1:],
+                    connections_1[::-1] + connections_2)
+        return None
+
+    def evaluate_tail_swap(self, route_1: 'Route', index_1: int,
+                           route_2: 'Route', index_2: int) \
+            -> Union[tuple[float, list[float]], None]:
+        """
+        Gives the effect of swapping the tails of two routes at a shared station,
+        without changing the state
+
+        pre:
+            index_1 and index_2 are station indices in route_1 and route_2
+
+        returns:
+            tuple with the score delta and the new times of both routes
+            None if the swap is not possible
+        """
+        if route_1 is route_2 or \
+                route_1.route_stations[index_1] != route_2.route_stations[index_2]:
+            return None
+
+        # both routes should keep at least one connection
+        length_1 = index_1 + len(route_2.route_connections) - index_2
+        length_2 = index_2 + len(route_1.route_connections) - index_1
+        if length_1 < 1 or length_2 < 1:
+            return None
+
+        head_1 = route_1.get_time_until(index_1)
+        head_2 = route_2.get_time_until(index_2)
+
+        new_time_1 = head_1 + route_2.total_time - head_2
+        new_time_2 = head_2 + route_1.total_time - head_1
+
+        # the multiset of connections and the number of routes stay the same
+        return 0.0, [new_time_1, new_time_2]
+
+    def swap_route_tails(self, route_1: 'Route', index_1: int,
+                         route_2: 'Route', index_2: int) -> bool:
+        """
+        Swaps the parts of two routes after a shared station
+
+        post:
+            route_1 continues with the tail of route_2 and vice versa
+            connection usage is unchanged
+
+        returns:
+            True if the swap was succesful
+        """
+        if self.evaluate_tail_swap(route_1, index_1, route_2, index_2) is None:
+            return False
+
+        stations_1 = route_1.route_stations[:index_1] + \
+            route_2.route_stations[index_2:]
+        connections_1 = route_1.route_connections[:index_1] + \
+            route_2.route_connections[index_2:]
+        stations_2 = route_2.route_stations[:index_2] + \
+            route_1.route_stations[index_1:]
+        connections_2 = route_2.route_connections[:index_2] + \
+            route_1.route_connections[index_1:]
+
+        route_1.set_path(stations_1, connections_1)
+        route_2.set_path(stations_2, connections_2)
+
+        self.slack_index.update(route_1)
+        self.slack_index.update(route_2)
+
+        return True
+
+    def evaluate_split(self, route: 'Route', station_index: int) \
+            -> Union[tuple[float, list[float]], None]:
+        """
+        Gives the effect of splitting a route at a station, without changing the state
+
+        returns:
+            tuple with the score delta and the times of both new routes
+            None if the split is not possible
+        """
+        if not 0 < station_index < len(route.route_stations) - 1 or \
+                not self._check_number_routes():
+            return None
+
+        head_time = route.get_time_until(station_index)
+
+        # one extra route costs 100 points, coverage and minutes stay the same
+        return -100.0, [head_time, route.total_time - head_time]
+
+    def split_route(self, route: 'Route', station_index: int) -> bool:
+        """
+        Splits a route in two routes at the station with the given index
+
+        post:
+            route ends at the station, a new route starts there
+            connection usage is unchanged
+
+        returns:
+            True if the split was succesful
+        """
+        if route not in self.routes or \
+                self.evaluate_split(route, station_index) is None:
+            return False
+
+        tail_stations = route.route_stations[station_index:]
+        tail_connections = route.route_connections[station_index:]
+
+        route.set_path(route.route_stations[:station_index + 1],
+                       route.route_connections[:station_index])
+        self.slack_index.update(route)
+
+        self._create_route_from_path(tail_stations, tail_connections)
+
+        return True
+
+    def evaluate_merge(self, route_1: 'Route', route_2: 'Route') \
+            -> Union[tuple[float, list[float]], None]:
+        """
+        Gives the effect of merging two routes that share an end station,
+        without changing the state
+
+        returns:
+            tuple with the score delta and the time of the merged route
+            None if the routes do not share an end station
+        """
+        if route_1 is route_2:
+            return None
+
+        ends_1 = (route_1.route_stations[0], route_1.route_stations[-1])
+        ends_2 = (route_2.route_stations[0], route_2.route_stations[-1])
+        if not any(station in ends_2 for station in ends_1):
+            return None
+
+        # one route less saves 100 points, coverage and minutes stay the same
+        return 100.0, [route_1.total_time + route_2.total_time]
+
+    def merge_routes(self, route_1: 'Route', route_2: 'Route') -> bool:
+        """
+        Merges two routes that share an end station into route_1
+
+        post:
+            route_1 drives both routes, route_2 is removed
+            connection usage is unchanged
+
+        returns:
+            True if the merge was succesful
+        """
+        if route_1 not in self.routes or route_2 not in self.routes or \
+                self.evaluate_merge(route_1, route_2) is None:
+            return False
+
+        stations, connections = self._get_merged_path(route_1, route_2)
+        route_1.set_path(stations, connections)
+
+        self.routes.remove(route_2)
+        self.slack_index.remove(route_2)
+        self.slack_index.update(route_1)
+        self._update_number_routes()
+
+        return True
+
+    def reverse_route(self, route: 'Route') -> tuple[float, list[float]]:
+        """
+        Reverses the direction of a route
+
+        post:
+            start and end of the route are swapped
+
+        returns:
+            tuple with the score delta (always 0) and the unchanged route time
+        """
+        route.reverse()
+        return 0.0, [route.total_time]
+
+    def get_random_route_with_slack(self,
+                                    minimum_slack: int) -> Union['Route', None]:
+        """
+        Gives a random route with at least minimum_slack minutes left
+
+        returns:
+            Route object
+            None if no route has enough minutes left
+        """
+        return self.slack_index.sample_with_slack(minimum_slack)
+
     def _update_fraction_used_connections(self) -> float:
         """
         Calculates the fraction of used connections
@@ -654,6 +982,36 @@ class State():
         sleeper_list.sort()
         return str(sleeper_list)
 
+    def get_solution_hash(self) -> int:
+        """
+        gives a hash of the solution that does not depend on the order,
+        direction or names of the routes
+
+        returns:
+            integer hash of the routes
+        """
+        canonical_routes = []
+        for route in self.routes:
+            connection_ids = tuple(route.connection_ids)
+            canonical_routes.append(min(connection_ids, connection_ids[::-1]))
+        canonical_routes.sort()
+
+        return hash(tuple(canonical_routes))
+
+    def get_network_hash(self) -> str:
+        """
+        gives a hash of the network (stations and connections), that is the
+        same in every run, for caching results on disk
+
+        returns:
+            hexadecimal sha1 hash of the network
+        """
+        network = sorted((connection.id, connection.station_1.name,
+                          connection.station_2.name, connection.distance)
+                         for connection in self.connections)
+
+        return hashlib.sha1(repr(network).encode()).hexdigest()
+
     def awaken_state(self, sleeper_string: str):
         """
         'awakens' a certain state, using a sleeper string
@@ -716,7 +1074,7 @@ class State():
                         connections_list.append(connection)
             self.add_route(connections_list.pop(0))
             for connection in connections_list:
-                self.routes[index].add_connection(connection)
+                self.add_connection_to_route(self.routes[index], connection)
 
     def show_csv_line(self, state_id: int, algorithm: str):
         """
@@ -758,6 +1116,7 @@ class State():
 
         # empty list of routes
         self.routes = []
+        self.slack_index.clear()
 
         self.route_id_tracker = 1
 
@@ -1,6 +1,7 @@
 import csv
 
 from code.algorithms.baseline_algorithm import Baseline_Algorithm
+from code.algorithms.baseline_sampler import Baseline_sampler
 
 from code.classes.state import State
 
@@ -31,3 +32,35 @@ def baseline(case_name: str, state: 'State') -> None:
             state.reset()
             baseline_alg.baseline_algorithm_3()
             writer.writerow(state.show_csv_line(k, "random_algorithm_3"))
+
+
+def baseline_sampled(case_name: str, state: 'State', number_samples: int = 1000000, mode: str = 'routes') -> None:
+    """
+    samples random solutions in batches and writes only the histograms of the
+    score components and the quantiles of the score, not every solution
+
+    the routes are trimmed as intended, not like the baseline algorithms (see
+    Baseline_sampler), so the results are not directly comparable to baseline()
+    """
+    sampler = Baseline_sampler(state, mode)
+    histograms = sampler.run(number_samples)
+
+    with open(f"data/baseline_histogram_{case_name}_{mode}.csv", "w") as file:
+        writer = csv.writer(file)
+
+        # write column headers
+        writer.writerow(["component", "bin", "count"])
+
+        for component, histogram in histograms.items():
+            for score_bin, count in histogram.get_rows():
+                writer.writerow([component, score_bin, count])
+
+    with open(f"data/baseline_quantiles_{case_name}_{mode}.csv", "w") as file:
+        writer = csv.writer(file)
+
+        writer.writerow(["number_samples", "mean", "min", "q01", "q10", "q50", "q90", "q99", "max"])
+
+        score_histogram = histograms['score']
+        writer.writerow([score_histogram.number_scores, score_histogram.get_mean(), score_histogram.minimum]
+                        + [score_histogram.get_quantile(quantile) for quantile in (0.01, 0.1, 0.5, 0.9, 0.99)]
+                        + [score_histogram.maximum])
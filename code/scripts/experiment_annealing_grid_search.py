@@ -2,6 +2,8 @@ import csv
 import time
 
 from code.algorithms.simulated_annealing import Simulated_annealing
+from code.algorithms.parallel_tempering import Parallel_tempering, get_geometric_temperatures
+from code.algorithms.vectorized_annealing import Vectorized_annealing
 from code.classes.state import State
 from .helpers import get_csv_row, list_to_str
 
@@ -142,3 +144,167 @@ def experiment_annealing_grid_search(case_name: str, state: 'State', time_second
                     print(
                         f"SA. Case: {case_name}, cooling scheme: {cooling_scheme}, temperature: {temperature}, counter: {counter}")
                     counter += 1
+
+
+def experiment_annealing_calibrated(case_name: str, state: 'State', time_seconds: int, cooling_scheme: str) -> None:
+    """
+    runs simulated annealing with start and end temperatures calibrated on the
+    start state of every run, instead of a grid over temperatures
+
+    pre:
+        time_seconds is an integer greater than zero
+
+    post:
+        writes following results to a csv:
+            - id
+            - score
+            - fraction of used connections
+            - number of used routes
+            - total minutes
+            - type of start state (random)
+            - type of mutation (heavy)
+            - list of scores after every iteration
+            - sleeper string of last state
+            - calibrated start temperature
+            - calibrated end temperature
+    """
+    assert time_seconds > 0, "time_seconds should be larger than 0"
+
+    with open(f"data/annealing/experiment_annealing_calibrated_{case_name}_{cooling_scheme}.csv", "w") as file:
+
+        writer = csv.writer(file)
+        writer.writerow(["run_id",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "start",
+                         "mutation",
+                         "score_list",
+                         "sleeper_string",
+                         "start_temperature",
+                         "end_temperature"])
+
+        sa = Simulated_annealing(state, 'auto', 10000, valid_start_state=False)
+
+        counter: int = 0
+        start = time.time()
+
+        # run for given amount of time
+        while time.time() - start < time_seconds:
+            score_list = sa.run(counter, cooling_scheme)
+
+            row = get_csv_row(counter, sa.current_state, 'random', 'heavy',
+                              list_to_str(score_list))
+            row.extend([sa.start_temperature, sa.end_temperature])
+            writer.writerow(row)
+
+            print(
+                f"SA calibrated. Case: {case_name}, cooling scheme: {cooling_scheme}, counter: {counter}")
+            counter += 1
+
+
+def experiment_parallel_tempering(case_name: str, state: 'State', time_seconds: int, number_chains: int, high_temperature: int = 500, low_temperature: int = 5) -> None:
+    """
+    runs replica exchange annealing, with one chain per process on a
+    geometric temperature ladder, instead of a grid over temperatures
+
+    pre:
+        time_seconds is an integer greater than zero
+        number_chains is an integer greater than zero
+
+    post:
+        writes following results to a csv:
+            - id
+            - best score
+            - fraction of used connections
+            - number of used routes
+            - total minutes
+            - type of start state (random)
+            - type of mutation (heavy)
+            - list of best current scores after every exchange round
+            - sleeper string of best state
+            - swap rates between neighbouring temperatures
+    """
+    assert time_seconds > 0, "time_seconds should be larger than 0"
+
+    with open(f"data/annealing/experiment_parallel_tempering_{case_name}_{number_chains}.csv", "w") as file:
+
+        writer = csv.writer(file)
+        writer.writerow(["run_id",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "start",
+                         "mutation",
+                         "score_list",
+                         "sleeper_string",
+                         "swap_rates"])
+
+        temperatures = get_geometric_temperatures(
+            high_temperature, low_temperature, number_chains)
+        pt = Parallel_tempering(state, temperatures, 10000)
+
+        counter: int = 0
+        start = time.time()
+
+        # run for given amount of time
+        while time.time() - start < time_seconds:
+            best_score, best_state, score_list = pt.run(counter)
+
+            row = get_csv_row(counter, best_state, 'random', 'heavy',
+                              list_to_str(score_list), best_score=best_score)
+            row.append(list_to_str(pt.get_swap_rates()))
+            writer.writerow(row)
+
+            print(
+                f"PT. Case: {case_name}, chains: {number_chains}, counter: {counter}")
+            counter += 1
+
+
+def experiment_vectorized_annealing(case_name: str, state: 'State', cooling_scheme: str, temperature: int, number_chains: int = 200, iterations: int = 10000) -> None:
+    """
+    runs many annealing chains in lockstep with the vectorized engine,
+    one csv row per chain like experiment_annealing_specific
+
+    pre:
+        temperature is an integer greater than zero
+        number_chains is an integer greater than zero
+
+    post:
+        writes following results to a csv:
+            - id (chain number)
+            - score
+            - fraction of used connections
+            - number of used routes
+            - total minutes
+            - type of start state (random)
+            - type of mutation (heavy)
+            - list of scores after every iteration
+            - sleeper string
+    """
+    assert temperature > 0, "temperature should be larger than 0"
+
+    with open(f"data/annealing/experiment_vectorized_{case_name}_{cooling_scheme}_{temperature}.csv", "w") as file:
+
+        writer = csv.writer(file)
+        writer.writerow(["run_id",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "start",
+                         "mutation",
+                         "score_list",
+                         "sleeper_string"])
+
+        va = Vectorized_annealing(state, temperature, iterations, number_chains)
+        score_lists = va.run(0, cooling_scheme)
+
+        for chain, score_list in enumerate(score_lists):
+            writer.writerow(get_csv_row(chain, va.get_state(chain), 'random', 'heavy',
+                                        list_to_str(score_list)))
+
+        print(
+            f"VA. Case: {case_name}, cooling scheme: {cooling_scheme}, chains: {number_chains}")
@@ -70,6 +70,68 @@ def experiment_hill_climber_specific(case_name: str, state: 'State', start_state
             counter += 1
 
 
+def experiment_hill_climber_adaptive(case_name: str, state: 'State', start_state: str, time_seconds: int) -> None:
+    """
+    runs the hill climber with adaptive move selection, which replaces the
+    separate light and heavy runs of the grid search
+
+    pre:
+        time_seconds is an integer greater than zero
+
+    post:
+        writes following results to a csv:
+            - id
+            - score
+            - fraction of used connections
+            - number of used routes
+            - total minutes
+            - type of start state (valid or random)
+            - type of mutation (adaptive)
+            - list of scores after every iteration
+            - sleeper string of last state
+    """
+    assert time_seconds > 0, "time_seconds should be larger than 0"
+
+    with open(f"data/hill_climber/experiment_hill_climber_adaptive_{case_name}_{start_state}.csv", "w") as file:
+        writer = csv.writer(file)
+
+        # write column heads
+        writer.writerow(["run_id",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "start",
+                         "mutation",
+                         "score_list",
+                         "sleeper_string"])
+
+        valid_start_state = start_state == 'valid'
+
+        change = 'adaptive'
+
+        counter: int = 0
+
+        start = time.time()
+
+        # run grid element for given amount of seconds
+        while time.time() - start < time_seconds:
+
+            # every run learns its move probabilities from scratch
+            hc = Hill_climber(state, valid_start_state, adaptive_moves=True)
+
+            score_list = hc.run(10000, counter)
+
+            # write results to csv
+            writer.writerow(get_csv_row(
+                counter, hc.current_state, start_state, change, list_to_str(score_list)))
+
+            # show progress to user
+            print(
+                f"HC. Case: {case_name}, start state: {start_state}, mutation: {change}, counter: {counter}")
+            counter += 1
+
+
 def experiment_hill_climber_grid_search(case_name: str, state: 'State', time_seconds: int) -> None:
     """
     does a grid search experiment on the hill climber algorithm.
@@ -143,6 +205,76 @@ def experiment_hill_climber_grid_search(case_name: str, state: 'State', time_sec
                     counter += 1
 
 
+def experiment_hill_climber_move_sets(case_name: str, state: 'State', time_seconds: int) -> None:
+    """
+    does a grid search experiment on the move set of the hill climber, with heavy
+    changes from a random start state (the extra moves are heavy moves).
+    parameters:
+        - move set: standard, route exchange (tail swap, split, merge, reverse)
+          or oracle (replace the worst route by the best route)
+
+    pre:
+        time_seconds is an integer greater than zero
+
+    post:
+        writes following results to a csv:
+            - id
+            - score
+            - fraction of used connections
+            - number of used routes
+            - total minutes
+            - type of start state (random)
+            - move set
+            - list of scores after every iteration
+            - sleeper string of last state
+            - improvement rate (fraction of iterations that raised the score)
+    """
+    assert time_seconds > 0, "time_seconds should be larger than 0"
+
+    with open(f"data/hill_climber/experiment_hill_climber_move_sets_{case_name}.csv", "w") as file:
+        writer = csv.writer(file)
+
+        # write column heads
+        writer.writerow(["run_id",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "start",
+                         "mutation",
+                         "score_list",
+                         "sleeper_string",
+                         "improvement_rate"])
+
+        # configure grid items
+        move_sets: dict = {'standard': {},
+                           'route_exchange': {'route_exchange_moves': True},
+                           'oracle': {'oracle_moves': True}}
+
+        counter: int = 0
+
+        for move_set in move_sets:
+            hc = Hill_climber(state, valid_start_state=False, **move_sets[move_set])
+            start = time.time()
+
+            # run grid element for given amount of seconds
+            while time.time() - start < time_seconds:
+                score_list = hc.run(10000, counter, change_light=False)
+
+                improvements = sum(new_score > old_score
+                                   for old_score, new_score in zip(score_list, score_list[1:]))
+                improvement_rate = improvements / max(len(score_list) - 1, 1)
+
+                # write results to csv
+                writer.writerow(get_csv_row(
+                    counter, hc.current_state, 'random', move_set, list_to_str(score_list)) + [improvement_rate])
+
+                # show progress to user
+                print(
+                    f"HC. Case: {case_name}, move set: {move_set}, improvement rate: {improvement_rate:.4f}, counter: {counter}")
+                counter += 1
+
+
 def experiment_hill_climber_restart_grid_search(case_name: str, state: 'State', time_seconds: int) -> None:
     """
     does a grid search experiment on the hill climber algorithm.
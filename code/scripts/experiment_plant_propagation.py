@@ -3,7 +3,7 @@ import time
 
 from sys import path
 from code.algorithms.plant_propagation import Plant_Propagation
-from .helpers import get_csv_row_ppa
+from .helpers import get_csv_row_ppa, list_to_str
 
 path.append("code/classes")
 from state import State
@@ -200,3 +200,114 @@ def experiment_long_ppa(state: object, case_name: str, initial_population: str,
 
             print(counter)
             counter += 1
+
+
+def experiment_crossover(state: object, time_seconds: int, case_name: str, initial_population: str, crossover_fractions: list[float] = [0.0, 0.25, 0.5]):
+    """
+    compares PPA runs with different fractions of crossover runners
+
+    population: 30
+    max_runners: 7
+    generations: 200
+    time_seconds is per crossover fraction
+    """
+    population_size = 30
+    max_runners = 7
+    generation_count = 200
+
+    with open(f"data/ppa/experiment_ppa_crossover_{case_name}_{initial_population}.csv", "w") as file:
+        writer = csv.writer(file)
+        writer.writerow(["run_id",
+                         "start_score",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "initial_population",
+                         "generation_count",
+                         "population_size",
+                         "max_runners",
+                         "score_list",
+                         "fraction_used_list",
+                         "number_of_routes_list",
+                         "minutes_list",
+                         "sleeper_string",
+                         "crossover_fraction"])
+
+        counter = 0
+
+        for crossover_fraction in crossover_fractions:
+            ppa = Plant_Propagation(
+                state, True, population_size, generation_count, max_runners)
+
+            ppa.change_population_type(initial_population)
+            ppa.crossover_fraction = crossover_fraction
+
+            start = time.time()
+
+            while time.time() - start < time_seconds:
+                ppa.run()
+
+                info_list = get_csv_row_ppa(
+                    ppa, counter, initial_population, generation_count, population_size, max_runners)
+
+                info_list.append(crossover_fraction)
+
+                writer.writerow(info_list)
+                file.flush()
+
+                print(counter)
+                counter += 1
+
+
+def experiment_adaptive_ppa(state: object, time_seconds: int, case_name: str, initial_population: str, number_runs: int = 10):
+    """
+    runs the adaptive PPA, that sets its number of runners and distances itself,
+    number_runs times with a time limit of time_seconds per run
+
+    population: 30
+    max_runners: 7 (only sets the first offspring budget)
+    generations: 10000 (the time limit ends the run)
+    """
+    population_size = 30
+    max_runners = 7
+    generation_count = 10000
+
+    with open(f"data/ppa/experiment_ppa_adaptive_{case_name}_{initial_population}.csv", "w") as file:
+        writer = csv.writer(file)
+        writer.writerow(["run_id",
+                         "start_score",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "initial_population",
+                         "generation_count",
+                         "population_size",
+                         "max_runners",
+                         "score_list",
+                         "fraction_used_list",
+                         "number_of_routes_list",
+                         "minutes_list",
+                         "sleeper_string",
+                         "runner_count_list"])
+
+        ppa = Plant_Propagation(
+            state, True, population_size, generation_count, max_runners)
+
+        ppa.change_population_type(initial_population)
+        ppa.adaptive_runners = True
+        ppa.time_limit = time_seconds
+
+        for counter in range(number_runs):
+            ppa.run()
+
+            info_list = get_csv_row_ppa(
+                ppa, counter, initial_population, len(ppa.high_scores), population_size, max_runners)
+
+            info_list.append(list_to_str(ppa.runner_counts))
+
+            writer.writerow(info_list)
+            file.flush()
+
+            print(counter)
@@ -0,0 +1,333 @@
+import copy
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+import tomllib
+from typing import Union
+
+from code.algorithms.hill_climber import Hill_climber, Hill_climber_restart
+from code.algorithms.simulated_annealing import Simulated_annealing
+from code.algorithms.plant_propagation import Plant_Propagation
+from code.algorithms.large_neighbourhood_search import Large_neighbourhood_search
+from code.algorithms.tabu_search import Tabu_search
+from code.algorithms.bound import get_upper_bound
+from code.classes.state import State
+from .helpers import list_to_str
+from .result_cache import Result_cache
+
+
+ALGORITHM_NAMES = ('hill_climber', 'hill_climber_restart', 'simulated_annealing',
+                   'plant_propagation', 'large_neighbourhood_search', 'tabu_search')
+
+RESULT_HEADER = ["job_id", "algorithm", "case", "parameters", "seed", "run_id",
+                 "score", "gap", "p", "T", "Min", "score_list", "sleeper_string"]
+
+
+def _pop_move_settings(parameters: dict) -> dict:
+    """
+    takes the settings of the default move registry out of the parameters
+
+    returns:
+        dict with route_exchange_moves and oracle_moves
+    """
+    return {'route_exchange_moves': parameters.pop('route_exchange_moves', False),
+            'oracle_moves': parameters.pop('oracle_moves', False)}
+
+
+def run_algorithm(algorithm: str, state: 'State', parameters: dict, run_id: int, time_limit: Union[float, None] = None, upper_bound: Union[float, None] = None) -> tuple[float, 'State', list[float], Union[float, None]]:
+    """
+    does one run of an algorithm with the given parameters, every parameter
+    that is not given gets the default of main.py
+
+    pre:
+        algorithm is one of ALGORITHM_NAMES
+        parameters only has parameters of that algorithm, for plant_propagation
+        also Plant_Propagation attributes (like filter_type), and optionally a
+        gap_threshold for every algorithm (see Algorithm.set_upper_bound)
+        time_limit is the max number of seconds of a run (see Algorithm.time_up),
+        the run then stops with its best state so far, None for no limit
+        upper_bound is the bound of the case (see bound.py), or None for no gap
+
+    returns:
+        score of the result
+        result state
+        list of scores (every iteration, or the high score every generation for PPA)
+        gap of the result, None without upper_bound or if the result breaks the constraints
+    """
+    assert algorithm in ALGORITHM_NAMES, f"invalid algorithm: {algorithm}"
+    parameters = dict(parameters)
+    gap_threshold = parameters.pop('gap_threshold', None)
+
+    if algorithm == 'hill_climber':
+        hc = Hill_climber(state, parameters.pop('valid_start_state', False),
+                          adaptive_moves=parameters.pop('adaptive_moves', False),
+                          **_pop_move_settings(parameters))
+        hc.greedy_start_state = parameters.pop('greedy_start_state', False)
+        hc.set_upper_bound(upper_bound, gap_threshold)
+        hc.time_limit = time_limit
+        score_list = hc.run(parameters.pop('iterations', 10000), run_id,
+                            change_light=parameters.pop('change_light', True))
+        result = (hc.current_state.calculate_score(), hc.current_state, score_list, hc.gap)
+
+    elif algorithm == 'hill_climber_restart':
+        hcr = Hill_climber_restart(state, parameters.pop('restart_number', 100),
+                                   valid_start_state=parameters.pop('valid_start_state', False),
+                                   **_pop_move_settings(parameters))
+        hcr.greedy_start_state = parameters.pop('greedy_start_state', False)
+        hcr.set_upper_bound(upper_bound, gap_threshold)
+        hcr.time_limit = time_limit
+        result = (*hcr.run(parameters.pop('iterations', 10000), run_id,
+                           change_light=parameters.pop('change_light', True)), hcr.gap)
+
+    elif algorithm == 'simulated_annealing':
+        sa = Simulated_annealing(state, parameters.pop('temperature', 200),
+                                 parameters.pop('iterations', 10000),
+                                 parameters.pop('valid_start_state', False),
+                                 **_pop_move_settings(parameters))
+        sa.greedy_start_state = parameters.pop('greedy_start_state', False)
+        sa.set_upper_bound(upper_bound, gap_threshold)
+        sa.time_limit = time_limit
+        score_list = sa.run(run_id, parameters.pop('cooling_scheme', 'exponential'),
+                            parameters.pop('change_light', False))
+        result = (sa.current_state.calculate_score(), sa.current_state, score_list, sa.gap)
+
+    elif algorithm == 'plant_propagation':
+        ppa = Plant_Propagation(state, parameters.pop('valid_states', True),
+                                parameters.pop('population_size', 12),
+                                parameters.pop('max_generations', 200),
+                                parameters.pop('max_nr_runners', 5),
+                                **_pop_move_settings(parameters))
+
+        # jobs are the parallel part, a pool worker can not start a pool of its own
+        ppa.number_processes = 1
+
+        # the other parameters are attributes, like filter_type or crossover_fraction
+        for name in list(parameters):
+            assert hasattr(ppa, name), f"invalid Plant_Propagation attribute: {name}"
+            setattr(ppa, name, parameters.pop(name))
+
+        if time_limit is not None:
+            ppa.time_limit = min(ppa.time_limit or time_limit, time_limit)
+
+        ppa.set_upper_bound(upper_bound, gap_threshold)
+        ppa.run()
+        result = (ppa.high_score, ppa.best_state, ppa.high_scores, ppa.gap)
+
+    elif algorithm == 'large_neighbourhood_search':
+        lns = Large_neighbourhood_search(state, parameters.pop('destroy_size', 3),
+                                         parameters.pop('destroy_type', 'mixed'),
+                                         parameters.pop('valid_start_state', False))
+        lns.greedy_start_state = parameters.pop('greedy_start_state', False)
+        lns.set_upper_bound(upper_bound, gap_threshold)
+        lns.time_limit = time_limit
+        score_list = lns.run(parameters.pop('iterations', 10000), run_id)
+        result = (lns.best_score, lns.best_state, score_list, lns.gap)
+
+    else:
+        ts = Tabu_search(state, parameters.pop('tabu_size', 50),
+                         parameters.pop('neighbourhood_size', 10),
+                         parameters.pop('valid_start_state', False),
+                         **_pop_move_settings(parameters))
+        ts.greedy_start_state = parameters.pop('greedy_start_state', False)
+        ts.set_upper_bound(upper_bound, gap_threshold)
+        ts.time_limit = time_limit
+        result = (*ts.run(parameters.pop('iterations', 1000), run_id,
+                          change_light=parameters.pop('change_light', False)), ts.gap)
+
+    assert not parameters, f"invalid parameters for {algorithm}: {list(parameters)}"
+
+    return result
+
+
+def load_spec(file_path: str) -> dict:
+    """
+    reads an experiment spec from a JSON or TOML file, see docs/usage_experiments.md
+
+    returns:
+        the spec
+    """
+    if file_path.endswith('.toml'):
+        with open(file_path, 'rb') as file:
+            spec = tomllib.load(file)
+    else:
+        with open(file_path) as file:
+            spec = json.load(file)
+
+    assert spec.get('algorithm') in ALGORITHM_NAMES, \
+        f"invalid algorithm: {spec.get('algorithm')}"
+    assert spec.get('time_seconds', 0) > 0, "time_seconds should be larger than 0"
+
+    return spec
+
+
+def expand_jobs(spec: dict) -> list[dict]:
+    """
+    expands a spec to one job per combination of grid values and seed
+
+    returns:
+        list of jobs with job_id, algorithm, case, parameters, seed and time_seconds
+    """
+    grid = spec.get('grid', {})
+    names = sorted(grid)
+    seeds = spec.get('seeds', [0])
+
+    jobs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        parameters = dict(spec.get('parameters', {}))
+        parameters.update(zip(names, values))
+
+        for seed in seeds:
+            jobs.append({'job_id': len(jobs),
+                         'algorithm': spec['algorithm'],
+                         'case': spec.get('case', ''),
+                         'parameters': parameters,
+                         'seed': seed,
+                         'time_seconds': spec['time_seconds']})
+
+    return jobs
+
+
+# state of the job workers, sent once per worker process
+_worker_state: dict = {}
+
+
+def _init_job_worker(state: 'State', upper_bound: Union[float, None] = None) -> None:
+    """
+    saves the empty state and the upper bound of its case in a worker process
+    """
+    _worker_state['state'] = state
+    _worker_state['upper_bound'] = upper_bound
+
+
+def run_job(job: dict) -> dict:
+    """
+    runs the algorithm of a job with the seed of the job, run after run until
+    the time budget of the job is used
+
+    every run gets the time left of the budget as its time limit, so the last
+    run stops at the end of the budget with its best state so far (a run does
+    at least one iteration or generation), and the job stops when a run
+    reaches the gap_threshold of the parameters
+
+    pre:
+        _init_job_worker is called in this process
+
+    returns:
+        dict with the job, a result row per run, the best score and the compact
+        solution of the best state
+    """
+    random.seed(job['seed'])
+    state = copy.deepcopy(_worker_state['state'])
+
+    rows = []
+    best_score = None
+    best_solution = None
+
+    gap_threshold = job['parameters'].get('gap_threshold')
+
+    start = time.time()
+    while not rows or time.time() - start < job['time_seconds']:
+        time_left = job['time_seconds'] - (time.time() - start)
+        score, result_state, score_list, gap = run_algorithm(
+            job['algorithm'], state, job['parameters'], len(rows), max(time_left, 0.0),
+            _worker_state.get('upper_bound'))
+
+        rows.append([job['job_id'], job['algorithm'], job['case'],
+                     json.dumps(job['parameters'], sort_keys=True), job['seed'], len(rows),
+                     score, gap, result_state.fraction_used_connections,
+                     result_state.number_routes, result_state.total_minutes,
+                     list_to_str(score_list), result_state.show_sleeper_string()])
+
+        if best_score is None or score > best_score:
+            best_score = score
+            best_solution = result_state.get_compact_solution()
+
+        # the result is close enough to the upper bound, more runs are not needed
+        if gap is not None and gap_threshold is not None and gap <= gap_threshold:
+            break
+
+    return {'job': job, 'rows': rows, 'best_score': best_score, 'best_solution': best_solution}
+
+
+def get_job_key(job: dict, state: 'State', cache: 'Result_cache') -> str:
+    """
+    gives the cache key of a job, the time budget is part of the key
+    """
+    return cache.get_key(job['algorithm'], job['parameters'], state,
+                         job['seed'], job['time_seconds'])
+
+
+def run_experiment(spec: dict, state: 'State', processes: Union[int, None] = None, cache: Union['Result_cache', None] = None) -> list[dict]:
+    """
+    runs all jobs of a spec on a process pool, and writes the rows of all
+    jobs to one result store: data/experiments/{name}.csv
+
+    jobs that are in the result cache are not run again, their stored rows
+    are written instead, so an interrupted or extended experiment only runs
+    the jobs that are new
+
+    pre:
+        state is the empty state of the case of the spec
+        processes is the number of worker processes, None for all cores
+        cache is a Result_cache, a cache in data/result_cache is used if None,
+        unless the spec has "cache": false
+
+    post:
+        rows are written as soon as their job is done
+        results of new jobs are stored in the cache
+
+    returns:
+        list with the result of every job
+    """
+    jobs = expand_jobs(spec)
+    upper_bound = get_upper_bound(state)
+    processes = processes or spec.get('processes') or multiprocessing.cpu_count()
+
+    if cache is None and spec.get('cache', True):
+        cache = Result_cache()
+
+    os.makedirs("data/experiments", exist_ok=True)
+    name = spec.get('name', f"{spec['algorithm']}_{spec.get('case', '')}")
+
+    results = []
+    with open(f"data/experiments/{name}.csv", "w") as file:
+        writer = csv.writer(file)
+        writer.writerow(RESULT_HEADER)
+
+        # reuse the results of jobs that are already done, with the job ids of this spec
+        new_jobs = []
+        for job in jobs:
+            result = cache.load(get_job_key(job, state, cache)) if cache is not None else None
+
+            if result is None:
+                new_jobs.append(job)
+                continue
+
+            result['job'] = job
+            for row in result['rows']:
+                row[0] = job['job_id']
+
+            writer.writerows(result['rows'])
+            results.append(result)
+
+        if results:
+            print(f"Experiment {name}: {len(results)}/{len(jobs)} jobs loaded from the cache")
+
+        with multiprocessing.Pool(processes, _init_job_worker, (state, upper_bound)) as pool:
+            for result in pool.imap_unordered(run_job, new_jobs):
+                writer.writerows(result['rows'])
+                file.flush()
+                results.append(result)
+
+                if cache is not None:
+                    cache.store(get_job_key(result['job'], state, cache), result)
+
+                # show progress to user
+                print(
+                    f"Experiment {name}: job {result['job']['job_id']} done, best score: {result['best_score']}, {len(results)}/{len(jobs)}")
+
+    return sorted(results, key=lambda result: result['job']['job_id'])
@@ -0,0 +1,82 @@
+import csv
+import time
+
+from code.algorithms.tabu_search import Tabu_search
+from code.classes.state import State
+from .helpers import get_csv_row, list_to_str
+
+
+def experiment_tabu_search_grid_search(case_name: str, state: 'State', time_seconds: int) -> None:
+    """
+    does a grid search experiment on the tabu search algorithm.
+    parameters:
+        - tabu size: 10, 50
+        - neighbourhood size: 5, 20
+        - type of mutation: light or heavy
+
+    pre:
+        time_seconds is an integer greater than zero
+
+    post:
+        writes following results to a csv:
+            - id
+            - best score found
+            - fraction of used connections
+            - number of used routes
+            - total minutes
+            - type of start state (random)
+            - type of mutation (light or heavy)
+            - list of scores after every iteration
+            - sleeper string of state with best score
+            - tabu size
+            - neighbourhood size
+    """
+    assert time_seconds > 0, "time_seconds should be larger than 0"
+
+    with open(f"data/tabu_search/experiment_tabu_search_grid_search_{case_name}.csv", "w") as file:
+        writer = csv.writer(file)
+
+        # write column headers
+        writer.writerow(["run_id",
+                         "score",
+                         "p",
+                         "T",
+                         "Min",
+                         "start",
+                         "mutation",
+                         "score_list",
+                         "sleeper_string",
+                         "tabu_size",
+                         "neighbourhood_size"])
+
+        # configure grid items
+        change_light: dict = {'light': True, 'heavy': False}
+        tabu_sizes = [10, 50]
+        neighbourhood_sizes = [5, 20]
+
+        counter: int = 0
+
+        # run tabu search for every combination of grid items
+        for tabu_size in tabu_sizes:
+            for neighbourhood_size in neighbourhood_sizes:
+                for change in change_light:
+                    ts = Tabu_search(
+                        state, tabu_size, neighbourhood_size, valid_start_state=False)
+                    start = time.time()
+
+                    # run grid element for given amount of time
+                    while time.time() - start < time_seconds:
+
+                        # the number of evaluated moves per run is the same for all neighbourhood sizes
+                        best_score, best_state, score_list = ts.run(
+                            10000 // neighbourhood_size, counter, change_light=change_light[change])
+
+                        row = get_csv_row(
+                            counter, best_state, 'random', change, list_to_str(score_list), best_score=best_score)
+                        row += [tabu_size, neighbourhood_size]
+                        writer.writerow(row)
+
+                        # show progress to user
+                        print(
+                            f"TS. Case: {case_name}, mutation: {change}, tabu size: {tabu_size}, neighbourhood size: {neighbourhood_size}, counter: {counter}")
+                        counter += 1
@@ -0,0 +1,232 @@
+import copy
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from typing import Union
+
+from code.classes.state import State
+from .experiment_scheduler import ALGORITHM_NAMES, _init_job_worker, _worker_state, run_algorithm
+from .result_cache import Result_cache
+
+
+# parameter that sets the budget of a run, per algorithm
+BUDGET_PARAMETERS = {'hill_climber': 'iterations',
+                     'hill_climber_restart': 'iterations',
+                     'simulated_annealing': 'iterations',
+                     'plant_propagation': 'max_generations',
+                     'large_neighbourhood_search': 'iterations',
+                     'tabu_search': 'iterations'}
+
+
+def _evaluate_configuration(arguments: tuple) -> tuple[float, float]:
+    """
+    runs one configuration with a seed and a budget
+
+    pre:
+        _init_job_worker is called in this process
+
+    returns:
+        best score of the score trajectory of the run
+        process seconds of the run
+    """
+    algorithm, parameters, seed = arguments
+    random.seed(seed)
+    state = copy.deepcopy(_worker_state['state'])
+
+    start = time.process_time()
+    score, _, score_list, _ = run_algorithm(algorithm, state, parameters, seed)
+
+    # the trajectory also has the scores before a restart or the last generation
+    best_score = float(max(list(score_list) + [score]))
+
+    return best_score, time.process_time() - start
+
+
+class Successive_halving():
+    def __init__(self, state: 'State', algorithm: str, grid: dict[str, list], parameters: Union[dict, None] = None, reduction_factor: int = 3, processes: Union[int, None] = None, seed: int = 0, cache: Union['Result_cache', None] = None) -> None:
+        """
+        initializes a successive halving search over the configurations of a grid:
+        all configurations get a small budget, and the best 1 / reduction_factor
+        of every rung is run again with a reduction_factor times larger budget
+
+        the budget is the number of iterations (generations for plant_propagation),
+        and configurations are compared on the best score of their score trajectory
+
+        pre:
+            algorithm is one of ALGORITHM_NAMES
+            grid has a list of values per parameter of the algorithm
+            parameters are the same for every configuration
+            reduction_factor is an integer greater than 1
+            cache is a Result_cache for evaluations that are already done, or None
+
+        post:
+            all variables are initialized
+        """
+        assert algorithm in ALGORITHM_NAMES, f"invalid algorithm: {algorithm}"
+        assert reduction_factor > 1, "reduction_factor should be greater than 1"
+        assert BUDGET_PARAMETERS[algorithm] not in grid, "the budget can not be in the grid"
+
+        self.state = state
+        self.algorithm = algorithm
+        self.grid = grid
+        self.parameters = parameters or {}
+        self.reduction_factor = reduction_factor
+        self.processes = processes or multiprocessing.cpu_count()
+        self.seed = seed
+        self.cache = cache
+
+        # one row per evaluation: bracket, rung, budget, configuration, seed, score, seconds
+        self.results: list[list] = []
+
+        self.best_configuration: Union[dict, None] = None
+        self.best_score: float = 0.0
+
+    def get_configurations(self, number_configurations: Union[int, None] = None) -> list[dict]:
+        """
+        gives the configurations of the grid
+
+        returns:
+            all combinations of the grid if number_configurations is None,
+            otherwise number_configurations random combinations (all if there are fewer)
+        """
+        names = sorted(self.grid)
+        configurations = [dict(zip(names, values))
+                          for values in itertools.product(*(self.grid[name] for name in names))]
+
+        if number_configurations is not None and number_configurations < len(configurations):
+            configurations = random.Random(self.seed).sample(configurations, number_configurations)
+
+        return configurations
+
+    def evaluate(self, configurations: list[dict], budget: int, bracket: int, rung: int) -> list[float]:
+        """
+        runs every configuration once with the given budget, every configuration
+        keeps its own seed over the rungs
+
+        post:
+            a row per configuration is added to self.results
+
+        returns:
+            score per configuration
+        """
+        budget_parameter = BUDGET_PARAMETERS[self.algorithm]
+        seeds = {json.dumps(configuration, sort_keys=True): self.seed + index
+                 for index, configuration in enumerate(self.get_configurations())}
+
+        arguments = []
+        for configuration in configurations:
+            parameters = dict(self.parameters)
+            parameters.update(configuration)
+            parameters[budget_parameter] = budget
+            arguments.append((self.algorithm, parameters,
+                              seeds[json.dumps(configuration, sort_keys=True)]))
+
+        # only evaluations that are not in the cache are run
+        keys = [self.cache.get_key(algorithm, parameters, self.state, seed)
+                if self.cache is not None else None
+                for algorithm, parameters, seed in arguments]
+        cached = [self.cache.load(key) if key is not None else None for key in keys]
+        new_arguments = [argument for argument, result in zip(arguments, cached) if result is None]
+
+        if self.processes > 1 and len(new_arguments) > 1:
+            with multiprocessing.Pool(self.processes, _init_job_worker, (self.state,)) as pool:
+                new_evaluations = iter(pool.map(_evaluate_configuration, new_arguments))
+        else:
+            _init_job_worker(self.state)
+            new_evaluations = iter([_evaluate_configuration(argument) for argument in new_arguments])
+
+        evaluations = []
+        for key, result in zip(keys, cached):
+            if result is not None:
+                evaluations.append((result['score'], result['seconds']))
+                continue
+
+            score, seconds = next(new_evaluations)
+            evaluations.append((score, seconds))
+            if key is not None:
+                self.cache.store(key, {'score': score, 'seconds': seconds})
+
+        for configuration, (_, _, seed), (score, seconds) in zip(configurations, arguments, evaluations):
+            self.results.append([bracket, rung, budget, json.dumps(configuration, sort_keys=True),
+                                 seed, score, seconds])
+
+            if score > self.best_score:
+                self.best_score = score
+                self.best_configuration = configuration
+
+        return [score for score, _ in evaluations]
+
+    def run(self, min_budget: int, max_budget: int, number_configurations: Union[int, None] = None, bracket: int = 0) -> tuple[dict, float]:
+        """
+        runs one successive halving bracket, from min_budget up to max_budget
+
+        returns:
+            best configuration of the last rung and its score
+        """
+        assert 0 < min_budget <= max_budget, "budgets should be 0 < min_budget <= max_budget"
+
+        configurations = self.get_configurations(number_configurations)
+        budget = min_budget
+        rung = 0
+
+        while True:
+            scores = self.evaluate(configurations, budget, bracket, rung)
+
+            # print progress to user
+            print(
+                f"Successive halving. Bracket: {bracket}, rung: {rung}, budget: {budget}, configurations: {len(configurations)}, best score: {max(scores)}")
+
+            if budget >= max_budget:
+                break
+
+            # promote the best fraction of the configurations to a larger budget
+            number_promoted = max(len(configurations) // self.reduction_factor, 1)
+            ranking = sorted(range(len(configurations)), key=lambda index: scores[index], reverse=True)
+            configurations = [configurations[index] for index in ranking[:number_promoted]]
+
+            budget = min(budget * self.reduction_factor, max_budget)
+            rung += 1
+
+        best_index = max(range(len(configurations)), key=lambda index: scores[index])
+
+        return configurations[best_index], scores[best_index]
+
+    def run_hyperband(self, min_budget: int, max_budget: int) -> tuple[dict, float]:
+        """
+        runs Hyperband: successive halving brackets that go from many configurations
+        with min_budget to few configurations with max_budget, so both early and
+        late bloomers get a chance
+
+        returns:
+            best configuration of the last rungs and its score
+        """
+        max_bracket = int(math.log(max_budget / min_budget, self.reduction_factor) + 1e-9)
+
+        best_configuration, best_score = None, None
+        for bracket in range(max_bracket, -1, -1):
+            number_configurations = math.ceil(
+                (max_bracket + 1) / (bracket + 1) * self.reduction_factor ** bracket)
+            budget = max(max_budget // self.reduction_factor ** bracket, 1)
+
+            configuration, score = self.run(budget, max_budget, number_configurations, bracket)
+
+            if best_score is None or score > best_score:
+                best_configuration, best_score = configuration, score
+
+        return best_configuration, best_score
+
+    def write_results(self, case_name: str) -> None:
+        """
+        writes all evaluations to data/tuning/{algorithm}_{case_name}.csv
+        """
+        os.makedirs("data/tuning", exist_ok=True)
+
+        with open(f"data/tuning/{self.algorithm}_{case_name}.csv", "w") as file:
+            writer = csv.writer(file)
+            writer.writerow(["bracket", "rung", "budget", "parameters", "seed", "score", "seconds"])
+            writer.writerows(self.results)
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import numpy as np
+from typing import Union
+
+from code.classes.state import State
+
+
+def get_code_version(directory: str = 'code') -> str:
+    """
+    gives a hash of the source of all Python files in the code directory, so a
+    change in an algorithm gives new cache keys
+
+    returns:
+        hexadecimal sha1 hash
+    """
+    code_hash = hashlib.sha1()
+
+    for root, directories, files in os.walk(directory):
+        directories.sort()
+        for file_name in sorted(files):
+            if file_name.endswith('.py'):
+                path = os.path.join(root, file_name)
+                code_hash.update(path.encode())
+                with open(path, 'rb') as file:
+                    code_hash.update(file.read())
+
+    return code_hash.hexdigest()
+
+
+def _to_json(value: object) -> Union[int, float, list]:
+    """
+    converts the NumPy values json can not write, integers stay integers
+    """
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    raise TypeError(f"can not write {type(value)} as JSON")
+
+
+class Result_cache():
+    def __init__(self, directory: str = 'data/result_cache', code_version: Union[str, None] = None) -> None:
+        """
+        initializes an on-disk cache of finished runs, every result is a JSON file
+        named after the hash of everything that determines the result
+
+        pre:
+            code_version is the version of the code in the keys, the hash of
+            the source of the code directory if None (see get_code_version)
+
+        post:
+            the cache directory is created when the first result is stored
+        """
+        self.directory = directory
+        self.code_version = code_version or get_code_version()
+
+    def get_key(self, algorithm: str, parameters: dict, state: 'State', seed: int, budget: Union[float, None] = None) -> str:
+        """
+        gives the key of a run: a hash of the code version, algorithm name,
+        parameters, network, constraint settings of the state, seed and budget
+
+        returns:
+            hexadecimal sha1 hash
+        """
+        constraints = [state.max_number_routes, state.time_frame, state.relaxed_all_connections,
+                       state.relaxed_max_routes, state.relaxed_time_frame]
+
+        content = json.dumps({'code_version': self.code_version,
+                              'algorithm': algorithm,
+                              'parameters': parameters,
+                              'network': state.get_network_hash(),
+                              'constraints': constraints,
+                              'seed': seed,
+                              'budget': budget}, sort_keys=True)
+
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        """
+        gives the file of a key, in a sub directory per first two characters
+        """
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.get_path(key))
+
+    def load(self, key: str) -> Union[dict, None]:
+        """
+        gives the stored result of a key
+
+        returns:
+            the result
+            None if the key is not in the cache
+        """
+        if key not in self:
+            return None
+
+        with open(self.get_path(key)) as file:
+            return json.load(file)
+
+    def store(self, key: str, result: dict) -> None:
+        """
+        stores a result, like the result rows and the compact best solution of a run
+
+        pre:
+            result can be written as JSON (NumPy integers are written as
+            integers, other NumPy numbers as floats, arrays as lists)
+
+        post:
+            the file is written completely or not at all, so an interrupted
+            experiment never leaves a broken result
+        """
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(result, file, default=_to_json)
+        os.replace(f"{path}.tmp", path)
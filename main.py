@@ -2,10 +2,15 @@ import subprocess
 import os
 
 from sys import argv
+from typing import Union
 
 from code.algorithms.hill_climber import Hill_climber, Hill_climber_restart
 from code.algorithms.simulated_annealing import Simulated_annealing
 from code.algorithms.plant_propagation import Plant_Propagation
+from code.algorithms.large_neighbourhood_search import Large_neighbourhood_search
+from code.algorithms.tabu_search import Tabu_search
+from code.algorithms.set_covering import Set_covering
+from code.algorithms.bound import get_upper_bound
 
 from code.visualisation import visualisation
 
@@ -38,19 +43,40 @@ def create_state(case_name: str) -> 'State':
     return state
 
 
-def run_hillclimber(state: 'State', valid_start_state: bool) -> 'State':
+def ask_move_settings() -> dict[str, bool]:
+    """
+    asks which extra moves the heavy changes should use
+
+    returns:
+        dict with route_exchange_moves (tail swap, split, merge and reverse) and
+        oracle_moves (replace the worst route by the best route of the oracle)
+    """
+    move_settings: dict[str, bool] = {}
+    for setting, question in (('route_exchange_moves', "Use the route exchange moves (tail swap, split, merge, reverse)? [yes|no] (recommended: yes for the Netherlands) "),
+                              ('oracle_moves', "Use the oracle move (replace the worst route by the best route)? [yes|no] (recommended: yes) ")):
+        answer: str = input(question)
+        assert answer.lower() in ('yes', 'no'), "answer should be yes or no"
+        move_settings[setting] = answer.lower() == 'yes'
+
+    return move_settings
+
+
+def run_hillclimber(state: 'State', valid_start_state: bool, greedy_start_state: bool = False, upper_bound: Union[float, None] = None, gap_threshold: Union[float, None] = None) -> 'State':
     """
     runs a hillclimber algorithm and returns endstate
 
     returns:
         State object
     """
-    hc = Hill_climber(state, valid_start_state=valid_start_state)
-    hc.run(10000, 0)
+    move_settings: dict[str, bool] = ask_move_settings()
+    hc = Hill_climber(state, valid_start_state=valid_start_state, **move_settings)
+    hc.greedy_start_state = greedy_start_state
+    hc.set_upper_bound(upper_bound, gap_threshold)
+    hc.run(10000, 0, change_light=not any(move_settings.values()))
     return hc.current_state
 
 
-def run_hillclimber_restart(state: 'State', valid_start_state) -> 'State':
+def run_hillclimber_restart(state: 'State', valid_start_state, greedy_start_state: bool = False, upper_bound: Union[float, None] = None, gap_threshold: Union[float, None] = None) -> 'State':
     """
     runs a hillclimber restart algorithm and returns state with best result
 
@@ -59,34 +85,44 @@ def run_hillclimber_restart(state: 'State', valid_start_state) -> 'State':
     """
     restarts: int = int(input(
         "After how many same scores should the algorithm restart? (recommended: 50) "))
+    move_settings: dict[str, bool] = ask_move_settings()
     hcr = Hill_climber_restart(
-        state, restarts, valid_start_state=valid_start_state)
-    score, best_state, scorelist = hcr.run(10000, 0)
+        state, restarts, valid_start_state=valid_start_state, **move_settings)
+    hcr.greedy_start_state = greedy_start_state
+    hcr.set_upper_bound(upper_bound, gap_threshold)
+    score, best_state, scorelist = hcr.run(
+        10000, 0, change_light=not any(move_settings.values()))
     return best_state
 
 
-def run_simulated_annealing(state: 'State', valid_start_state: bool) -> 'State':
+def run_simulated_annealing(state: 'State', valid_start_state: bool, greedy_start_state: bool = False, upper_bound: Union[float, None] = None, gap_threshold: Union[float, None] = None) -> 'State':
     """
     runs a simulated annealing algorithm and returns endstate
 
     returns: 
         State object
     """
-    temperature: int = int(
-        input("Pick a temperature for simulated annealing. (recommended: 200) "))
+    temperature: Union[int, str] = input(
+        "Pick a temperature for simulated annealing, or auto to calibrate it. (recommended: 200) ")
+    if temperature != 'auto':
+        temperature = int(temperature)
     cooling_scheme: str = input(
-        "Pick a cooling scheme. (possibilities: lineair, exponential, logaritmic) ")
-    assert cooling_scheme == 'lineair' or cooling_scheme == 'exponential' or cooling_scheme == 'logaritmic', "wrong spelling of cooling scheme"
+        "Pick a cooling scheme. (possibilities: lineair, exponential, logaritmic, adaptive, reheating) ")
+    assert cooling_scheme in ('lineair', 'exponential', 'logaritmic', 'adaptive', 'reheating'), "wrong spelling of cooling scheme"
+    move_settings: dict[str, bool] = ask_move_settings()
     print("Running...")
     sa = Simulated_annealing(
-        state, temperature, 10000, valid_start_state=valid_start_state)
+        state, temperature, 10000, valid_start_state=valid_start_state, **move_settings)
+    sa.greedy_start_state = greedy_start_state
+    sa.set_upper_bound(upper_bound, gap_threshold)
     sa.run(0, cooling_scheme)
     return sa.current_state
 
 
-def run_plant_propagation(state: 'State', valid_start_state: bool) -> 'State':
+def run_plant_propagation(state: 'State', valid_start_state: bool, greedy_start_state: bool = False, upper_bound: Union[float, None] = None, gap_threshold: Union[float, None] = None) -> 'State':
     """
-    runs a plant propagation algorithm and returns best state
+    runs a plant propagation algorithm and returns best state, a greedy start
+    gives hill climbers from the greedy state as initial population
 
     returns:
         State object
@@ -97,12 +133,76 @@ def run_plant_propagation(state: 'State', valid_start_state: bool) -> 'State':
         input("Choose a maximum number of generations. (recommended: 200) "))
     n_runners: int = int(
         input("Choose the number of runners. (recommended: 10) "))
+    move_settings: dict[str, bool] = ask_move_settings()
     ppa = Plant_Propagation(state, valid_start_state,
-                            population_size, max_generations, n_runners)
+                            population_size, max_generations, n_runners, **move_settings)
+    if greedy_start_state:
+        ppa.change_population_type('hill_climber_greedy')
+    ppa.set_upper_bound(upper_bound, gap_threshold)
     ppa.run()
     return ppa.best_state
 
 
+def run_large_neighbourhood_search(state: 'State', valid_start_state: bool, greedy_start_state: bool = False, upper_bound: Union[float, None] = None, gap_threshold: Union[float, None] = None) -> 'State':
+    """
+    runs a large neighbourhood search algorithm and returns best state
+
+    returns:
+        State object
+    """
+    destroy_size: int = int(input(
+        "How many routes should be destroyed per iteration? (recommended: 3) "))
+    lns = Large_neighbourhood_search(
+        state, destroy_size, valid_start_state=valid_start_state)
+    lns.greedy_start_state = greedy_start_state
+    lns.set_upper_bound(upper_bound, gap_threshold)
+    lns.run(10000, 0)
+    return lns.best_state
+
+
+def run_tabu_search(state: 'State', valid_start_state: bool, greedy_start_state: bool = False, upper_bound: Union[float, None] = None, gap_threshold: Union[float, None] = None) -> 'State':
+    """
+    runs a tabu search algorithm and returns state with best result
+
+    returns:
+        State object
+    """
+    tabu_size: int = int(input(
+        "How many recent solutions should be tabu? (recommended: 50) "))
+    neighbourhood_size: int = int(input(
+        "How many moves should be compared per iteration? (recommended: 10) "))
+    move_settings: dict[str, bool] = ask_move_settings()
+    ts = Tabu_search(state, tabu_size, neighbourhood_size,
+                     valid_start_state=valid_start_state, **move_settings)
+    ts.greedy_start_state = greedy_start_state
+    ts.set_upper_bound(upper_bound, gap_threshold)
+    score, best_state, scorelist = ts.run(1000, 0)
+    return best_state
+
+
+def run_set_covering(state: 'State', valid_start_state: bool) -> 'State':
+    """
+    runs the exact route selection solver and returns the selected routes,
+    the start state is not used
+
+    returns:
+        State object
+    """
+    time_limit: float = float(input(
+        "Pick a time limit in seconds for the solver. (recommended: 300) "))
+    max_pool_size: str = input(
+        "Pick a max number of routes in the pool, or all. (recommended: all for Holland, 60000 for the Netherlands) ")
+    sc = Set_covering(state, time_limit,
+                      None if max_pool_size == 'all' else int(max_pool_size))
+    best_state = sc.run()
+
+    # the solver only knows the routes of the pool, so optimal is only over the pool
+    pool: str = "simple routes" if max_pool_size == 'all' else "pruned pool of simple routes"
+    print(
+        f"Score: {sc.best_score}, upper bound over the {pool}: {sc.upper_bound}, optimal over the {pool}: {sc.is_optimal}")
+    return best_state
+
+
 def check_state(state: 'State', case_name: str) -> None:
     """
     runs check50 test on state, and prints the output to the terminal
@@ -143,39 +243,71 @@ if __name__ == "__main__":
         exit()
 
     # check if second algorithm is a valid algorithm name
-    if alg_name not in ('hillclimber', 'hillclimber_restart', 'simulated_annealing', 'plant_propagation'):
+    if alg_name not in ('hillclimber', 'hillclimber_restart', 'simulated_annealing', 'plant_propagation', 'large_neighbourhood_search', 'tabu_search', 'set_covering'):
         print(
-            "usage: python main.py [case name] [hillclimber|hillclimber_restart|simulated_annealing|plant_propagation]")
+            "usage: python main.py [case name] [hillclimber|hillclimber_restart|simulated_annealing|plant_propagation|large_neighbourhood_search|tabu_search|set_covering]")
         exit()
 
     state: 'State' = create_state(case_name)
 
     start_state: str = input(
-        "Choose a start state for your algorithm [valid|random] (Valid can take very long for the Netherlands case): ")
+        "Choose a start state for your algorithm [valid|random|greedy] (Valid can take very long for the Netherlands case): ")
+
+    # the greedy start state adds the best routes of the oracle one by one
+    greedy_start_state = start_state.lower() == "greedy"
 
     if start_state.lower() == "valid":
         valid_start_state = True
-    elif start_state.lower() == "random":
+    elif start_state.lower() in ("random", "greedy"):
         valid_start_state = False
     else:
-        print("Start state should either be random or valid!")
+        print("Start state should either be random, valid or greedy!")
         exit()
 
+    # the upper bound of the case, the algorithms report the gap of their result to it
+    upper_bound: float = get_upper_bound(state)
+    gap_threshold: Union[float, None] = None
+    if alg_name != "set_covering":
+        threshold: str = input(
+            f"Stop when the gap to the upper bound ({upper_bound:.0f}) is at most this fraction, or none. (recommended: none) ")
+        if threshold.lower() != "none":
+            gap_threshold = float(threshold)
+
     # run chosen algorithm
     print(f"\nRunning {alg_name} algorithm. This may take a while.")
     if alg_name == "hillclimber":
-        state = run_hillclimber(state, valid_start_state)
+        state = run_hillclimber(state, valid_start_state, greedy_start_state,
+                                upper_bound, gap_threshold)
     elif alg_name == "hillclimber_restart":
-        state = run_hillclimber_restart(state, valid_start_state)
+        state = run_hillclimber_restart(state, valid_start_state, greedy_start_state,
+                                        upper_bound, gap_threshold)
     elif alg_name == "simulated_annealing":
-        state = run_simulated_annealing(state, valid_start_state)
+        state = run_simulated_annealing(state, valid_start_state, greedy_start_state,
+                                        upper_bound, gap_threshold)
     elif alg_name == "plant_propagation":
-        state = run_plant_propagation(state, valid_start_state)
+        state = run_plant_propagation(state, valid_start_state, greedy_start_state,
+                                      upper_bound, gap_threshold)
+    elif alg_name == "large_neighbourhood_search":
+        state = run_large_neighbourhood_search(state, valid_start_state, greedy_start_state,
+                                               upper_bound, gap_threshold)
+    elif alg_name == "tabu_search":
+        state = run_tabu_search(state, valid_start_state, greedy_start_state,
+                                upper_bound, gap_threshold)
+    elif alg_name == "set_covering":
+        state = run_set_covering(state, valid_start_state)
 
     # show result state
     print("\nResult state:")
     print(state.show())
 
+    # show how far the result is from optimal at most, the gap is only
+    # meaningful for a state within the constraints
+    if state.is_valid_solution_without_connection():
+        print(
+            f"Upper bound: {upper_bound}, gap: {(upper_bound - state.calculate_score()) / upper_bound:.2%}")
+    else:
+        print(f"Upper bound: {upper_bound}, no gap: the result state breaks the constraints")
+
     # visualize result state
     print("\nLoading visualisation into your browser...")
     visualisation.show_plot(